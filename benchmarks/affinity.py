@@ -0,0 +1,75 @@
+"""Benchmark reading a chunk from the NUMA node it lives on versus another.
+
+A chunk is placed on node 0 by first touch, as the acquisition loop does,
+then a process pinned to node 0 and one pinned to the last node each sum it
+repeatedly. On single-node machines only the local bandwidth is reported.
+"""
+
+import numpy as np
+from multiprocessing import Process, Queue
+from time import perf_counter
+from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
+from exaspim.operations.affinity import numa_node_count, numa_node_cpus, \
+    set_process_affinity, first_touch
+
+chunk_shape = (64, 2048, 2048)
+repeats = 10
+
+
+def read_chunk(shm_name: str, shape: tuple, cpus: list[int], repeats: int,
+               results: Queue):
+    """Sum the chunk `repeats` times from `cpus` and report the MB/s."""
+    from multiprocessing.shared_memory import SharedMemory
+    set_process_affinity(cpus)
+    shm = SharedMemory(shm_name, create=False)
+    chunk = np.ndarray(shape, dtype='uint16', buffer=shm.buf)
+    chunk.sum(dtype=np.uint64)  # Warm up.
+    start_time = perf_counter()
+    for _ in range(repeats):
+        chunk.sum(dtype=np.uint64)
+    elapsed_time = perf_counter() - start_time
+    results.put(chunk.nbytes * repeats / 1.0e6 / elapsed_time)
+    chunk = None
+    shm.close()
+
+
+def read_bandwidth(buffer: SharedDoubleBuffer, cpus: list[int], count: int):
+    results = Queue()
+    reader = Process(target=read_chunk,
+                     args=(buffer.read_buf_mem_name, buffer.read_buf.shape,
+                           cpus, count, results))
+    reader.start()
+    bandwidth = results.get()
+    reader.join()
+    return bandwidth
+
+
+def run(quick: bool = False):
+    """Measure local (and, with several nodes, remote) read bandwidth.
+
+    :param quick: use a smaller chunk and fewer repeats.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    shape = (8, 1024, 1024) if quick else chunk_shape
+    count = 3 if quick else repeats
+    node_count = numa_node_count()
+    local_cpus = numa_node_cpus(0)
+    buffer = SharedDoubleBuffer(shape, 'uint16')
+    try:
+        first_touch(buffer.read_buf, local_cpus)
+        buffer.read_buf[:] = 1
+        results = {'local_read_bandwidth':
+                   (read_bandwidth(buffer, local_cpus, count), 'MB/s')}
+        if node_count > 1:
+            remote_cpus = numa_node_cpus(node_count - 1)
+            results['remote_read_bandwidth'] = \
+                (read_bandwidth(buffer, remote_cpus, count), 'MB/s')
+    finally:
+        buffer.close_and_unlink()
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{numa_node_count()} NUMA node(s).")
+    for metric, (value, unit) in run().items():
+        print(f"{metric}: {value:.1f} [{unit}]")
@@ -0,0 +1,46 @@
+"""Benchmark the CPU downsampler against the OpenCL one on a full frame."""
+
+import numpy as np
+from time import perf_counter
+from exaspim.operations.cpu_img_downsample import DownSampleCPU
+
+rows = 10640
+cols = 14192
+repeats = 10
+
+
+def time_compute(downsampler, image, repeats: int = repeats):
+    """Return the mean time in seconds for one pyramid, after a warm-up."""
+    downsampler.compute(image)  # Warm up (kernel build, buffer allocation).
+    start_time = perf_counter()
+    for _ in range(repeats):
+        downsampler.compute(image)
+    return (perf_counter() - start_time) / repeats
+
+
+def run(quick: bool = False):
+    """Time every available downsampler backend.
+
+    :param quick: use a smaller frame and fewer repeats.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    shape = (1024, 1024) if quick else (rows, cols)
+    count = 3 if quick else repeats
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 2**14, size=shape, dtype=np.uint16)
+    results = {}
+    cpu_downsampler = DownSampleCPU()
+    results['cpu_pyramid_time'] = (time_compute(cpu_downsampler, image, count), 's')
+    cpu_downsampler.close()
+    try:
+        from exaspim.operations.gpu_img_downsample import DownSample
+        results['gpu_pyramid_time'] = (time_compute(DownSample(), image, count), 's')
+    except Exception as e:
+        print(f"Skipping OpenCL downsampler: {e}")
+    return results
+
+
+if __name__ == "__main__":
+    for metric, (seconds, unit) in run().items():
+        print(f"{metric}: {seconds*1e3:.1f} [ms] per {rows}x{cols} pyramid "
+              f"({1/seconds:.1f} [fps]).")
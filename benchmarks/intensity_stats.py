@@ -0,0 +1,38 @@
+"""Benchmark histogramming a chunk of full frames, as the intensity
+statistics process does after each chunk is handed to the writers."""
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from exaspim.operations.intensity_statistics import frame_statistics, \
+    merge_statistics
+from exaspim.processes.intensity_stats_processor import SLAB_ROWS
+
+rows = 10640
+cols = 14192
+chunk_frames = 4
+thread_count = 4
+
+
+def run(quick: bool = False):
+    """Time the statistics of one chunk.
+
+    :param quick: use smaller frames.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    shape = (chunk_frames, 1024, 1024) if quick else (chunk_frames, rows, cols)
+    rng = np.random.default_rng(0)
+    chunk = rng.integers(0, 2**14, size=shape, dtype=np.uint16) << 2
+    with ThreadPoolExecutor(max_workers=thread_count) as pool:
+        start_time = perf_counter()
+        slabs = [frame[row:row + SLAB_ROWS] for frame in chunk
+                 for row in range(0, shape[1], SLAB_ROWS)]
+        merge_statistics(list(pool.map(
+            lambda slab: frame_statistics(slab, 0xFFFC, 4), slabs)))
+        elapsed_time = perf_counter() - start_time
+    return {'intensity_stats_fps': (chunk_frames / elapsed_time, 'fps')}
+
+
+if __name__ == "__main__":
+    for metric, (value, unit) in run().items():
+        print(f"{metric}: {value:.1f} [{unit}] for {rows}x{cols} frames.")
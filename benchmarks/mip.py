@@ -0,0 +1,78 @@
+"""Benchmark MIPProcessor throughput with the same handshake as acquisition."""
+
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from exaspim.operations.synthetic_specimen import SyntheticSpecimen
+from exaspim.processes.mip_processor import MIPProcessor
+
+rows = 10640
+cols = 14192
+frame_count = 64
+
+
+def feed_frames(shape: tuple, count: int, frames: list,
+                focus_sample_period: int = 0):
+    """Time one stack through a MIPProcessor.
+
+    :return: (frames per second, time to write the MIPs after the stack).
+    """
+    nbytes = int(np.prod(shape, dtype=np.int64) * np.dtype('uint16').itemsize)
+    shm = SharedMemory(create=True, size=nbytes)
+    latest_img = np.ndarray(shape, dtype='uint16', buffer=shm.buf)
+    try:
+        with TemporaryDirectory() as tmp_dir:
+            worker = MIPProcessor(0, 0, count, *shape, 'uint16', shm.name,
+                                  Path(tmp_dir), 0, 'zlib',
+                                  focus_sample_period=focus_sample_period)
+            worker.more_images.set()
+            worker.start()
+            start_time = perf_counter()
+            for frame_index in range(count):
+                while worker.new_image.is_set():
+                    if not worker.is_alive():
+                        raise RuntimeError("MIPProcessor exited early.")
+                latest_img[:, :] = frames[frame_index % len(frames)]
+                worker.frame_index.value = frame_index
+                worker.new_image.set()
+            while worker.new_image.is_set():
+                pass
+            stack_time = perf_counter() - start_time
+            worker.more_images.clear()
+            write_start_time = perf_counter()
+            if focus_sample_period:
+                worker.focus_results.get()
+            worker.join()
+            write_time = perf_counter() - write_start_time
+    finally:
+        latest_img = None
+        shm.close()
+        shm.unlink()
+    return count / stack_time, write_time
+
+
+def run(quick: bool = False):
+    """Feed frames to a MIPProcessor as fast as it takes them, with and
+    without focus scoring.
+
+    :param quick: use smaller frames and a shorter stack.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    shape = (1024, 1024) if quick else (rows, cols)
+    count = 16 if quick else frame_count
+    specimen = SyntheticSpecimen(*shape, seed=0)
+    frames = [specimen.frame(z) for z in range(min(count, 8))]
+    specimen.close()
+    frame_rate, write_time = feed_frames(shape, count, frames)
+    # Score every frame for a worst case.
+    focus_frame_rate, _ = feed_frames(shape, count, frames, focus_sample_period=1)
+    return {'frame_rate': (frame_rate, 'fps'),
+            'mip_write_time': (write_time, 's'),
+            'frame_rate_with_focus': (focus_frame_rate, 'fps')}
+
+
+if __name__ == "__main__":
+    for metric, (value, unit) in run().items():
+        print(f"{metric}: {value:.3f} [{unit}]")
@@ -0,0 +1,86 @@
+"""Benchmark the SharedDoubleBuffer handoff between processes.
+
+The consumer mirrors the StackWriter handshake: it polls `done_reading`,
+attaches to the shared memory named by the producer, reads it, and sets
+`done_reading` again. The round trip is the time from the producer handing
+over a chunk until the consumer has released it, minus the reading itself.
+"""
+
+import numpy as np
+from ctypes import c_wchar
+from multiprocessing import Process, Array, Event
+from multiprocessing.shared_memory import SharedMemory
+from time import perf_counter, sleep
+from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
+
+handoff_count = 200
+
+
+class HandoffConsumer(Process):
+    """Stand-in for a StackWriter that releases each chunk immediately."""
+
+    def __init__(self, shape: tuple, dtype: str, handoff_count: int):
+        super().__init__()
+        self.shape = shape
+        self.dtype = dtype
+        self.handoff_count = handoff_count
+        self._shm_name = Array(c_wchar, 32)
+        self.done_reading = Event()
+        self.done_reading.set()
+
+    @property
+    def shm_name(self):
+        return str(self._shm_name[:]).split('\x00')[0]
+
+    @shm_name.setter
+    def shm_name(self, name: str):
+        self._shm_name[:len(name) + 1] = name + '\x00'
+
+    def run(self):
+        nbytes = int(np.prod(self.shape, dtype=np.int64) * np.dtype(self.dtype).itemsize)
+        for _ in range(self.handoff_count):
+            while self.done_reading.is_set():
+                sleep(0.001)  # Same poll interval as the StackWriter.
+            shm = SharedMemory(self.shm_name, create=False, size=nbytes)
+            frames = np.ndarray(self.shape, self.dtype, buffer=shm.buf)
+            frames[0, 0, 0]  # Touch the data.
+            frames = None
+            shm.close()
+            self.done_reading.set()
+
+
+def run(quick: bool = False):
+    """Measure handoff latency and the buffer toggle time.
+
+    :param quick: do fewer handoffs.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    count = 20 if quick else handoff_count
+    shape = (4, 256, 256)
+    buffer = SharedDoubleBuffer(shape, 'uint16')
+    consumer = HandoffConsumer(shape, 'uint16', count)
+    consumer.start()
+    latencies = []
+    toggle_times = []
+    try:
+        for _ in range(count):
+            start_time = perf_counter()
+            buffer.toggle_buffers()
+            consumer.shm_name = buffer.read_buf_mem_name
+            toggle_times.append(perf_counter() - start_time)
+            consumer.done_reading.clear()
+            while not consumer.done_reading.is_set():
+                if not consumer.is_alive() and not consumer.done_reading.is_set():
+                    raise RuntimeError("Handoff consumer exited early.")
+            latencies.append(perf_counter() - start_time)
+        consumer.join()
+    finally:
+        buffer.close_and_unlink()
+    return {'handoff_latency_median': (float(np.median(latencies)), 's'),
+            'handoff_latency_p99': (float(np.percentile(latencies, 99)), 's'),
+            'toggle_time_median': (float(np.median(toggle_times)), 's')}
+
+
+if __name__ == "__main__":
+    for metric, (seconds, unit) in run().items():
+        print(f"{metric}: {seconds*1e3:.3f} [ms]")
@@ -0,0 +1,30 @@
+"""Reduced-size copies of the simulated instrument config for benchmarks."""
+
+import toml
+from pathlib import Path
+
+SIM_CONFIG_PATH = Path(__file__).parent.parent / "bin" / "sim_config.toml"
+
+
+def write_sim_config(dest_dir: Path, rows: int = None, cols: int = None,
+                     chunk_size: int = None):
+    """Write a copy of the simulated config with a smaller sensor or chunk.
+
+    :param dest_dir: folder to write `sim_config.toml` into.
+    :param rows: sensor rows or None to keep the configured value.
+    :param cols: sensor columns or None to keep the configured value.
+    :param chunk_size: compressor chunk size or None to keep the configured
+        value.
+    :return: the path to the new config.
+    """
+    cfg = toml.load(SIM_CONFIG_PATH)
+    if rows is not None:
+        cfg['tile_specs']['row_count_pixels'] = rows
+    if cols is not None:
+        cfg['tile_specs']['column_count_pixels'] = cols
+    if chunk_size is not None:
+        cfg['compressor_specs']['image_stack_chunk_size'] = chunk_size
+    config_path = Path(dest_dir) / "sim_config.toml"
+    with open(config_path, 'w') as toml_file:
+        toml.dump(cfg, toml_file)
+    return config_path
@@ -0,0 +1,77 @@
+"""Benchmark each StackWriter compression backend end to end."""
+
+from math import ceil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
+from exaspim.operations.synthetic_specimen import SyntheticSpecimen
+from exaspim.processes.stack_writer import StackWriter
+
+rows = 10640
+cols = 14192
+chunk_size = 64
+frame_count = 256
+backends = ('lz4', 'none')
+
+
+def time_stack(compression_style: str, shape: tuple, chunk_size: int,
+               frame_count: int, thread_count: int, specimen, dest_path: Path):
+    """Write one stack, handing chunks over as the acquisition loop does.
+
+    :return: seconds from the first handoff until the file is closed.
+    """
+    buffer = SharedDoubleBuffer((chunk_size, *shape), 'uint16')
+    for z, frame in enumerate(buffer.write_buf):
+        specimen.frame(z, out=frame)
+    for z, frame in enumerate(buffer.read_buf):
+        specimen.frame(chunk_size + z, out=frame)
+    writer = StackWriter(*shape, frame_count, 0, 0, 1, 1, 1, chunk_size,
+                         ('z', 'y', 'x'), thread_count, compression_style,
+                         'uint16', dest_path, f"bench_{compression_style}",
+                         "0", "#ffffff")
+    writer.start()
+    start_time = perf_counter()
+    try:
+        for _ in range(ceil(frame_count / chunk_size)):
+            while not writer.done_reading.is_set():
+                if not writer.is_alive():
+                    raise RuntimeError("StackWriter exited early.")
+                sleep(0.001)
+            buffer.toggle_buffers()
+            writer.shm_name = buffer.read_buf_mem_name
+            writer.done_reading.clear()
+        writer.join()
+    finally:
+        buffer.close_and_unlink()
+    return perf_counter() - start_time
+
+
+def run(quick: bool = False, thread_count: int = 32):
+    """Write a synthetic stack with every backend.
+
+    :param quick: use smaller frames and a shorter stack.
+    :param thread_count: compressor threads, as in the config.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    shape = (1024, 1024) if quick else (rows, cols)
+    chunk = 16 if quick else chunk_size
+    count = 64 if quick else frame_count
+    specimen = SyntheticSpecimen(*shape, seed=0)
+    stack_mb = count * shape[0] * shape[1] * 2 / 1.0e6
+    results = {}
+    try:
+        for backend in backends:
+            with TemporaryDirectory() as tmp_dir:
+                seconds = time_stack(backend, shape, chunk, count,
+                                     thread_count, specimen, Path(tmp_dir))
+            results[f'{backend}_frame_rate'] = (count / seconds, 'fps')
+            results[f'{backend}_data_rate'] = (stack_mb / seconds, 'MB/s')
+    finally:
+        specimen.close()
+    return results
+
+
+if __name__ == "__main__":
+    for metric, (value, unit) in run().items():
+        print(f"{metric}: {value:.1f} [{unit}]")
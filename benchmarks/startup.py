@@ -0,0 +1,102 @@
+"""Benchmark startup: importing the instrument, constructing it, and spawning
+its worker processes.
+
+Imports are timed in a fresh interpreter so modules this process already
+loaded don't hide their cost. Workers are started with the spawn method, as
+on Windows, so each one re-runs the main script (bin/main.py) as __mp_main__
+and then imports its entry point's module graph.
+"""
+
+import runpy
+import subprocess
+import sys
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+repeats = 5
+MAIN_SCRIPT = Path(__file__).parent.parent / "bin" / "main.py"
+# Worker entry point name to the module a spawned child has to import.
+WORKER_MODULES = {
+    'mip_processor': 'exaspim.processes.mip_processor',
+    'intensity_stats': 'exaspim.processes.intensity_stats_processor',
+    'stack_writer': 'exaspim.processes.stack_writer',
+    'remote_stack_writer': 'exaspim.processes.remote_stack_writer',
+}
+IMPORT_SCRIPT = ("import sys; from time import perf_counter; "
+                 "start_time = perf_counter(); import exaspim.exaspim; "
+                 "print(perf_counter() - start_time, len(sys.modules))")
+
+
+def import_module(name: str, main_path: str = None):
+    """Spawned worker body: re-run the main script the way spawn prepares a
+    child of it, then import what the real worker's class needs."""
+    try:
+        if main_path is not None:
+            runpy.run_path(main_path, run_name='__mp_main__')
+        __import__(name)
+    except ImportError:
+        sys.exit(1)
+
+
+def time_import():
+    """Import exaspim.exaspim in a fresh interpreter.
+
+    :return: (seconds, number of modules loaded).
+    """
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT],
+                                     cwd=Path(__file__).parent.parent,
+                                     text=True)
+    seconds, module_count = output.split()
+    return float(seconds), int(module_count)
+
+
+def time_spawn(module: str, count: int, main_path: Path = MAIN_SCRIPT):
+    """Average time to spawn a child of `main_path` that imports `module` and
+    exits, or None if the child couldn't import it (i.e: a missing package).
+    """
+    context = get_context('spawn')
+    start_time = perf_counter()
+    for _ in range(count):
+        worker = context.Process(target=import_module,
+                                 args=(module, str(main_path)))
+        worker.start()
+        worker.join()
+        if worker.exitcode != 0:
+            return None
+    return (perf_counter() - start_time) / count
+
+
+def run(quick: bool = False):
+    """Time the import, the construction of a simulated instrument, and the
+    spawn of each worker type.
+
+    :param quick: use fewer repeats and a smaller simulated sensor.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    # Imported here so spawned workers, which import this module to find
+    # their entry point, don't pay for the instrument's imports.
+    from benchmarks.sim_config import write_sim_config
+    from exaspim.exaspim import Exaspim
+    count = 1 if quick else repeats
+    import_times, module_counts = zip(*(time_import() for _ in range(count)))
+    results = {'import_time': (min(import_times), 's'),
+               'import_module_count': (min(module_counts), 'modules')}
+    shape = (512, 512) if quick else (None, None)
+    with TemporaryDirectory() as tmp_dir:
+        config_path = write_sim_config(Path(tmp_dir), *shape)
+        start_time = perf_counter()
+        instrument = Exaspim(str(config_path), simulated=True)
+        results['construct_time'] = (perf_counter() - start_time, 's')
+        instrument.close()
+    for name, module in WORKER_MODULES.items():
+        spawn_time = time_spawn(module, count)
+        if spawn_time is not None:
+            results[f'spawn_{name}_time'] = (spawn_time, 's')
+    return results
+
+
+if __name__ == "__main__":
+    for metric, (value, unit) in run().items():
+        print(f"{metric}: {value:.3f} [{unit}]")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite and compare results against a stored baseline.
+
+.. code-block: bash
+
+    python -m benchmarks.suite run --output baseline.json
+    # ...make changes...
+    python -m benchmarks.suite run --output results.json
+    python -m benchmarks.suite compare results.json baseline.json
+
+Results are JSON files holding a hardware fingerprint and, per benchmark,
+either its metrics or the reason it was skipped (i.e: a missing optional
+package). `compare` exits with a nonzero status if any metric regressed by
+more than the tolerance.
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import traceback
+import numpy as np
+from datetime import datetime
+from os import cpu_count
+from pathlib import Path
+from psutil import cpu_count as physical_cpu_count, virtual_memory
+
+# Benchmark name to the module implementing `run(quick: bool) -> dict`.
+BENCHMARKS = {
+    'waveforms': 'benchmarks.waveforms',
+    'mip': 'benchmarks.mip',
+    'downsample': 'benchmarks.downsample',
+    'shared_double_buffer': 'benchmarks.shared_double_buffer',
+    'stack_writer': 'benchmarks.stack_writer',
+    'zstack_tile': 'benchmarks.zstack_tile',
+    'affinity': 'benchmarks.affinity',
+    'intensity_stats': 'benchmarks.intensity_stats',
+    'startup': 'benchmarks.startup',
+    'tile_transition': 'benchmarks.tile_transition',
+}
+# Units where larger values are better. Everything else is a time.
+HIGHER_IS_BETTER_UNITS = {'fps', 'MB/s'}
+# Fingerprint fields that must match for a comparison to be meaningful.
+HARDWARE_KEYS = ('machine', 'processor', 'logical_cpus', 'physical_cpus',
+                 'memory_gb')
+
+
+def _processor_name():
+    """CPU model name, which platform.processor() omits on Linux."""
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, stderr=subprocess.DEVNULL,
+            text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def hardware_fingerprint():
+    """Describe the machine and software the benchmarks ran on."""
+    return {'hostname': platform.node(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'processor': _processor_name(),
+            'logical_cpus': cpu_count(),
+            'physical_cpus': physical_cpu_count(logical=False),
+            'memory_gb': round(virtual_memory().total / 1024**3, 1),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'git_commit': _git_commit()}
+
+
+def run_benchmarks(names: list[str], quick: bool = False):
+    """Run the named benchmarks and return the results as a dict."""
+    results = {'fingerprint': hardware_fingerprint(),
+               'created': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+               'quick': quick,
+               'benchmarks': {}}
+    for name in names:
+        print(f"Running {name} benchmark.")
+        try:
+            module = importlib.import_module(BENCHMARKS[name])
+            metrics = module.run(quick=quick)
+        except ImportError as e:
+            print(f"Skipping {name} benchmark: {e}")
+            results['benchmarks'][name] = {'skipped': str(e)}
+            continue
+        except Exception as e:
+            traceback.print_exc()
+            results['benchmarks'][name] = {'failed': repr(e)}
+            continue
+        results['benchmarks'][name] = \
+            {'metrics': {metric: {'value': value, 'unit': unit}
+                         for metric, (value, unit) in metrics.items()}}
+        for metric, (value, unit) in metrics.items():
+            print(f"  {metric}: {value:.6g} [{unit}]")
+    return results
+
+
+def compare_results(results: dict, baseline: dict, tolerance: float = 0.1):
+    """Compare two result dicts metric by metric.
+
+    :param results: the new results.
+    :param baseline: the stored baseline results.
+    :param tolerance: fractional change allowed before a metric counts as
+        a regression, i.e: 0.1 for 10%.
+    :return: list of (benchmark, metric, baseline value, new value, change,
+        regressed) tuples, where change is the fractional change in the
+        metric's "better" direction (negative is worse).
+    """
+    rows = []
+    for name, baseline_entry in baseline['benchmarks'].items():
+        new_metrics = results['benchmarks'].get(name, {}).get('metrics', {})
+        for metric, old in baseline_entry.get('metrics', {}).items():
+            if metric not in new_metrics or not old['value']:
+                continue
+            new = new_metrics[metric]
+            change = (new['value'] - old['value']) / abs(old['value'])
+            if old['unit'] not in HIGHER_IS_BETTER_UNITS:
+                change = -change
+            rows.append((name, metric, old['value'], new['value'], change,
+                         change < -tolerance))
+    return rows
+
+
+def _run(args):
+    names = args.only or list(BENCHMARKS)
+    results = run_benchmarks(names, args.quick)
+    if args.output:
+        with open(args.output, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+        print(f"Wrote results to {args.output}.")
+    return 0
+
+
+def _compare(args):
+    with open(args.results) as json_file:
+        results = json.load(json_file)
+    with open(args.baseline) as json_file:
+        baseline = json.load(json_file)
+    for key in HARDWARE_KEYS:
+        new, old = results['fingerprint'].get(key), baseline['fingerprint'].get(key)
+        if new != old:
+            print(f"WARNING: {key} differs from the baseline ({new} vs {old}).")
+    if results.get('quick') != baseline.get('quick'):
+        print("WARNING: comparing quick and full benchmark runs.")
+    rows = compare_results(results, baseline, args.tolerance)
+    for name, metric, old, new, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name + '.' + metric:<50} {old:>12.6g} {new:>12.6g} "
+              f"{change:>+8.1%} {flag}")
+    for name, entry in results['benchmarks'].items():
+        if 'metrics' not in entry:
+            print(f"{name} did not run: {entry.get('skipped') or entry.get('failed')}")
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) beyond {args.tolerance:.0%}.")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the benchmarks.")
+    run_parser.add_argument("--output", type=str, default=None,
+                            help="JSON file to save the results to.")
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS),
+                            help="benchmarks to run (default: all).")
+    run_parser.add_argument("--quick", default=False, action="store_true",
+                            help="use small images for a fast smoke test.")
+    run_parser.set_defaults(func=_run)
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag regressions against a baseline.")
+    compare_parser.add_argument("results", type=str)
+    compare_parser.add_argument("baseline", type=str)
+    compare_parser.add_argument("--tolerance", type=float, default=0.1,
+                                help="fractional slowdown allowed per metric.")
+    compare_parser.set_defaults(func=_compare)
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark a tile transition on the timed simulated Tiger controller.
+
+A transition to a new column moves x, y and focus, takes out the z backlash,
+and loads the next tile's waveforms. The serial version waits for each move
+before issuing the next, as the acquisition loop used to. The planned
+version issues independent moves together through :class:`MotionPlanner`
+and loads the waveforms while the stage moves.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from benchmarks.sim_config import write_sim_config
+from exaspim.exaspim_config import ExaspimConfig
+from exaspim.devices.sim_tiger import TimedSimTigerController
+from exaspim.operations.motion_planner import MotionPlanner
+from exaspim.operations.waveform_generator import generate_waveforms
+from spim_core.devices.tiger_components import SamplePose
+from tigerasi.tiger_controller import STEPS_PER_UM
+
+focus_move_um = 50  # refocus between channels.
+
+
+def serial_transition(tigerbox, sample_pose, cfg, x, y, z_backup, n):
+    sample_pose.move_absolute(x=x, wait=True)
+    generate_waveforms(cfg, channels=cfg.channels[:1])
+    tigerbox.move_absolute(n=n)
+    sample_pose.move_absolute(y=y, wait=True)
+    sample_pose.move_absolute(z=z_backup, wait=True)
+    sample_pose.move_absolute(z=0, wait=True)
+    tigerbox.wait_until_idle()  # Focus wasn't waited on.
+
+
+def planned_transition(planner, cfg, x, y, z_backup, n):
+    planner.move(x=x, y=y, z=z_backup)
+    planner.move_tiger(n=n)
+    with planner.moving():
+        generate_waveforms(cfg, channels=cfg.channels[:1])
+    planner.move(z=0)
+    planner.start()
+    planner.wait()
+
+
+def run(quick: bool = False):
+    """Time one column-changing tile transition both ways.
+
+    :param quick: move a tenth of the distances.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    scale = 0.1 if quick else 1.
+    with TemporaryDirectory() as tmp_dir:
+        cfg = ExaspimConfig(write_sim_config(Path(tmp_dir)))
+    generate_waveforms(cfg, channels=cfg.channels[:1])  # Warm up imports.
+    x_step_um, y_step_um = (scale * size * (1 - overlap / 100.)
+                            for size, overlap in
+                            [(cfg.tile_size_x_um, cfg.tile_overlap_x_percent),
+                             (cfg.tile_size_y_um, cfg.tile_overlap_y_percent)])
+    results = {}
+    for name in ['serial', 'planned']:
+        tigerbox = TimedSimTigerController(
+            **cfg.tiger_obj_kwds,
+            build_config={'Motor Axes': ['X', 'Y', 'Z', 'M', 'N', 'W', 'V']})
+        sample_pose = SamplePose(tigerbox, **cfg.sample_pose_kwds)
+        # Start at the top of the previous column's last stack.
+        sample_pose.move_absolute(y=round(scale * y_step_um * STEPS_PER_UM),
+                                  z=round(scale * cfg.volume_z_um * STEPS_PER_UM),
+                                  wait=True)
+        moves = dict(x=round(x_step_um * STEPS_PER_UM), y=0,
+                     z_backup=round(-STEPS_PER_UM * cfg.stage_backlash_reset_dist_um),
+                     n=round(scale * focus_move_um * STEPS_PER_UM))
+        start_time = perf_counter()
+        if name == 'serial':
+            serial_transition(tigerbox, sample_pose, cfg, **moves)
+        else:
+            planned_transition(MotionPlanner(tigerbox, sample_pose), cfg, **moves)
+        results[f'{name}_transition_time'] = (perf_counter() - start_time, 's')
+    return results
+
+
+if __name__ == "__main__":
+    for metric, (seconds, unit) in run().items():
+        print(f"{metric}: {seconds:.3f} [s]")
@@ -0,0 +1,35 @@
+"""Benchmark waveform generation for every channel combination we use."""
+
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from benchmarks.sim_config import write_sim_config
+from exaspim.exaspim_config import ExaspimConfig
+from exaspim.operations.waveform_generator import generate_waveforms
+
+repeats = 20
+
+
+def run(quick: bool = False):
+    """Time `generate_waveforms` for one channel and for all channels.
+
+    :param quick: use fewer repeats.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    count = 3 if quick else repeats
+    results = {}
+    with TemporaryDirectory() as tmp_dir:
+        cfg = ExaspimConfig(write_sim_config(tmp_dir))
+        channel_sets = {'one_channel': cfg.channels[:1],
+                        'all_channels': [int(ch) for ch in cfg.channel_specs]}
+        for name, channels in channel_sets.items():
+            generate_waveforms(cfg, channels=channels)  # Warm up imports.
+            start_time = perf_counter()
+            for _ in range(count):
+                generate_waveforms(cfg, channels=channels)
+            results[f'{name}_time'] = ((perf_counter() - start_time) / count, 's')
+    return results
+
+
+if __name__ == "__main__":
+    for metric, (seconds, unit) in run().items():
+        print(f"{metric}: {seconds*1e3:.2f} [ms]")
@@ -0,0 +1,56 @@
+"""Benchmark one simulated tile through `Exaspim._collect_zstacks`.
+
+Simulated frames arrive on the simulated DAQ's pulse schedule, so the tile
+can't finish faster than `frame_count` pulse periods. The overhead metric is
+the time spent on top of that, i.e: the software's share of the tile time.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from benchmarks.sim_config import write_sim_config
+from exaspim.exaspim import Exaspim
+
+rows = 2048
+cols = 2048
+chunk_size = 16
+frame_count = 64
+
+
+def run(quick: bool = False):
+    """Acquire one single-channel tile with the simulated instrument.
+
+    :param quick: use smaller frames and a shorter stack.
+    :return: dict {<metric name>: (<value>, <unit>)}.
+    """
+    shape = (512, 512) if quick else (rows, cols)
+    count = 16 if quick else frame_count
+    chunk = 8 if quick else chunk_size
+    with TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        config_path = write_sim_config(tmp_dir, *shape, chunk_size=chunk)
+        instrument = Exaspim(str(config_path), simulated=True)
+        try:
+            channel = instrument.cfg.channels[0]
+            instrument.deriv_storage_dir = tmp_dir
+            instrument.stage_x_pos_um = 0
+            instrument.stage_y_pos_um = 0
+            instrument._setup_waveform_hardware([channel])
+            ideal_time = count * instrument.ni.pulse_period_s
+            start_time = perf_counter()
+            instrument._collect_zstacks([channel], count,
+                                        instrument.cfg.z_step_size_um, chunk,
+                                        tmp_dir, "bench_tile", 0, 0)
+            tile_time = perf_counter() - start_time
+            instrument._join_mip_workers()
+            total_time = perf_counter() - start_time
+        finally:
+            instrument.close()
+    return {'tile_time': (tile_time, 's'),
+            'tile_overhead': (tile_time - ideal_time, 's'),
+            'tile_with_mips_time': (total_time, 's')}
+
+
+if __name__ == "__main__":
+    for metric, (seconds, unit) in run().items():
+        print(f"{metric}: {seconds:.3f} [s]")
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """main script to launch the exaspim with a config.toml file."""
 
-from exaspim.exaspim import Exaspim
 from coloredlogs import ColoredFormatter
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from tqdm import tqdm
 import ctypes
+import json
 import logging
 import argparse
 import os
@@ -24,6 +27,41 @@ class SpimLogFilter(logging.Filter):
             self.__class__.VALID_LOGGER_BASES
 
 
+class SchemaLogFilter(logging.Filter):
+    """Keeps only records tagged with 'schema'."""
+
+    def filter(self, record):
+        return 'schema' in getattr(record, 'tags', ())
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record, including any `extra` fields, as one line of JSON."""
+    # Attributes every LogRecord has. Anything else came from `extra`.
+    RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        entry = {'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'message': record.getMessage()}
+        entry.update({key: value for key, value in vars(record).items()
+                      if key not in self.__class__.RECORD_ATTRS})
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock QueueHandler formats the message on the calling thread so the
+    record can be pickled. Our listener is a thread in the same process, so
+    the record is handed over as-is. Note: log arguments must not be mutated
+    after the logging call.
+    """
+
+    def prepare(self, record):
+        return record
+
+
 # https://stackoverflow.com/questions/14897756/python-progress-bar-through-logging-module
 class TqdmHandler(logging.StreamHandler):
     def __init__(self):
@@ -35,6 +73,9 @@ class TqdmHandler(logging.StreamHandler):
 
 
 def main():
+    # Imported here, not at module level: spawned workers re-run this script
+    # as __mp_main__ and would otherwise import the whole instrument too.
+    from exaspim.exaspim import Exaspim
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, default=None)
     parser.add_argument("--log_level", type=str, default="INFO",
@@ -46,6 +87,8 @@ def main():
     parser.add_argument("--console_output", default=True,
                         help="whether or not to print to the console.")
     # Note: colored console output is buggy on Windows.
+    parser.add_argument("--schema_log", type=str, default="schema_log.jsonl",
+                        help="file to append schema-tagged records to as JSON lines.")
     parser.add_argument("--color_console_output", action="store_true",
                         default=True)
                         #default=False if os.name == 'nt' else True)
@@ -61,9 +104,18 @@ def main():
     # Setup logging.
     # Create log handlers to dispatch:
     # - User-specified level and above to print to console if specified.
+    # - Schema-tagged records as JSON lines to their own file.
+    # Loggers only put records on a queue. Formatting and I/O happen on the
+    # listener's thread, off the acquisition path.
     logger = logging.getLogger()  # get the root logger.
-    # logger level must be set to the lowest level of any handler.
-    logger.setLevel(logging.DEBUG)
+    # logger level must be set to the lowest level of any handler. Schema
+    # records are logged at INFO. Records below it are then never created,
+    # so per-frame debug logs cost only a level check.
+    log_level = logging.INFO
+    if args.console_output:
+        log_level = min(log_level, logging.getLevelName(args.log_level))
+    logger.setLevel(log_level)
+    log_handlers = []
     fmt = '%(asctime)s.%(msecs)03d %(levelname)s %(name)s: %(message)s'
     fmt = "[SIM] " + fmt if args.simulated else fmt
     datefmt = '%Y-%m-%d,%H:%M:%S'
@@ -76,23 +128,39 @@ def main():
         log_handler.addFilter(SpimLogFilter())
         log_handler.setLevel(args.log_level)
         log_handler.setFormatter(log_formatter)
-        logger.addHandler(log_handler)
-
-    # Windows-based console needs to accept colored logs if running with color.
-    if os.name == 'nt' and args.color_console_output:
-        kernel32 = ctypes.windll.kernel32
-        kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7)
+        log_handlers.append(log_handler)
+    schema_handler = logging.FileHandler(args.schema_log)
+    schema_handler.addFilter(SchemaLogFilter())
+    schema_handler.setFormatter(JsonLinesFormatter())
+    log_handlers.append(schema_handler)
+    log_queue = SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.setLevel(log_level)
+    logger.addHandler(queue_handler)
+    log_listener = QueueListener(log_queue, *log_handlers,
+                                 respect_handler_level=True)
+    log_listener.start()
 
-    instrument = Exaspim(args.config, args.simulated)
+    # Stop the listener however we exit, including a failure to construct
+    # the instrument, so the records explaining it are flushed.
     try:
-        instrument.run(overwrite=args.simulated or args.overwrite)
-    except KeyboardInterrupt:
-        pass
-    except Exception:
-        traceback.print_exc()
-        raise
+        # Windows-based console needs to accept colored logs if running with color.
+        if os.name == 'nt' and args.color_console_output:
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7)
+
+        instrument = Exaspim(args.config, args.simulated)
+        try:
+            instrument.run(overwrite=args.simulated or args.overwrite)
+        except KeyboardInterrupt:
+            pass
+        except Exception:
+            traceback.print_exc()
+            raise
+        finally:
+            instrument.close()
     finally:
-        instrument.close()
+        log_listener.stop()  # Flush remaining records.
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Compress and write stacks streamed from an acquisition PC.
+
+Point the acquisition PC at this host by setting `remote_address` in the
+`[compressor_specs]` section of its config.
+"""
+
+from exaspim.processes.stack_writer_server import StackWriterServer
+from pathlib import Path
+import argparse
+import logging
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dest", type=str, default=".",
+                        help="folder to write stacks to.")
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--log_level", type=str, default="INFO",
+                        choices=["INFO", "DEBUG"])
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    server = StackWriterServer(Path(args.dest), args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
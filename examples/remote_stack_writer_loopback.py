@@ -0,0 +1,49 @@
+"""Stream a synthetic stack to a StackWriterServer on this machine.
+
+Exercises the same handoff as the acquisition loop over the loopback
+interface and reports the end-to-end frame rate.
+"""
+
+from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
+from exaspim.operations.synthetic_specimen import SyntheticSpecimen
+from exaspim.processes.remote_stack_writer import RemoteStackWriter
+from exaspim.processes.stack_writer_server import StackWriterServer
+from threading import Thread
+from pathlib import Path
+from time import sleep, perf_counter
+from math import ceil
+
+rows = 2048
+cols = 2048
+num_frames = 256
+chunk_size = 64
+
+if __name__ == "__main__":
+    dest_path = Path("./remote_stacks")
+    dest_path.mkdir(exist_ok=True)
+    server = StackWriterServer(dest_path, host="127.0.0.1", port=0)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    specimen = SyntheticSpecimen(rows, cols)
+    img_buffer = SharedDoubleBuffer((chunk_size, rows, cols), 'uint16')
+    writer = RemoteStackWriter(server.address, rows, cols, num_frames, 0, 0,
+                               1, 1, 1, chunk_size, ('z', 'y', 'x'), 8, 'lz4',
+                               'uint16', dest_path, "loopback_test", "0",
+                               "#ffffff")
+    writer.start()
+    start_time = perf_counter()
+    for chunk_num in range(ceil(num_frames / chunk_size)):
+        for z, frame in enumerate(img_buffer.write_buf):
+            specimen.frame(chunk_num * chunk_size + z, out=frame)
+        while not writer.done_reading.is_set():
+            sleep(0.001)
+        img_buffer.toggle_buffers()
+        writer.shm_name = img_buffer.read_buf_mem_name
+        writer.done_reading.clear()
+    writer.join()
+    elapsed_time = perf_counter() - start_time
+    print(f"Streamed and wrote {num_frames} frames in {elapsed_time:.3f}[s] "
+          f"({num_frames / elapsed_time:.1f}[fps]).")
+    img_buffer.close_and_unlink()
+    specimen.close()
+    server.close()
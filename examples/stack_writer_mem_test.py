@@ -3,6 +3,7 @@
 import numpy as np
 from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
 from exaspim.processes.stack_writer import StackWriter
+from exaspim.operations.synthetic_specimen import SyntheticSpecimen
 from multiprocessing import Process, Array, Event
 from multiprocessing.shared_memory import SharedMemory
 from ctypes import c_wchar
@@ -41,6 +42,7 @@ kwargs = {
     "pixel_y_size_um": 10615.616,
     "pixel_z_size_um": 1,
     "chunk_size": chunk_size,
+    "chunk_dimension_order": ('z', 'y', 'x'),  # must agree with buffer shape.
     "thread_count": 32,  # This is buggy at very low numbers?
     "compression_style": 'lz4',
     "datatype": "uint16",
@@ -53,8 +55,10 @@ kwargs = {
 if __name__ == "__main__":
     start_time = perf_counter()
     print(f"Starting mem usage: {get_mem_usage()}")
-    ps_buffers = [SharedDoubleBuffer((cols, rows, chunk_size), "uint16")
+    ps_buffers = [SharedDoubleBuffer((chunk_size, rows, cols), "uint16")
                   for i in range(num_processes)]
+    # Realistic content so compression throughput is representative.
+    specimen = SyntheticSpecimen(rows, cols, seed=0)
     print(f"Mem usage after SharedDoubleBuffer allocation: {get_mem_usage()}")
     ps_workers = []
     try:
@@ -74,7 +78,7 @@ if __name__ == "__main__":
             # Write some data into each buffer
             for ps_buffer in ps_buffers:
                 # Create fake data. Replace with cam.grab_frame() or similar.
-                ps_buffer.write_buf[chunk_index][:, :] = chunk_index
+                specimen.frame(frame_index, out=ps_buffer.write_buf[chunk_index])
             # Dispatch chunk if it is full
             if chunk_index == chunk_size-1 or frame_index == last_frame_index:
                 for ps_buffer, ps_worker in zip(ps_buffers, ps_workers):
@@ -0,0 +1,168 @@
+"""Immutable snapshot of the settings an acquisition runs with."""
+from copy import deepcopy
+from typing import NamedTuple
+
+
+def _lookup(specs: dict, *keys):
+    """Nested dict lookup that returns None if any key is missing."""
+    for key in keys:
+        if not isinstance(specs, dict) or key not in specs:
+            return None
+        specs = specs[key]
+    return specs
+
+
+class ChannelSettings(NamedTuple):
+    """Per-channel settings. Values the config doesn't define are None."""
+    wavelength: int
+    focus_position_um: float
+    camera_delay_time_s: float
+    etl_amplitude: float
+    etl_offset: float
+    etl_nonlinear: float
+    etl_interp_time: float
+    etl_buffer_time_s: float
+    galvo_a_setpoint: float
+    galvo_b_setpoint: float
+    ao_voltage: float
+    hex_color: str
+    cycle_time_s: float
+    affinity: dict  # 'numa_node', 'writer_cpus', 'mip_cpus', 'stats_cpus'.
+    waveform_specs: dict  # {'etl': {...}, 'galvo_a': {...}, 'galvo_b': {...}}
+
+
+class AcquisitionSettings(NamedTuple):
+    """Every setting that acquisition and waveform generation read, frozen
+    when an acquisition starts.
+
+    Reading a field is a plain attribute access, derived values (i.e: the
+    camera exposure time) are computed once, and changes to the config
+    during the acquisition don't affect it. Build one with
+    :meth:`from_config`.
+    """
+    camera_exposure_time: float
+    camera_dwell_time: float
+    frame_rest_time: float
+    ttl_pulse_time: float
+    daq_sample_rate: float
+    daq_period_time: float
+    ao_channels: tuple  # ((ao name, ao channel), ...) in hardware order.
+    sensor_row_count: int
+    sensor_column_count: int
+    datatype: str
+    image_dtype: str
+    x_voxel_size_um: float
+    y_voxel_size_um: float
+    z_step_size_um: float
+    stage_backlash_reset_dist_um: float
+    compressor_chunk_size: int
+    compressor_thread_count: int
+    compressor_style: str
+    compressor_remote_address: tuple
+    ftp: str
+    ftp_flags: str
+    chunk_retry_limit: int
+    frame_timeout_s: float
+    acquisition_cpus: object  # list or "0-3,8" string, or None.
+    intensity_stats_enabled: bool
+    intensity_stats_thread_count: int
+    saturation_adu: int
+    saturated_fraction_alert: float
+    min_mean_alert_adu: float
+    histogram_stride: int
+    contrast_percentiles: tuple
+    aux_image_compression: str
+    mip_pyramid_min_size: int
+    mip_preview_level: int
+    focus_sample_period: int
+    focus_downsample: int
+    min_focus_metric: float
+    focus_drop_alert: float
+    channel_settings: tuple  # (ChannelSettings, ...) in acquisition order.
+
+    @classmethod
+    def from_config(cls, cfg, channels: list[int] = None):
+        """Snapshot `cfg` for `channels` (default: the config's channels)."""
+        channels = cfg.channels if channels is None else channels
+        channel_settings = []
+        for ch in channels:
+            specs = cfg.channel_specs[str(ch)]
+            etl_buffer_time_s = _lookup(specs, 'etl', 'buffer_time_s')
+            channel_settings.append(ChannelSettings(
+                wavelength=int(ch),
+                focus_position_um=_lookup(specs, 'focus', 'position'),
+                camera_delay_time_s=_lookup(specs, 'camera', 'delay_time_s'),
+                etl_amplitude=_lookup(specs, 'etl', 'amplitude'),
+                etl_offset=_lookup(specs, 'etl', 'offset'),
+                etl_nonlinear=_lookup(specs, 'etl', 'nonlinear'),
+                etl_interp_time=_lookup(specs, 'etl', 'interp_time_s'),
+                etl_buffer_time_s=etl_buffer_time_s,
+                galvo_a_setpoint=_lookup(specs, 'galvo_a', 'setpoint'),
+                galvo_b_setpoint=_lookup(specs, 'galvo_b', 'setpoint'),
+                ao_voltage=_lookup(specs, 'ao_voltage'),
+                hex_color=_lookup(specs, 'hex_color'),
+                cycle_time_s=None if etl_buffer_time_s is None
+                else cfg.get_channel_cycle_time(ch),
+                affinity=dict(cfg.get_channel_affinity(ch)),
+                waveform_specs={device: deepcopy(specs.get(device, {}))
+                                for device in ('etl', 'galvo_a', 'galvo_b')}))
+        return cls(camera_exposure_time=cfg.camera_exposure_time,
+                   camera_dwell_time=cfg.camera_dwell_time,
+                   frame_rest_time=cfg.frame_rest_time,
+                   ttl_pulse_time=cfg.ttl_pulse_time,
+                   daq_sample_rate=cfg.daq_sample_rate,
+                   daq_period_time=cfg.daq_period_time,
+                   ao_channels=tuple(cfg.n2c.items()),
+                   sensor_row_count=cfg.sensor_row_count,
+                   sensor_column_count=cfg.sensor_column_count,
+                   datatype=cfg.datatype,
+                   image_dtype=cfg.image_dtype,
+                   x_voxel_size_um=cfg.x_voxel_size_um,
+                   y_voxel_size_um=cfg.y_voxel_size_um,
+                   z_step_size_um=cfg.z_step_size_um,
+                   stage_backlash_reset_dist_um=cfg.stage_backlash_reset_dist_um,
+                   compressor_chunk_size=cfg.compressor_chunk_size,
+                   compressor_thread_count=cfg.compressor_thread_count,
+                   compressor_style=cfg.compressor_style,
+                   compressor_remote_address=cfg.compressor_remote_address,
+                   ftp=cfg.ftp,
+                   ftp_flags=cfg.ftp_flags,
+                   chunk_retry_limit=cfg.chunk_retry_limit,
+                   frame_timeout_s=cfg.frame_timeout_s,
+                   acquisition_cpus=cfg.acquisition_cpus,
+                   intensity_stats_enabled=cfg.intensity_stats_enabled,
+                   intensity_stats_thread_count=cfg.intensity_stats_thread_count,
+                   saturation_adu=cfg.saturation_adu,
+                   saturated_fraction_alert=cfg.saturated_fraction_alert,
+                   min_mean_alert_adu=cfg.min_mean_alert_adu,
+                   histogram_stride=cfg.histogram_stride,
+                   contrast_percentiles=tuple(cfg.contrast_percentiles),
+                   aux_image_compression=cfg.aux_image_compression,
+                   mip_pyramid_min_size=cfg.mip_pyramid_min_size,
+                   mip_preview_level=cfg.mip_preview_level,
+                   focus_sample_period=cfg.focus_sample_period,
+                   focus_downsample=cfg.focus_downsample,
+                   min_focus_metric=cfg.min_focus_metric,
+                   focus_drop_alert=cfg.focus_drop_alert,
+                   channel_settings=tuple(channel_settings))
+
+    def channel(self, wavelength: int):
+        """Settings of one channel."""
+        wavelength = int(wavelength)
+        for settings in self.channel_settings:
+            if settings.wavelength == wavelength:
+                return settings
+        raise KeyError(f"{wavelength}[nm] channel is not in these settings.")
+
+    def to_dict(self):
+        """Plain dict of every setting, for metadata."""
+        settings = self._asdict()
+        settings['ao_channels'] = dict(self.ao_channels)
+        settings['channel_settings'] = {str(ch.wavelength): ch._asdict()
+                                        for ch in self.channel_settings}
+        return settings
+
+    @property
+    def channels(self):
+        """Wavelengths, in acquisition order."""
+        return [ch.wavelength for ch in self.channel_settings]
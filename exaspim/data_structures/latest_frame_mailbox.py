@@ -0,0 +1,64 @@
+class LatestFrameMailbox:
+    """A single-slot, single-producer-many-consumer mailbox that only keeps
+    the newest item.
+
+    Publishing replaces the slot with a (sequence number, item) tuple in one
+    reference assignment, which is atomic in CPython, so neither side needs
+    a lock. Consumers compare sequence numbers to tell if anything new has
+    arrived. Items that are never read are simply dropped.
+
+    Published items belong to the consumers: the producer must not modify
+    an item after publishing it, so it publishes new arrays rather than
+    recycled buffers.
+
+    Reading the mailbox marks it :attr:`wanted`, and publishing clears
+    that, so a producer can skip building items that nobody has asked for
+    since the last one. A mailbox starts out wanted.
+
+    .. code-block: python
+
+        mailbox = LatestFrameMailbox()
+        if mailbox.wanted:
+            mailbox.publish(pyramid)  # producer thread.
+
+        seq, pyramid = mailbox.get()  # any consumer thread, at any rate.
+        seq, pyramid = mailbox.get_newer_than(seq)  # (seq, None) if stale.
+    """
+
+    def __init__(self):
+        self._slot = (0, None)
+        self._wanted = True
+
+    def publish(self, item):
+        """Replace the current item. Only one thread may publish.
+
+        :return: the sequence number of the published item.
+        """
+        sequence = self._slot[0] + 1
+        self._wanted = False
+        self._slot = (sequence, item)
+        return sequence
+
+    @property
+    def sequence(self):
+        """Sequence number of the newest item, or 0 if nothing was published."""
+        return self._slot[0]
+
+    @property
+    def wanted(self):
+        """True if the mailbox was read since the last item was published."""
+        return self._wanted
+
+    def get(self):
+        """Return the newest (sequence number, item) tuple."""
+        self._wanted = True
+        return self._slot
+
+    def get_newer_than(self, sequence: int):
+        """Return the newest (sequence number, item) tuple if it is newer
+        than `sequence`; otherwise return (`sequence`, None)."""
+        self._wanted = True
+        slot = self._slot
+        if slot[0] > sequence:
+            return slot
+        return sequence, None
@@ -1,8 +1,15 @@
 import numpy
 from egrabber import *
 import logging
+from threading import Lock
+from exaspim.operations.feature_snapshot import log_feature_changes
 
 
+# GenTL modules whose features are logged as metadata.
+FEATURE_MODULES = ('device', 'remote', 'stream', 'interface', 'system')
+# Features that can't be read back reliably.
+EXCLUDED_FEATURES = {'remote': {'BalanceRatioSelector', 'BalanceWhiteAuto'}}
+
 # TODO: incorporate Memento datalogger.
 # from exaspim.processes.data_logger import DataLogger
 
@@ -14,10 +21,18 @@ class Camera:
         self.cfg = cfg  # TODO: we should not pass the whole config.
         self.gentl = EGenTL()  # instantiate egentl
         self.grabber = EGrabber(self.gentl)  # instantiate egrabber
+        # Cached {module: [feature]} of readable features and the feature
+        # values as of the last metadata log.
+        self.readable_features = None
+        self.feature_snapshot = None
+        # Guards features read through a selector (i.e: temperatures), which
+        # may be read from a telemetry thread.
+        self.selector_lock = Lock()
 
     # self.data_logger_worker = None  # Memento img acquisition data logger.
 
     def configure(self):
+        self.readable_features = None  # Feature availability may change.
         # realloc buffers appears to be allocating ram on the pc side, not camera side.
         self.grabber.realloc_buffers(self.cfg.egrabber_frame_buffer)  # allocate RAM buffer N frames
         # Note: Msb unpacking is slightly faster according to camera vendor.
@@ -32,8 +47,7 @@ class Camera:
         self.grabber.remote.set("Height", self.cfg.sensor_row_count) # set roi height
         self.grabber.remote.set("PixelFormat", "Mono16") # use 14-bit A/D
         # Frame rate setting does not need to be set in external trigger mode.
-        # set exposure time us, i.e. slit width
-        self.grabber.remote.set("ExposureTime", round(self.cfg.camera_dwell_time * 1.0e6, 1))
+        self.set_exposure_time()
         # Note: Camera can potentially get stuck in a state that does not allow changing TriggerMode
         # starting and then stopping the camera resets this behavior
         self.start()
@@ -41,6 +55,15 @@ class Camera:
         # Note: Setting TriggerMode if it's already correct will throw an error
         if self.grabber.remote.get("TriggerMode") != "On":  # set camera to external trigger mode
             self.grabber.remote.set("TriggerMode", "On")
+        self.set_gain()
+
+    def set_exposure_time(self):
+        """Write the exposure time (i.e. slit width) from the config."""
+        # set exposure time us, i.e. slit width
+        self.grabber.remote.set("ExposureTime", round(self.cfg.camera_dwell_time * 1.0e6, 1))
+
+    def set_gain(self):
+        """Write the digital gain from the config."""
         self.grabber.remote.set("Gain", self.cfg.camera_digital_gain)  # set digital gain to 1
 
     # TODO: put the datalogger here.
@@ -58,12 +81,15 @@ class Camera:
             # self.data_logger_worker.start()
             self.grabber.start(frame_count)
 
-    def grab_frame(self):
-        """Retrieve a frame as a 2D numpy array with shape (rows, cols)."""
+    def grab_frame(self, timeout_s: float = 1000.):
+        """Retrieve a frame as a 2D numpy array with shape (rows, cols).
+
+        :param timeout_s: time to wait for the frame before raising.
+        """
         # Note: creating the buffer and then "pushing" it at the end has the
         # 	effect of moving the internal camera frame buffer from the output
         # 	pool back to the input pool, so it can be reused.
-        timeout_ms = int(1000e3)
+        timeout_ms = int(timeout_s * 1e3)
         with Buffer(self.grabber, timeout=timeout_ms) as buffer:
             ptr = buffer.get_info(BUFFER_INFO_BASE, INFO_DATATYPE_PTR)  # grab pointer to new frame
             # grab frame data
@@ -83,6 +109,7 @@ class Camera:
         # Initialize background image array
         bkg_image = numpy.zeros((frame_average, self.cfg.sensor_row_count, self.cfg.sensor_column_count), dtype='uint16')
         # Grab N background images
+        self.flush()
         self.start(frame_count=frame_average, live=False)
         for frame in range(0, frame_average):
             self.log.info(f"Capturing background image: {frame}")
@@ -99,6 +126,12 @@ class Camera:
         # self.data_logger_worker.stop()
         # self.data_logger_worker.close()
 
+    def flush(self):
+        """Discard frames that arrived but weren't grabbed. Stopping the
+        grabber leaves them queued, so the next start would deliver them
+        first. Call while stopped."""
+        self.grabber.reset_buffer_queue()
+
     def get_camera_acquisition_state(self):
         """return a dict with the state of the acquisition buffers"""
         # Detailed description of constants here:
@@ -113,78 +146,97 @@ class Camera:
                                                                INFO_DATATYPE_SIZET)  # number of underrun, i.e. dropped frames
         state['data_rate'] = self.grabber.stream.get('StatisticsDataRate')  # stream data rate
         state['frame_rate'] = self.grabber.stream.get('StatisticsFrameRate')  # stream frame rate
-        self.log.debug(f"frame: {state['frame_index']}, "
-                       f"input buffer size: {state['in_buffer_size']}, "
-                       f"output buffer size: {state['out_buffer_size']}, "
-                       f"dropped_frames: {state['dropped_frames']}, "
-                       f"data rate: {state['data_rate']:.2f} [MB/s], "
-                       f"frame rate: {state['frame_rate']:.2f} [fps].")
+        self.log.debug("frame: %d, input buffer size: %d, "
+                       "output buffer size: %d, dropped_frames: %d, "
+                       "data rate: %.2f [MB/s], frame rate: %.2f [fps].",
+                       state['frame_index'], state['in_buffer_size'],
+                       state['out_buffer_size'], state['dropped_frames'],
+                       state['data_rate'], state['frame_rate'])
         return state
 
+    def get_buffer_allocation_bytes(self):
+        """return the host memory allocated for frame buffers in bytes."""
+        buffer_count = self.grabber.stream.get_info(STREAM_INFO_NUM_ANNOUNCED,
+                                                    INFO_DATATYPE_SIZET)
+        payload_size = self.grabber.stream.get_info(STREAM_INFO_PAYLOAD_SIZE,
+                                                    INFO_DATATYPE_SIZET)
+        return buffer_count * payload_size
+
     def get_mainboard_temperature(self):
         """get the mainboard temperature in degrees C."""
-        self.grabber.remote.set("DeviceTemperatureSelector", "Mainboard")
-        return self.grabber.remote.get("DeviceTemperature")
+        with self.selector_lock:
+            self.grabber.remote.set("DeviceTemperatureSelector", "Mainboard")
+            return self.grabber.remote.get("DeviceTemperature")
 
     def get_sensor_temperature(self):
         """get teh sensor temperature in degrees C."""
-        self.grabber.remote.set("DeviceTemperatureSelector", "Sensor")
-        sensor_temperature = self.grabber.remote.get("DeviceTemperature")
-        # TODO: do we need to set the temp selector back, or can we skip this?
-        self.grabber.remote.set("DeviceTemperatureSelector", "Mainboard")
+        with self.selector_lock:
+            self.grabber.remote.set("DeviceTemperatureSelector", "Sensor")
+            sensor_temperature = self.grabber.remote.get("DeviceTemperature")
+            # TODO: do we need to set the temp selector back, or can we skip this?
+            self.grabber.remote.set("DeviceTemperatureSelector", "Mainboard")
         return sensor_temperature
 
-    def schema_log_system_metadata(self):
-        """Log camera metadata with the schema tag."""
-        # log egrabber camera settings
-        self.log.info('egrabber camera parameters', extra={'tags': ['schema']})
-        categories = self.grabber.device.get(query.categories())
-        for category in categories:
-            features = self.grabber.device.get(query.features_of(category))
-            for feature in features:
-                if self.grabber.device.get(query.available(feature)):
-                    if self.grabber.device.get(query.readable(feature)):
-                        if not self.grabber.device.get(query.command(feature)):
-                            self.log.info(f'device, {feature}, {self.grabber.device.get(feature)}',
-                                          extra={'tags': ['schema']})
-
-        categories = self.grabber.remote.get(query.categories())
-        for category in categories:
-            features = self.grabber.remote.get(query.features_of(category))
-            for feature in features:
-                if self.grabber.remote.get(query.available(feature)):
-                    if self.grabber.remote.get(query.readable(feature)):
-                        if not self.grabber.remote.get(query.command(feature)):
-                            if feature != "BalanceRatioSelector" and feature != "BalanceWhiteAuto":
-                                self.log.info(f'remote, {feature}, {self.grabber.remote.get(feature)}',
-                                              extra={'tags': ['schema']})
-
-        categories = self.grabber.stream.get(query.categories())
-        for category in categories:
-            features = self.grabber.stream.get(query.features_of(category))
+    def get_temperatures(self):
+        """get the mainboard and sensor temperatures in degrees C with one
+        pass over the temperature selector."""
+        with self.selector_lock:
+            self.grabber.remote.set("DeviceTemperatureSelector", "Sensor")
+            sensor_temperature = self.grabber.remote.get("DeviceTemperature")
+            self.grabber.remote.set("DeviceTemperatureSelector", "Mainboard")
+            mainboard_temperature = self.grabber.remote.get("DeviceTemperature")
+        return {'mainboard': mainboard_temperature, 'sensor': sensor_temperature}
+
+    def discover_features(self):
+        """Find the readable, non-command features of every GenTL module.
+
+        This takes four round trips per feature, so the result is cached
+        until the camera is reconfigured.
+        """
+        self.readable_features = {}
+        for module in FEATURE_MODULES:
+            port = getattr(self.grabber, module)
+            excluded = EXCLUDED_FEATURES.get(module, set())
+            self.readable_features[module] = \
+                [feature
+                 for category in port.get(query.categories())
+                 for feature in port.get(query.features_of(category))
+                 if feature not in excluded
+                 and port.get(query.available(feature))
+                 and port.get(query.readable(feature))
+                 and not port.get(query.command(feature))]
+        return self.readable_features
+
+    def get_feature_snapshot(self):
+        """Return {module: {feature: value}} for every readable feature,
+        fetching each value with a single query."""
+        if self.readable_features is None:
+            self.discover_features()
+        with self.selector_lock:
+            return self._read_features()
+
+    def _read_features(self):
+        snapshot = {}
+        for module, features in self.readable_features.items():
+            port = getattr(self.grabber, module)
+            values = snapshot[module] = {}
             for feature in features:
-                if self.grabber.stream.get(query.available(feature)):
-                    if self.grabber.stream.get(query.readable(feature)):
-                        if not self.grabber.stream.get(query.command(feature)):
-                            self.log.info(f'stream, {feature}, {self.grabber.stream.get(feature)}',
-                                          extra={'tags': ['schema']})
-
-        categories = self.grabber.interface.get(query.categories())
-        for category in categories:
-            features = self.grabber.interface.get(query.features_of(category))
-            for feature in features:
-                if self.grabber.interface.get(query.available(feature)):
-                    if self.grabber.interface.get(query.readable(feature)):
-                        if not self.grabber.interface.get(query.command(feature)):
-                            self.log.info(f'interface, {feature}, {self.grabber.interface.get(feature)}',
-                                          extra={'tags': ['schema']})
-
-        categories = self.grabber.system.get(query.categories())
-        for category in categories:
-            features = self.grabber.system.get(query.features_of(category))
-            for feature in features:
-                if self.grabber.system.get(query.available(feature)):
-                    if self.grabber.system.get(query.readable(feature)):
-                        if not self.grabber.system.get(query.command(feature)):
-                            self.log.info(f'system, {feature}, {self.grabber.system.get(feature)}',
-                                          extra={'tags': ['schema']})
+                try:
+                    values[feature] = port.get(feature)
+                except Exception:
+                    # i.e: the feature became unavailable due to a selector.
+                    self.log.debug("Could not read %s feature %s.", module, feature)
+        return snapshot
+
+    def schema_log_system_metadata(self):
+        """Log camera metadata with the schema tag.
+
+        The first call logs every feature. Later calls log only the
+        features whose values changed since the previous call, and the
+        names of features that disappeared. In both cases it is one record,
+        with the values in its `camera_features` field as
+        {module: {feature: value}}.
+        """
+        snapshot = self.get_feature_snapshot()
+        log_feature_changes(self.log, self.feature_snapshot, snapshot)
+        self.feature_snapshot = snapshot
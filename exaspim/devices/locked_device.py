@@ -0,0 +1,47 @@
+"""Serialize every call to a device shared between threads."""
+import threading
+
+
+class LockedDevice:
+    """Proxy that holds a lock for the duration of every method call on the
+    wrapped device.
+
+    Serial devices like the Tiger controller answer commands in order, so
+    two threads talking to one at once (i.e: the telemetry poller and a
+    stage move) can read each other's replies. Everything that holds the
+    proxy, including objects built on top of it like SamplePose, shares one
+    lock. Attributes that aren't callable are passed through unlocked.
+
+    .. code-block: python
+
+        tigerbox = LockedDevice(TigerController(...))
+        tigerbox.move_absolute(x=100)  # holds tigerbox.lock while it runs.
+        with tigerbox.lock:  # group several calls into one transaction.
+            tigerbox.get_position('x')
+            tigerbox.get_position('y')
+    """
+
+    def __init__(self, device, lock=None):
+        """Init.
+
+        :param device: the device to wrap.
+        :param lock: lock to hold during calls. A new reentrant lock if
+            unspecified.
+        """
+        # __setattr__ forwards to the device, so set these directly.
+        self.__dict__['device'] = device
+        self.__dict__['lock'] = threading.RLock() if lock is None else lock
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.device, name)
+        if not callable(attr):
+            return attr
+        lock = self.lock
+
+        def locked_call(*args, **kwds):
+            with lock:
+                return attr(*args, **kwds)
+        return locked_call
+
+    def __setattr__(self, name: str, value):
+        setattr(self.device, name, value)
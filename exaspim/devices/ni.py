@@ -135,6 +135,13 @@ class NI:
             if self.ao_task:
                 self.ao_task.stop()
 
+    def get_health(self):
+        """Return a dict summarizing the state of the DAQ tasks."""
+        co_task, ao_task = self.co_task, self.ao_task
+        return {'live': self.live,
+                'counter_done': co_task.is_task_done() if co_task else None,
+                'ao_done': ao_task.is_task_done() if ao_task else None}
+
     def close(self):
         if self.co_task:
             self.co_task.close()
@@ -0,0 +1,249 @@
+"""Simulated camera with the same interface and timing as :class:`Camera`."""
+import numpy
+import logging
+from time import perf_counter, sleep
+from exaspim.operations.feature_snapshot import log_feature_changes
+
+
+class SimCamera:
+    """Stand-in for :class:`Camera` that produces frames on a timing model.
+
+    Frames are served from a preallocated pool sized like the eGrabber
+    frame buffer. In free-running mode (or with no trigger source) a frame
+    arrives every :attr:`frame_period_s`. In external trigger mode with a
+    trigger source attached, frame `n` arrives one readout time after the
+    source emits trigger `n`. Frames that arrive while the pool is full are counted as dropped,
+    as is any drop injected with :meth:`inject_dropped_frames`.
+
+    Frame contents come from an optional :class:`SyntheticSpecimen`. By
+    default the pool is rendered once in :meth:`configure`; with
+    `render_on_grab`, every frame is rendered from its own z plane at the
+    cost of doing that work on the grabbing thread.
+    """
+
+    def __init__(self, cfg, frame_rate_hz: float = None, specimen=None,
+                 render_on_grab: bool = False):
+        """Init.
+
+        :param cfg: the instrument config.
+        :param frame_rate_hz: free-running frame rate. Defaults to the rate
+            derived from the line interval and row count.
+        :param specimen: a :class:`SyntheticSpecimen` to image, or None for
+            blank frames.
+        :param render_on_grab: if True, render a new z plane into each frame
+            as it is grabbed.
+        """
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.cfg = cfg  # TODO: we should not pass the whole config.
+        self.frame_rate_hz = frame_rate_hz
+        self.specimen = specimen
+        self.render_on_grab = render_on_grab
+        self.trigger_mode = "On"
+        self.trigger_source = None  # i.e: a simulated DAQ.
+        self.frame_pool = None  # populated in configure.
+        self.exposure_time_us = None  # populated in configure.
+        self.gain = None  # populated in configure.
+        self.feature_snapshot = None  # feature values as of the last log.
+        self.mainboard_temperature = 23.15
+        self.sensor_temperature = 23.15
+        # Acquisition state.
+        self.running = False
+        self.frame_limit = None  # None if streaming indefinitely.
+        self.start_time = None
+        self.next_arrival_index = 0  # next frame to arrive from the sensor.
+        self.queued_frames = 0  # arrived frames waiting to be grabbed.
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.pending_drops = 0
+
+    @property
+    def readout_time_s(self):
+        """Time from a trigger until the whole frame has been read out."""
+        # (line interval [us]) * (number of rows [pixels]) * (1 [s] / 1e6 [us])
+        return self.cfg.camera_line_interval_us * self.cfg.sensor_row_count / 1.0e6
+
+    @property
+    def frame_period_s(self):
+        """Time between free-running frames in seconds."""
+        if self.frame_rate_hz:
+            return 1.0 / self.frame_rate_hz
+        return self.readout_time_s
+
+    def configure(self):
+        """Allocate the frame pool and render the specimen into it."""
+        shape = (self.cfg.sensor_row_count, self.cfg.sensor_column_count)
+        pool_size = self.cfg.egrabber_frame_buffer
+        if self.frame_pool is None or self.frame_pool.shape != (pool_size, *shape):
+            self.frame_pool = numpy.zeros((pool_size, *shape), dtype='uint16')
+            if self.specimen is not None:
+                for z, frame in enumerate(self.frame_pool):
+                    self.specimen.frame(z, out=frame)
+        self.trigger_mode = "On"
+        self.set_exposure_time()
+        self.set_gain()
+
+    def set_exposure_time(self):
+        """Store the exposure time (i.e. slit width) from the config."""
+        self.exposure_time_us = round(self.cfg.camera_dwell_time * 1.0e6, 1)
+
+    def set_gain(self):
+        """Store the digital gain from the config."""
+        self.gain = self.cfg.camera_digital_gain
+
+    def attach_trigger_source(self, source):
+        """Drive frame arrival from a trigger source in external trigger mode.
+
+        :param source: object with a `get_trigger_time(trigger_index, since)`
+            method returning the perf_counter time of the n-th trigger since
+            `since`, or None if it has not been scheduled yet.
+        """
+        self.trigger_source = source
+
+    def inject_dropped_frames(self, count: int = 1):
+        """Drop the next `count` frames to arrive, as if the host underran."""
+        self.pending_drops += count
+
+    def start(self, frame_count: int = 1, live: bool = False):
+        self.frame_limit = None if live else frame_count
+        self.next_arrival_index = 0
+        # Like the grabber, frames queued before a stop are still delivered
+        # first unless they are flushed.
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.start_time = perf_counter()
+        self.running = True
+
+    def _arrival_time(self, frame_index: int):
+        """The time at which a frame arrives or None if it isn't triggered."""
+        if self.trigger_mode == "On" and self.trigger_source is not None:
+            trigger_time = self.trigger_source.get_trigger_time(frame_index,
+                                                                self.start_time)
+            return None if trigger_time is None \
+                else trigger_time + self.readout_time_s
+        return self.start_time + (frame_index + 1) * self.frame_period_s
+
+    def _update_arrivals(self, now: float):
+        """Queue every frame that has arrived by `now`. Frames that arrive
+        while every pool buffer is full are dropped."""
+        while self.frame_limit is None or self.next_arrival_index < self.frame_limit:
+            arrival_time = self._arrival_time(self.next_arrival_index)
+            if arrival_time is None or arrival_time > now:
+                return
+            if self.pending_drops:
+                self.pending_drops -= 1
+                self.frames_dropped += 1
+            elif self.queued_frames < len(self.frame_pool):
+                self.queued_frames += 1
+            else:
+                self.frames_dropped += 1
+            self.next_arrival_index += 1
+
+    def grab_frame(self, timeout_s: float = 1000.):
+        """Retrieve a frame as a 2D numpy array with shape (rows, cols).
+
+        :param timeout_s: time to wait for the frame before raising.
+        """
+        if not self.running:
+            raise RuntimeError("Camera is not started.")
+        wait_start = perf_counter()
+        self._update_arrivals(wait_start)
+        while not self.queued_frames:
+            if self.frame_limit is not None and \
+                    self.next_arrival_index >= self.frame_limit:
+                raise TimeoutError("All requested frames have been grabbed.")
+            now = perf_counter()
+            if now - wait_start > timeout_s:
+                raise TimeoutError("Timed out waiting for a frame.")
+            # Sleep until the next frame is read out, or poll for a trigger.
+            arrival_time = self._arrival_time(self.next_arrival_index)
+            sleep(0.001 if arrival_time is None else max(0., arrival_time - now))
+            self._update_arrivals(perf_counter())
+        self.queued_frames -= 1
+        image = self.frame_pool[self.frames_delivered % len(self.frame_pool)]
+        if self.render_on_grab and self.specimen is not None:
+            self.specimen.frame(self.frames_delivered, out=image)
+        self.frames_delivered += 1
+        return image
+
+    def collect_background(self, frame_average=1):
+        """Retrieve a background image as a 2D numpy array with shape (rows, cols). """
+        trigger_mode = self.trigger_mode
+        self.trigger_mode = "Off"  # set camera to internal trigger mode
+        bkg_image = numpy.zeros((frame_average, self.cfg.sensor_row_count,
+                                 self.cfg.sensor_column_count), dtype='uint16')
+        self.flush()
+        self.start(frame_count=frame_average, live=False)
+        for frame in range(0, frame_average):
+            self.log.info(f"Capturing background image: {frame}")
+            bkg_image[frame] = self.grab_frame()
+        self.log.info(f"Averaging {frame_average} background images")
+        self.stop()
+        self.trigger_mode = trigger_mode
+        return numpy.median(bkg_image, axis=0).astype('uint16')
+
+    def stop(self):
+        if self.running:
+            self._update_arrivals(perf_counter())
+        self.running = False
+
+    def flush(self):
+        """Discard frames that arrived but weren't grabbed."""
+        self.queued_frames = 0
+
+    def get_camera_acquisition_state(self):
+        """return a dict with the state of the acquisition buffers"""
+        now = perf_counter()
+        if self.running:
+            self._update_arrivals(now)
+        elapsed_time = now - self.start_time if self.start_time else 0
+        frame_bytes = self.cfg.sensor_row_count * self.cfg.sensor_column_count * 2
+        frame_rate = self.frames_delivered / elapsed_time if elapsed_time else 0.
+        state = {}
+        state['frame_index'] = self.frames_delivered
+        state['in_buffer_size'] = len(self.frame_pool) - self.queued_frames
+        state['out_buffer_size'] = self.queued_frames
+        state['dropped_frames'] = self.frames_dropped
+        state['data_rate'] = frame_rate * frame_bytes / 1.0e6  # [MB/s]
+        state['frame_rate'] = frame_rate
+        self.log.debug("frame: %d, input buffer size: %d, "
+                       "output buffer size: %d, dropped_frames: %d, "
+                       "data rate: %.2f [MB/s], frame rate: %.2f [fps].",
+                       state['frame_index'], state['in_buffer_size'],
+                       state['out_buffer_size'], state['dropped_frames'],
+                       state['data_rate'], state['frame_rate'])
+        return state
+
+    def get_buffer_allocation_bytes(self):
+        """return the host memory allocated for frame buffers in bytes."""
+        return 0 if self.frame_pool is None else self.frame_pool.nbytes
+
+    def get_mainboard_temperature(self):
+        """get the mainboard temperature in degrees C."""
+        return self.mainboard_temperature
+
+    def get_sensor_temperature(self):
+        """get the sensor temperature in degrees C."""
+        return self.sensor_temperature
+
+    def get_feature_snapshot(self):
+        """Return {module: {feature: value}} of the simulated features."""
+        return {'remote': {'Width': self.cfg.sensor_column_count,
+                           'Height': self.cfg.sensor_row_count,
+                           'PixelFormat': 'Mono16',
+                           'TriggerMode': self.trigger_mode,
+                           'ExposureTime': self.exposure_time_us,
+                           'Gain': self.gain,
+                           'FramePeriod': self.frame_period_s},
+                'stream': {'BufferCount': len(self.frame_pool)}}
+
+    def get_temperatures(self):
+        """get the mainboard and sensor temperatures in degrees C."""
+        return {'mainboard': self.mainboard_temperature,
+                'sensor': self.sensor_temperature}
+
+    def schema_log_system_metadata(self):
+        """Log camera metadata with the schema tag. Like :class:`Camera`,
+        only the first call logs every feature; later calls log changes."""
+        snapshot = self.get_feature_snapshot()
+        log_feature_changes(self.log, self.feature_snapshot, snapshot)
+        self.feature_snapshot = snapshot
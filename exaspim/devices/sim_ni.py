@@ -0,0 +1,198 @@
+"""Simulated NI DAQ with the same interface and timing as :class:`NI`."""
+import logging
+import numpy as np
+from math import ceil
+from time import perf_counter, sleep
+
+
+class SimNI:
+    """Stand-in for :class:`NI` that models pulse timing instead of
+    playing waveforms.
+
+    Each :meth:`start` schedules a segment of counter pulses on the
+    perf_counter clock. Every pulse retriggers one waveform period on the
+    analog output task. The retriggerable AO task ignores pulses that
+    arrive while it is still playing, so the effective pulse period is the
+    counter period rounded up to a whole number of counter periods that
+    fit the waveform. The camera trigger edges in the assigned waveforms
+    determine when, within each pulse, a camera frame is triggered, so a
+    :class:`SimCamera` can use this object as its trigger source.
+    """
+
+    def __init__(self, dev_name: str, samples_per_sec: float,
+                 livestream_frequency_hz: int = None,
+                 period_time_s: float = None, ao_channels: dict = None,
+                 start_latency_s: float = 0.005):
+        """init.
+
+        :param dev_name: NI device name as it appears in Device Manager.
+        :param samples_per_sec: sample playback rate in samples per second.
+        :param livestream_frequency_hz: counter frequency during livestream.
+            Defaults to one pulse per waveform period.
+        :param period_time_s: the total waveform period for one frame pattern.
+        :param ao_channels: dict in the form of
+            {<analog output name>: <analog output channel>}.
+        :param start_latency_s: time between :meth:`start` and the first
+            pulse.
+        """
+        self.log = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self.dev_name = dev_name
+        self.samples_per_sec = samples_per_sec
+        self.livestream_frequency_hz = livestream_frequency_hz
+        self.period_time_s = period_time_s
+        self.ao_names_to_channels = ao_channels
+        self.start_latency_s = start_latency_s
+        self.daq_samples = round(self.samples_per_sec * self.period_time_s)
+        self.waveform_samples = self.daq_samples
+        self.camera_trigger_offsets_s = [0.]  # camera triggers per pulse.
+        self.live = None
+        self.pulse_count = None  # None if pulsing continuously.
+        self.running = False
+        # Pulse segments as [start time, pulse period, pulse count or None].
+        self.segments = []
+
+    @property
+    def counter_period_s(self):
+        """Time between counter pulses."""
+        if self.live and self.livestream_frequency_hz:
+            return 1.0 / self.livestream_frequency_hz
+        return self.daq_samples / self.samples_per_sec
+
+    @property
+    def pulse_period_s(self):
+        """Time between pulses that actually retrigger the waveforms."""
+        waveform_time_s = self.waveform_samples / self.samples_per_sec
+        counter_period_s = self.counter_period_s
+        # Round to the nearest ns so waveforms that exactly fit the counter
+        # period aren't pushed to the next pulse by float error.
+        return counter_period_s * max(1, ceil(round(waveform_time_s / counter_period_s, 9)))
+
+    def configure(self, live: bool = False):
+        self.live = live
+        self.running = False
+        self.segments = []
+        self.waveform_samples = self.daq_samples
+        if live:
+            self.set_pulse_count(pulse_count=0)
+
+    def assign_waveforms(self, voltages_t, scout_mode: bool = False):
+        if scout_mode:
+            self.waveform_samples = len(voltages_t[0])
+        # Find the rising edges of the camera trigger within one period.
+        camera_index = list(self.ao_names_to_channels).index('camera')
+        camera_high = np.asarray(voltages_t[camera_index]) > 2.5
+        edges = np.flatnonzero(camera_high[1:] & ~camera_high[:-1]) + 1
+        if camera_high[0]:
+            edges = np.insert(edges, 0, 0)
+        self.camera_trigger_offsets_s = \
+            [float(edge) / self.samples_per_sec for edge in edges] or [0.]
+
+    def set_pulse_count(self, pulse_count: int = None):
+        """Set the number of pulses to generate or None if pulsing continuously.
+
+        :param pulse_count: The number of pulses to generate. If 0 or
+            unspecified, the counter pulses continuously.
+        """
+        self.log.debug(f"Setting counter task count to {pulse_count} pulses.")
+        self.pulse_count = pulse_count if pulse_count else None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.segments.append([perf_counter() + self.start_latency_s,
+                              self.pulse_period_s, self.pulse_count])
+
+    def done_time(self):
+        """Time at which the current segment finishes playing, or None if it
+        pulses continuously."""
+        if not self.segments:
+            return perf_counter()
+        start_time, period, count = self.segments[-1]
+        if count is None:
+            return None
+        # The last pulse plays one full waveform period.
+        return start_time + count * period
+
+    def wait_until_done(self, timeout=1.0):
+        done_time = self.done_time()
+        if done_time is None:
+            raise TimeoutError("Counter task is pulsing continuously.")
+        remaining_time = done_time - perf_counter()
+        if remaining_time > timeout:
+            sleep(timeout)
+            raise TimeoutError("Counter task did not finish before timeout.")
+        if remaining_time > 0:
+            sleep(remaining_time)
+
+    def stop(self, wait: bool = False, sleep_time = None):
+        """Stop the tasks. Optional: try waiting first before stopping."""
+        try:
+            if wait:
+                self.wait_until_done()
+        finally:
+            if self.running and self.segments:
+                # Truncate the segment to the pulses emitted so far.
+                start_time, period, count = self.segments[-1]
+                emitted = max(0, int((perf_counter() - start_time) // period) + 1)
+                self.segments[-1][2] = emitted if count is None \
+                    else min(count, emitted)
+            self.running = False
+            if sleep_time is not None:
+                sleep(sleep_time)  # Sleep so ao task can finish
+
+    def get_pulse_time(self, pulse_index: int, since: float = 0.):
+        """Return the time of a pulse or None if it hasn't been scheduled.
+
+        :param pulse_index: index of the pulse, counting only pulses
+            emitted at or after `since`.
+        :param since: perf_counter time to start counting pulses from. It
+            must not decrease between calls; segments that finished before
+            it are discarded.
+        """
+        # Drop segments that can't contain a pulse at or after `since`, so a
+        # long run doesn't rescan every chunk it has played. Keep the last
+        # one; stop() and done_time() refer to it.
+        expired = 0
+        for start_time, period, count in self.segments[:-1]:
+            if count is None or start_time + count * period > since:
+                break
+            expired += 1
+        if expired:
+            del self.segments[:expired]
+        for start_time, period, count in self.segments:
+            # Skip pulses in this segment that came before `since`.
+            first = max(0, ceil((since - start_time) / period))
+            available = None if count is None else max(0, count - first)
+            if available is None or pulse_index < available:
+                return start_time + (first + pulse_index) * period
+            pulse_index -= available
+        return None
+
+    def get_trigger_time(self, trigger_index: int, since: float = 0.):
+        """Return the time of a camera trigger or None if it hasn't been
+        scheduled.
+
+        :param trigger_index: index of the camera trigger, counting only
+            triggers from pulses emitted at or after `since`.
+        :param since: perf_counter time to start counting from, i.e: when
+            the camera started acquiring.
+        """
+        triggers_per_pulse = len(self.camera_trigger_offsets_s)
+        pulse_index, trigger = divmod(trigger_index, triggers_per_pulse)
+        pulse_time = self.get_pulse_time(pulse_index, since)
+        if pulse_time is None:
+            return None
+        return pulse_time + self.camera_trigger_offsets_s[trigger]
+
+    def get_health(self):
+        """Return a dict summarizing the state of the simulated tasks."""
+        done_time = self.done_time()
+        counter_done = not self.running or \
+            (done_time is not None and perf_counter() >= done_time)
+        return {'live': self.live,
+                'counter_done': counter_done,
+                'ao_done': counter_done}
+
+    def close(self):
+        self.running = False
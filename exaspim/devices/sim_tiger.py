@@ -0,0 +1,85 @@
+"""Simulated Tiger controller whose moves take as long as real ones."""
+from time import perf_counter, sleep
+from tigerasi.sim_tiger_controller import SimTigerController
+from tigerasi.tiger_controller import STEPS_PER_UM
+
+
+class TimedSimTigerController(SimTigerController):
+    """SimTigerController with a trapezoidal move-duration model.
+
+    Each axis finishes a move after it has accelerated to its speed,
+    travelled, decelerated and settled; axes move concurrently. Until then
+    :meth:`is_moving` reports True, so callers that wait on the stage (i.e:
+    ``SamplePose.move_absolute(..., wait=True)``) block for a realistic
+    time. Axis positions are tracked in tiger steps.
+    """
+
+    def __init__(self, *args, speed_mm_per_s: float = 1.0,
+                 acceleration_ms: float = 50.,
+                 settle_time_s: float = 0.05, **kwargs):
+        """Init.
+
+        :param speed_mm_per_s: default speed of every axis.
+        :param acceleration_ms: time to ramp up to speed (and down again).
+        :param settle_time_s: time after the move for the axis to settle.
+        """
+        self.default_speed_mm_per_s = speed_mm_per_s
+        self.acceleration_s = acceleration_ms / 1.0e3
+        self.settle_time_s = settle_time_s
+        self.speeds_mm_per_s = {}  # {axis: speed} for axes set explicitly.
+        self.sim_positions = {}  # {axis: position [steps]}
+        self.move_end_times = {}  # {axis: time at which it stops moving}
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def _axis_kwds(kwds: dict):
+        """Split out the {axis: value} keywords (single letters)."""
+        return {k.upper(): v for k, v in kwds.items() if len(k) == 1}
+
+    def move_duration_s(self, axis: str, steps: float):
+        """Time for one axis to move by `steps` and settle."""
+        distance_mm = abs(steps) / STEPS_PER_UM / 1.0e3
+        if distance_mm == 0:
+            return 0.
+        speed = self.speeds_mm_per_s.get(axis.upper(), self.default_speed_mm_per_s)
+        # Trapezoidal profile: the ramps add one acceleration time in total.
+        return distance_mm / speed + self.acceleration_s + self.settle_time_s
+
+    def _start_move(self, deltas: dict):
+        """Schedule the end of a move made up of per-axis deltas [steps].
+        Axes move concurrently, and a new move on an axis retargets it."""
+        now = perf_counter()
+        for axis, steps in deltas.items():
+            self.move_end_times[axis] = now + self.move_duration_s(axis, steps)
+
+    def move_absolute(self, *args, **kwds):
+        axes = self._axis_kwds(kwds)
+        self._start_move({axis: position - self.sim_positions.get(axis, 0)
+                          for axis, position in axes.items()})
+        self.sim_positions.update(axes)
+        return super().move_absolute(*args, **kwds)
+
+    def move_relative(self, *args, **kwds):
+        axes = self._axis_kwds(kwds)
+        self._start_move(axes)
+        for axis, steps in axes.items():
+            self.sim_positions[axis] = self.sim_positions.get(axis, 0) + steps
+        return super().move_relative(*args, **kwds)
+
+    def zero_in_place(self, *axes):
+        for axis in axes:
+            self.sim_positions[axis.upper()] = 0
+        return super().zero_in_place(*axes)
+
+    def set_speed(self, *args, **kwds):
+        self.speeds_mm_per_s.update(self._axis_kwds(kwds))
+        return super().set_speed(*args, **kwds)
+
+    def is_moving(self, *args, **kwds):
+        return perf_counter() < max(self.move_end_times.values(), default=0.)
+
+    def wait_until_idle(self):
+        """Block until every axis has stopped moving and settled."""
+        remaining_time = max(self.move_end_times.values(), default=0.) - perf_counter()
+        if remaining_time > 0:
+            sleep(remaining_time)
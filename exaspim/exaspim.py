@@ -1,38 +1,61 @@
 """Abstraction of the ExaSPIM Instrument."""
+import copy
+import csv
+import queue
 import threading
+from functools import partial
 
 import numpy as np
 import logging
-import tifffile
 from tqdm import tqdm
 from pathlib import Path
-from psutil import virtual_memory, Process
-from os import getpid
+from psutil import virtual_memory
 from time import perf_counter, sleep, time
 from mock import NonCallableMock as Mock
 from datetime import datetime
 from exaspim.exaspim_config import ExaspimConfig
-from exaspim.devices.camera import Camera
-from exaspim.devices.ni import NI
+from exaspim.devices.sim_camera import SimCamera
+from exaspim.devices.sim_ni import SimNI
+from exaspim.devices.sim_tiger import TimedSimTigerController as SimTiger
+from exaspim.devices.locked_device import LockedDevice
 from exaspim.operations.waveform_generator import generate_waveforms
-from exaspim.operations.gpu_img_downsample import DownSample
+from exaspim.operations.synthetic_specimen import SyntheticSpecimen
+from exaspim.operations.img_downsample import get_downsampler
+from exaspim.operations.cpu_img_downsample import align_region, downsample_region
+from exaspim.operations.motion_planner import MotionPlanner
+from exaspim.operations.config_diff import diff_config, plan_config_actions, \
+    CAMERA, CAMERA_EXPOSURE, CAMERA_GAIN, JOYSTICK, FOCUS, WAVEFORMS, RESTART
+from exaspim.operations.affinity import parse_cpu_list, numa_node_cpus, \
+    set_thread_affinity, first_touch
+from exaspim.operations.memory_budget import acquisition_memory_budget, \
+    largest_chunk_size, hugepage_pools, shared_memory_free_bytes, \
+    PREALLOCATED_ITEMS, MEMORY_HEADROOM_FRACTION
 from threading import Event, Thread
-from exaspim.processes.stack_writer import StackWriter
+from exaspim.processes.remote_stack_writer import RemoteStackWriter
 from exaspim.processes.mip_processor import MIPProcessor
+from exaspim.processes.intensity_stats_processor import IntensityStatsProcessor
 from exaspim.processes.file_transfer import FileTransfer
+from exaspim.processes.image_writer import ImageWriter, pyramid_level_count
+from exaspim.processes.memory_sampler import MemorySampler, format_memory_sample
+from exaspim.processes.telemetry_poller import TelemetryPoller
+from exaspim.processes.tile_registration import TileRegistration
+from exaspim.processes.mosaic_builder import MosaicBuilder
 from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
+from exaspim.data_structures.acquisition_settings import AcquisitionSettings
+from exaspim.data_structures.latest_frame_mailbox import LatestFrameMailbox
 from multiprocessing.shared_memory import SharedMemory
 from math import ceil, floor
 from tigerasi.tiger_controller import TigerController, STEPS_PER_UM
-from tigerasi.sim_tiger_controller import SimTigerController as SimTiger
 from spim_core.spim_base import Spim, lock_external_user_input
 from spim_core.devices.tiger_components import SamplePose
 from tigerasi.device_codes import JoystickInput
-from egrabber import query
 import sys
 
 # Constants
 IMARIS_TIMEOUT_S = 0.1
+LIVE_VIEW_POLL_S = 0.01  # how often live view threads check for new frames.
+LIVE_VIEW_MAX_PIXELS = 2048 * 2048  # largest region served at full resolution.
+MEMORY_SAMPLE_PERIOD_S = 0.5
 
 
 class Exaspim(Spim):
@@ -43,27 +66,44 @@ class Exaspim(Spim):
         # Separate Processes per channel.
         self.mip_workers = {}  # aggregates xy, xy, yz MIPs from frames.
         self.stack_writer_workers = {}  # writes img chunks to a stack on disk.
+        self.stats_workers = {}  # intensity statistics of img chunks.
         # Containers
         self.img_buffers = {}  # Shared double buffers for acquisition & compression.
         # Hardware
-        self.cam = Camera(self.cfg) if not self.simulated else Mock(Camera)
-        self.ni = NI(**self.cfg.daq_obj_kwds) if not self.simulated else Mock(NI)
+        self.specimen = SyntheticSpecimen(self.cfg.sensor_row_count,
+                                          self.cfg.sensor_column_count) \
+            if self.simulated else None
+        if self.simulated:
+            self.cam = SimCamera(self.cfg, specimen=self.specimen)
+            self.ni = SimNI(**self.cfg.daq_obj_kwds)
+        else:  # Only load the hardware drivers if we need them.
+            from exaspim.devices.camera import Camera  # egrabber
+            from exaspim.devices.ni import NI  # nidaqmx
+            self.cam = Camera(self.cfg)
+            self.ni = NI(**self.cfg.daq_obj_kwds)
         self.etl = None
         self.gavlo_a = None
         self.gavlo_b = None
         self.daq = None
-        self.tigerbox = TigerController(**self.cfg.tiger_obj_kwds) if not \
+        tigerbox = TigerController(**self.cfg.tiger_obj_kwds) if not \
             self.simulated else SimTiger(**self.cfg.tiger_obj_kwds,
                                          build_config={'Motor Axes': ['X', 'Y', 'Z', 'M', 'N', 'W', 'V']})
+        # Every Tiger command, from any thread (UI, telemetry, acquisition)
+        # and through the SamplePose, holds the stage lock so that replies
+        # can't interleave.
+        self.stage_lock = threading.RLock()
+        self.tigerbox = LockedDevice(tigerbox, self.stage_lock)
         self.sample_pose = SamplePose(self.tigerbox,
                                       **self.cfg.sample_pose_kwds)
+        self.motion_planner = MotionPlanner(self.tigerbox, self.sample_pose)
         # Extra Internal State attributes for the current image capture
         # sequence. These really only need to persist for logging purposes.
         self.frame_index = 0  # current image to capture.
         self.total_tiles = 0  # tiles to be captured.
         self.x_y_tiles = 0    # x*y tiles to be captured.
         self.curr_tile_index = 0
-        self.downsampler = DownSample()
+        self._downsampler = None  # created on first use. See downsampler.
+        self.downsampler_lock = threading.Lock()
         self.prev_frame_chunk_index = None  # chunk index of most recent frame.
         self.stage_x_pos_um = None  # Current x position in [um]
         self.stage_y_pos_um = None  # Current y position in [um]
@@ -80,21 +120,56 @@ class Exaspim(Spim):
         self.acquiring_images = False
         self.active_lasers = None
         self.scout_mode = False
+        # Live view. A producer thread publishes the newest downsampled
+        # frame per channel; viewers read it without touching the hardware.
+        self.live_frames = {}  # {channel: LatestFrameMailbox}
+        self.live_view_worker = None
+        self.live_view_lock = threading.Lock()
+        self.live_view_region = None  # (roi, level) or None for full frames.
 
         # Internal arrays/iamges
         self.bkg_image = None  # background image
         self.mip_processes = {}
         self.mip_images_shm = {}
         self.mip_images = {}
+        self.contrast_limits = {}  # {channel: (low, high)} from the last tile.
+        self.focus_curves = {}  # {channel: {(x, y): (frames, focus values)}}
+        self.tile_registration = None  # registers tiles from MIPs.
+        self.mosaic = None  # live overview built from MIPs.
+        self.tile_positions_um = {}  # {(x, y): (stage x, stage y)} per tile.
+        self.acquisition_settings = None  # frozen while acquiring.
+        # Background writer for background and other auxiliary images.
+        self.image_writer = ImageWriter(self.cfg.aux_image_compression,
+                                        self.cfg.aux_image_queue_size)
+        self.image_writer.start()
         # Setup hardware according to the config.
         self._setup_joystick()
         self._setup_lasers()
         self._setup_motion_stage()
         self._setup_camera()
+        # Config state the hardware was last set up with. See apply_config.
+        self.applied_config = copy.deepcopy(self.cfg.cfg)
+        # Sample memory usage in the background so the acquisition loop
+        # only reads the latest sample.
+        self.memory_sampler = MemorySampler(MEMORY_SAMPLE_PERIOD_S,
+                                            self.cam.get_buffer_allocation_bytes,
+                                            shm_bytes_fn=self._shared_memory_bytes)
+        self.memory_sampler.start()
+        self.telemetry = self._setup_telemetry()
+        self.telemetry.start()
         # Grab a background image for livestreaming.
         # self._grab_background_image()
         self.chunk_lock = threading.Lock()
-        self.stage_lock = threading.Lock()
+
+    @property
+    def downsampler(self):
+        """Display image downsampler. Created on first use, since picking
+        the GPU backend imports OpenCL and compiles a kernel."""
+        with self.downsampler_lock:
+            if self._downsampler is None:
+                self._downsampler = get_downsampler()
+            return self._downsampler
+
     def _setup_joystick(self):
         """Configure joystick based on value in config"""
 
@@ -134,38 +209,39 @@ class Exaspim(Spim):
         # Disable backlash compensation.
         self.sample_pose.set_axis_backlash(z=0)
 
+    def _setup_telemetry(self):
+        """Create a poller that reads instrument health in the background so
+        that logging it never waits on the hardware."""
+        telemetry = TelemetryPoller(self.cfg.telemetry_history_length)
+        telemetry.add_channel('camera_temperatures', self.cam.get_temperatures,
+                              self.cfg.camera_telemetry_period_s, units='C')
+        # FIXME: this is hardcoded as V axis. Reads hold the stage lock like
+        #   every Tiger command, but would still delay stage moves, so only
+        #   poll while the stage is otherwise idle.
+        telemetry.add_channel('etl_temperature',
+                              lambda: self.tigerbox.get_etl_temp('V'),
+                              self.cfg.stage_telemetry_period_s, units='C',
+                              condition=lambda: not (self.acquiring_images or
+                                                     self.livestream_enabled.is_set()))
+        telemetry.add_channel('daq_health', self.ni.get_health,
+                              self.cfg.daq_telemetry_period_s)
+        return telemetry
+
     def _grab_background_image(self):
         """Collect a background image for livestreaming."""
         # Collect a background image
         self.log.info("Collecting livestreaming background image")
         self.bkg_image = self.cam.collect_background(frame_average=1)
 
-    def __simulated_grab_frame(self):
-        elapsed_time = perf_counter() - self.last_frame_time
-        if elapsed_time < 1. / 6.4:
-            remaining_time = 1. / 6.4 - elapsed_time
-            sleep(remaining_time)
-        self.last_frame_time = perf_counter()
-        # Image shape is a buffer organized by y and then by x.
-        return np.zeros((self.cfg.sensor_row_count,
-                         self.cfg.sensor_column_count),
-                        dtype=self.cfg.image_dtype)
-
     def _setup_camera(self):
         """Configure the camera according to the config."""
         # TODO: pass in config parameters here instead of passing in cfg on init.
         self.cam.configure()
-        if self.simulated:
-            self.last_frame_time = perf_counter()
-            self.cam.get_camera_acquisition_state.return_value = {'dropped_frames': 0}
-            self.cam.collect_background.return_value = \
-                np.zeros((self.cfg.sensor_row_count, self.cfg.sensor_column_count),
-                         dtype=self.cfg.image_dtype)
-            self.cam.grab_frame = self.__simulated_grab_frame
-            self.cam.get_mainboard_temperature.return_value = 23.15
-            self.cam.get_sensor_temperature.return_value = 23.15
+        if self.simulated:  # Simulated frames arrive on simulated DAQ pulses.
+            self.cam.attach_trigger_source(self.ni)
 
-    def _setup_waveform_hardware(self, wavelengths: list[int], live: bool = False):
+    def _setup_waveform_hardware(self, wavelengths: list[int], live: bool = False,
+                                 settings: AcquisitionSettings = None):
 
         # Only configures daq on the initiation of livestream
         if not self.livestream_enabled.is_set() and self.ni.live != live:
@@ -174,29 +250,61 @@ class Exaspim(Spim):
 
         self.active_lasers = wavelengths
         self.log.info("Generating waveforms.")
-        voltages_t = generate_waveforms(self.cfg, plot=False, channels=self.active_lasers, live=live)
+        voltages_t = generate_waveforms(self.cfg if settings is None else settings,
+                                        plot=False, channels=self.active_lasers, live=live)
         print(voltages_t.shape)
         self.log.info("Writing waveforms to hardware.")
         self.ni.assign_waveforms(voltages_t, self.scout_mode)
 
     def apply_config(self):
-        """Apply the new state present in the config."""
-        # Check to see what changed and apply the new changes safely.
-        # TODO: pull changes from config and apply them directly in a safe way.
-        #   Throw an error otherwise.
+        """Apply the changes made to the config since it was last applied.
+
+        Each changed key maps to the least reconfiguration that applies it
+        (see :func:`plan_config_actions`). i.e: tweaking an ETL amplitude
+        during livestream only rewrites the waveforms, and changing the
+        gain only writes the camera's Gain feature.
+        """
         # TODO: lockout access to state changes if we are unable to change them
         #   i.e: we are acquiring images and cannot change the hardware settings.
-
         if self.acquiring_images:
             raise RuntimeError("Cannot change system configuration while "
                                "acquiring images.")
-        if self.livestream_enabled:
-            self.cam.stop()
-        self.cam.configure()  # configures from config.
-        if self.livestream_enabled:
-            active_lasers = self.active_lasers
-            self.stop_livestream()
-            self.start_livestream(active_lasers)  # reapplies waveform settings.
+        new_config = copy.deepcopy(self.cfg.cfg)
+        plan = plan_config_actions(diff_config(self.applied_config, new_config))
+        if not plan:
+            self.log.debug("Config is unchanged. Nothing to apply.")
+            return
+        for action, paths in plan.items():
+            self.log.debug(f"Applying {action} for changes to: "
+                           f"{', '.join('.'.join(path) for path in paths)}.")
+        live = self.livestream_enabled.is_set()
+        if CAMERA in plan:
+            if live:
+                self.cam.stop()
+            self.cam.configure()  # configures from config.
+            if live:
+                active_lasers = self.active_lasers
+                self.stop_livestream()
+                self.start_livestream(active_lasers)  # reapplies waveform settings.
+            plan.pop(WAVEFORMS, None)
+        if CAMERA_EXPOSURE in plan:
+            self.cam.set_exposure_time()
+        if CAMERA_GAIN in plan:
+            self.cam.set_gain()
+        if JOYSTICK in plan:
+            self._setup_joystick()
+        if FOCUS in plan and live and self.active_lasers:
+            focus_position_um = self.cfg.get_focus_position(self.active_lasers[0])
+            self.tigerbox.move_absolute(n=round(focus_position_um * STEPS_PER_UM))
+        if WAVEFORMS in plan and live:
+            # Swap waveforms between periods; the camera keeps running.
+            self.ni.stop()
+            self._setup_waveform_hardware(self.active_lasers, live=True)
+            self.ni.start()
+        if RESTART in plan:
+            self.log.warning("Restart to apply changes to: " +
+                             ', '.join('.'.join(path) for path in plan[RESTART]))
+        self.applied_config = new_config
 
     def log_system_metadata(self):
         # log tiger settings
@@ -247,15 +355,8 @@ class Exaspim(Spim):
                                  do_mip: bool = True):
         # TODO: pass in start position as a parameter.
         """Collect a volumetric image with specified size/overlap specs."""
-        self.acquiring_images = True
-        # Memory checks.
         chunk_size = self.cfg.compressor_chunk_size \
             if compressor_chunk_size is None else compressor_chunk_size
-        try:  # Ensure we have enough memory for the allocated chunk size.
-            self._check_system_memory_resources(len(channels), chunk_size)
-        except MemoryError as e:
-            self.log.error(e)
-            raise
         x_grid_step_um, y_grid_step_um = self.get_xy_grid_step(tile_overlap_x_percent,
                                                                tile_overlap_y_percent)
         xtiles, ytiles, ztiles = self.get_tile_counts(tile_overlap_x_percent,
@@ -263,6 +364,12 @@ class Exaspim(Spim):
                                                       z_step_size_um,
                                                       volume_x_um, volume_y_um,
                                                       volume_z_um)
+        # Memory checks. Stacks are acquired one channel at a time.
+        try:  # Ensure we have enough memory for the allocated chunk size.
+            self._check_system_memory_resources(1, chunk_size, ztiles)
+        except MemoryError as e:
+            self.log.error(e)
+            raise
         self.x_y_tiles = xtiles*ytiles
         start_tile_index = 0 if start_tile_index is None else start_tile_index
         end_tile_index = xtiles * ytiles - 1 \
@@ -305,6 +412,11 @@ class Exaspim(Spim):
                 'tags': ['schema']
             }
         self.log.info('axes_data', extra=axes_data)
+        # Freeze the settings so config edits can't change them mid-run.
+        settings = AcquisitionSettings.from_config(self.cfg, channels)
+        self.acquisition_settings = settings
+        self.log.info('acquisition settings',
+                      extra={**settings.to_dict(), 'tags': ['schema']})
 
         # Update internal state.
         self.total_tiles = xtiles * ytiles * ztiles * len(channels)
@@ -315,6 +427,17 @@ class Exaspim(Spim):
                        f"{xtiles} xtiles, {ytiles} ytiles, and {ztiles} ztiles"
                        f" per channel.")
         self.frame_index = 0  # Reset image index.
+        if do_mip and self.cfg.tile_registration_enabled:
+            self.tile_registration = \
+                self._setup_tile_registration(tile_overlap_x_percent,
+                                              tile_overlap_y_percent,
+                                              deriv_storage_dir)
+            self.tile_registration.start()
+        if do_mip and self.cfg.mosaic_enabled:
+            self.mosaic = self._setup_mosaic(xtiles, ytiles, x_grid_step_um,
+                                             y_grid_step_um, deriv_storage_dir)
+            self.mosaic.start()
+        self.tile_positions_um.clear()
         start_time = perf_counter()  # For logging elapsed time.
         # # Setup containers
         # self._setup_waveform_hardware(channels)
@@ -332,53 +455,72 @@ class Exaspim(Spim):
         # Capture the fully-formed images as they arrive.
         # Create stacks of tiles along the z axis per channel.
         # Transfer stacks as they arrive to their final destination.
+        # Start the live view right before the try so that the finally
+        # always stops it.
+        self.acquiring_images = True
+        self.live_frames.clear()  # Drop frames from a previous session.
+        self._start_live_view_worker()
         try:
             for x in tqdm(range(xtiles), desc="XY Tiling Progress"):
-                self.sample_pose.move_absolute(
-                    x=round(self.stage_x_pos_um * STEPS_PER_UM), wait=True)
+                # Moves with the first tile of the column.
+                self.motion_planner.move(x=round(self.stage_x_pos_um * STEPS_PER_UM))
                 # self.stage_y_pos_um = 0 # TODO, this changes for reversing tiling
                 self.stage_y_pos_um = (ytiles-1)*y_grid_step_um
                 for y in range(ytiles):
 
                     for ch in channels:
-
-                        self._setup_waveform_hardware([ch])
+                        in_range = start_tile_index <= self.curr_tile_index <= end_tile_index
                         # MOVE N AXIS OF TIGER BOX TO REFOCUS PER COLOR
-                        print(self.cfg.get_focus_position(ch))
-                        assert self.cfg.get_focus_position(ch) < -500
-                        print(self.cfg.get_focus_position(ch))
-                        assert self.cfg.get_focus_position(ch) > -1500
-                        print(self.cfg.get_focus_position(ch) * STEPS_PER_UM)
-                        self.tigerbox.move_absolute(n=round(self.cfg.get_focus_position(ch) * STEPS_PER_UM))
-
-                        self.sample_pose.move_absolute(
-                            y=round(self.stage_y_pos_um * STEPS_PER_UM), wait=True)
-
-                        if start_tile_index <= self.curr_tile_index <= end_tile_index:
-                            self.log.info(f"tile: ({x}, {y}); stage_position: "
-                                          f"({self.stage_x_pos_um:.3f}[um], "
-                                          f"{self.stage_y_pos_um:.3f}[um])")
-                            stack_prefix = f"{tile_prefix}_x_{x:04}_y_{y:04}_z_0000"
-                            # Log stack capture start state.
-                            self.log_stack_acquisition_params(self.curr_tile_index,
-                                                              stack_prefix,
-                                                              z_step_size_um)
-                            # TODO, should we do the arithmetic outside of the Camera class?
-                            # TODO, should we transfer this small file or just write directly over the network?
-                            tile_start = time()
-                            # Collect background image for this tile
-                            self.background_image.set()
-                            self.log.info("Starting background image.")
-                            bkg_img = self.cam.collect_background(frame_average=10)
-                            # Save background image TIFF file
-                            tifffile.imwrite(str((deriv_storage_dir / Path(f"bkg_{stack_prefix}_ch_{ch}.tiff")).absolute()), bkg_img, tile=(256, 256))
-                            self.log.info("Completed background image.")
-                            self.background_image.clear()
+                        focus_position_um = settings.channel(ch).focus_position_um
+                        self.log.debug(f"Focus position of {ch}[nm] channel: "
+                                       f"{focus_position_um}[um], "
+                                       f"{focus_position_um * STEPS_PER_UM} steps.")
+                        assert focus_position_um < -500
+                        assert focus_position_um > -1500
+                        self.motion_planner.move_tiger(n=round(focus_position_um * STEPS_PER_UM))
+                        # Also head to the z backlash reset position; the
+                        # stack approaches its start from there.
+                        self.motion_planner.move(
+                            y=round(self.stage_y_pos_um * STEPS_PER_UM),
+                            z=round(self._z_backup_position(settings)))
+                        tile_start = time()
+                        # Do the work that doesn't need the stage to be still
+                        # while it moves.
+                        with self.motion_planner.moving():
+                            self._setup_waveform_hardware([ch], settings=settings)
+                            if in_range:
+                                self.log.info(f"tile: ({x}, {y}); stage_position: "
+                                              f"({self.stage_x_pos_um:.3f}[um], "
+                                              f"{self.stage_y_pos_um:.3f}[um])")
+                                stack_prefix = f"{tile_prefix}_x_{x:04}_y_{y:04}_z_0000"
+                                # Log stack capture start state.
+                                self.log_stack_acquisition_params(self.curr_tile_index,
+                                                                  stack_prefix,
+                                                                  z_step_size_um,
+                                                                  settings)
+                                self.tile_positions_um[(x, y)] = \
+                                    (self.stage_x_pos_um, self.stage_y_pos_um)
+                                # Camera settings that changed since the last tile.
+                                self.cam.schema_log_system_metadata()
+                                # TODO, should we do the arithmetic outside of the Camera class?
+                                # TODO, should we transfer this small file or just write directly over the network?
+                                # Collect background image for this tile.
+                                # It's a dark image, so the stage may move.
+                                self.background_image.set()
+                                self.log.info("Starting background image.")
+                                bkg_img = self.cam.collect_background(frame_average=10)
+                                # Save background image TIFF file in the background.
+                                self.image_writer.write(deriv_storage_dir / Path(f"bkg_{stack_prefix}_ch_{ch}.tiff"), bkg_img)
+                                self.log.info("Completed background image.")
+                                self.background_image.clear()
+
+                        if in_range:
                             # Collect the Z stacks for all channels.
                             output_filenames = \
                                 self._collect_zstacks([ch], ztiles, z_step_size_um,
                                                       chunk_size, local_storage_dir,
-                                                      stack_prefix, x, y, do_mip)
+                                                      stack_prefix, x, y, do_mip,
+                                                      settings)
                             # Start transferring zstack file to its destination.
                             # Note: Image transfer should be faster than image capture,
                             #   but we still wait for prior processes to finish.
@@ -389,14 +531,15 @@ class Exaspim(Spim):
                                     worker = self.stack_transfer_workers.pop(channel)
                                     worker.join()
                             # Kick off Stack transfer processes per channel.
-                            # Bail if we don't need to transfer anything.
-                            if img_storage_dir:
+                            # Bail if we don't need to transfer anything or
+                            # the stacks were written on a remote host.
+                            if img_storage_dir and settings.compressor_remote_address is None:
                                 for channel, filename in output_filenames.items():
                                     self.log.info(f"Starting transfer process for {filename}.")
                                     self.stack_transfer_workers[channel] = \
                                         FileTransfer(local_storage_dir / filename,
                                                      img_storage_dir / filename,
-                                                     self.cfg.ftp, self.cfg.ftp_flags)
+                                                     settings.ftp, settings.ftp_flags)
                                     self.stack_transfer_workers[channel].start()
                             else:
                                 self.log.info("Skipping file transfer process. File "
@@ -414,7 +557,20 @@ class Exaspim(Spim):
             self.log.exception("Error raised from the main acquisition loop.")
             raise
         finally:
-            self.sample_pose.move_absolute(x=0, y=0, wait=True)
+            self.acquiring_images = False
+            self._join_mip_workers(settings)
+            self.acquisition_settings = None
+            if self.tile_registration is not None:
+                self.tile_registration.close()
+                self.tile_registration = None
+            if self.mosaic is not None:
+                self.mosaic.close()
+                self.mosaic = None
+            self.image_writer.flush()
+            # z approaches 0 from the backlash reset position.
+            self.motion_planner.move(x=0, y=0, z=0)
+            self.motion_planner.start()
+            self.motion_planner.wait()
             self.ni.close()
 
         acquisition_params = {'session_end_time': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
@@ -427,7 +583,8 @@ class Exaspim(Spim):
                          stack_prefix: str,
                          x_tile_num,
                          y_tile_num,
-                         do_mip=True):
+                         do_mip=True,
+                         settings: AcquisitionSettings = None):
         """Collect tile stack for every specified channel and write them to
         disk compressed through ImarisWriter.
 
@@ -454,94 +611,171 @@ class Exaspim(Spim):
             appended to it.)
         :param x_tile_num: current tile number in x dimension
         :param y_tile_num: current tile number in y dimension
+        :param settings: settings snapshot of the acquisition. Taken from the
+            config if unspecified.
 
         :return: dict, keyed by channel name, of the filenames written to disk.
         """
-        self.log.debug(f"Stack Capture starting memory usage: {self.get_mem_consumption():.3f}%")
+        self.log.debug("Stack Capture starting memory usage: "
+                       f"{format_memory_sample(self.memory_sampler.latest())}")
+        settings = AcquisitionSettings.from_config(self.cfg, channels) \
+            if settings is None else settings
         stack_file_names = {}  # names of the files we will create.
         # Flow Control flags.
         capture_successful = False
-        # Put the backlash into a known state.
+        # Put the backlash into a known state. z is usually at (or on its way
+        # to) the reset position already, either from the tile transition or
+        # from the end of the previous stack.
         stage_z_pos = 0
-        z_backup_pos = -STEPS_PER_UM * self.cfg.stage_backlash_reset_dist_um
+        z_backup_pos = self._z_backup_position(settings)
         self.log.debug("Applying extra move to take out backlash.")
-        self.sample_pose.move_absolute(z=round(z_backup_pos))
-        self.sample_pose.move_absolute(z=round(stage_z_pos))
-        self.sample_pose.setup_ext_trigger_linear_move('z', frame_count,
-                                                       z_step_size_um / 1.0e3)
+        self.motion_planner.move(z=round(z_backup_pos))
+        self.motion_planner.start()
+        self.motion_planner.wait()
+        # Spin up the writers while z moves to the start of the stack.
+        self.motion_planner.move(z=round(stage_z_pos))
+        self.motion_planner.start()
+        # Previous tile's MIP processes should be done writing by now. Join
+        # them before this tile's are created under the same channel keys.
+        if do_mip:
+            self._join_mip_workers(settings)
         # Allocate shard memory and create StackWriter per-channel.
         for ch in channels:
             stack_file_names[ch] = f"{stack_prefix}_ch_{ch}.ims"
             mem_shape = (chunk_size,
-                         self.cfg.sensor_row_count,
-                         self.cfg.sensor_column_count)
+                         settings.sensor_row_count,
+                         settings.sensor_column_count)
             self.img_buffers[ch] = SharedDoubleBuffer(mem_shape,
-                                                      dtype=self.cfg.datatype)
+                                                      dtype=settings.datatype)
+            affinity = self._channel_affinity(ch, settings)
+            # Place both chunks on the node of the CPUs that compress them.
+            first_touch(self.img_buffers[ch].read_buf, affinity['memory'])
+            first_touch(self.img_buffers[ch].write_buf, affinity['memory'])
             chunk_dim_order = ('z', 'y', 'x')  # must agree with mem_shape
             if local_storage_dir is not None:
                 self.log.debug(f"Creating StackWriter for {ch}[nm] channel.")
+                # Compress on another host if one is configured.
+                remote_address = settings.compressor_remote_address
+                if remote_address is None:
+                    # Only load ImarisWriter if we compress locally.
+                    from exaspim.processes.stack_writer import StackWriter
+                    writer_cls = StackWriter
+                else:
+                    writer_cls = partial(RemoteStackWriter, remote_address)
                 self.stack_writer_workers[ch] = \
-                    StackWriter(self.cfg.sensor_row_count,
-                                self.cfg.sensor_column_count,
-                                frame_count, self.stage_x_pos_um, self.stage_y_pos_um,
-                                self.cfg.x_voxel_size_um, self.cfg.y_voxel_size_um,
-                                self.cfg.z_step_size_um,
-                                self.cfg.compressor_chunk_size,
-                                chunk_dim_order,
-                                self.cfg.compressor_thread_count,
-                                self.cfg.compressor_style,
-                                self.cfg.datatype, local_storage_dir,
-                                stack_file_names[ch], str(ch),
-                                self.cfg.channel_specs[str(ch)]['hex_color'])
+                    writer_cls(settings.sensor_row_count,
+                               settings.sensor_column_count,
+                               frame_count, self.stage_x_pos_um, self.stage_y_pos_um,
+                               settings.x_voxel_size_um, settings.y_voxel_size_um,
+                               settings.z_step_size_um,
+                               settings.compressor_chunk_size,
+                               chunk_dim_order,
+                               settings.compressor_thread_count,
+                               settings.compressor_style,
+                               settings.datatype, local_storage_dir,
+                               stack_file_names[ch], str(ch),
+                               settings.channel(ch).hex_color,
+                               cpu_affinity=affinity['writer'])
                 self.stack_writer_workers[ch].start()
-
-            # Setup MIP process if specified to do so.
-            if do_mip:
-                img_shape = (self.cfg.sensor_row_count, self.cfg.sensor_column_count)
-                img_bytes = int(np.prod(img_shape, dtype=np.int64) * np.dtype(self.cfg.image_dtype).itemsize)
-                for ch in channels:
-                    # Allocate shared memory location for latest image for mip process.
-                    self.mip_images_shm[ch] = SharedMemory(create=True, size=img_bytes)
-                    self.mip_images[ch] = np.ndarray(img_shape, dtype=self.cfg.image_dtype,
-                                                   buffer=self.mip_images_shm[ch].buf)
-                    # Mip process will use img_buffers.write_buf to access latest image
-                    # Create the process.
-                    self.mip_processes[ch] = MIPProcessor(x_tile_num, y_tile_num, frame_count,
-                                                          self.cfg.sensor_row_count,
-                                                          self.cfg.sensor_column_count,
-                                                          self.cfg.image_dtype,
-                                                          self.mip_images_shm[ch].name,
-                                                          self.deriv_storage_dir,
-                                                          int(ch))
-                    self.mip_processes[ch].more_images.set()
-                    self.mip_processes[ch].start()
-
+            if settings.intensity_stats_enabled:
+                self.stats_workers[ch] = \
+                    IntensityStatsProcessor(settings.sensor_row_count,
+                                            settings.sensor_column_count,
+                                            frame_count, chunk_size,
+                                            settings.datatype,
+                                            settings.saturation_adu,
+                                            settings.histogram_stride,
+                                            settings.contrast_percentiles,
+                                            settings.intensity_stats_thread_count,
+                                            self.deriv_storage_dir,
+                                            x_tile_num, y_tile_num, int(ch),
+                                            affinity['stats'])
+                self.stats_workers[ch].start()
+
+        # Setup MIP process if specified to do so.
+        if do_mip:
+            img_shape = (settings.sensor_row_count, settings.sensor_column_count)
+            img_bytes = int(np.prod(img_shape, dtype=np.int64) * np.dtype(settings.image_dtype).itemsize)
+            for ch in channels:
+                affinity = self._channel_affinity(ch, settings)
+                # Allocate shared memory location for latest image for mip process.
+                self.mip_images_shm[ch] = SharedMemory(create=True, size=img_bytes)
+                self.mip_images[ch] = np.ndarray(img_shape, dtype=settings.image_dtype,
+                                                 buffer=self.mip_images_shm[ch].buf)
+                first_touch(self.mip_images[ch], affinity['mip'])
+                # Mip process will use img_buffers.write_buf to access latest image
+                # Create the process.
+                self.mip_processes[ch] = MIPProcessor(x_tile_num, y_tile_num, frame_count,
+                                                      settings.sensor_row_count,
+                                                      settings.sensor_column_count,
+                                                      settings.image_dtype,
+                                                      self.mip_images_shm[ch].name,
+                                                      self.deriv_storage_dir,
+                                                      int(ch),
+                                                      settings.aux_image_compression,
+                                                      affinity['mip'],
+                                                      settings.focus_sample_period,
+                                                      settings.focus_downsample,
+                                                      self._mip_preview_level(settings),
+                                                      settings.mip_pyramid_min_size)
+                self.mip_processes[ch].more_images.set()
+                self.mip_processes[ch].start()
+
+        self.motion_planner.wait()
+        self.sample_pose.setup_ext_trigger_linear_move('z', frame_count,
+                                                       z_step_size_um / 1.0e3)
         chunk_count = ceil(frame_count / chunk_size)
         last_frame_index = frame_count - 1
         remainder = frame_count % chunk_size
         last_chunk_size = chunk_size if not remainder else remainder
         start_time = perf_counter()
+        # Keep the acquisition loop on its own CPUs for the whole stack.
+        previous_affinity = \
+            set_thread_affinity(parse_cpu_list(settings.acquisition_cpus))
+        self.cam.flush()  # Drop frames left over from live view or a failed stack.
         self.cam.start(len(channels) * frame_count, live=False)  # TODO: rewrite to block until ready.
+        # With retries enabled, a dropped frame invalidates only the chunk
+        # being filled: it is reacquired from its first frame before it is
+        # dispatched. Otherwise the stack is aborted.
+        retry_limit = settings.chunk_retry_limit
+        grab_timeout_s = settings.frame_timeout_s if retry_limit else 1000.
+        dropped_frames = self._check_camera_acquisition_state(allow_drops=True)
+        chunk_retries = 0  # reacquisitions of the chunk being filled.
+        retried_chunks = []  # first frame of every reacquired chunk.
+        progress = tqdm(total=frame_count, desc="ZStack progress")
         try:
             # Images arrive serialized in repeating channel order.
-            for stack_index in tqdm(range(frame_count), desc="ZStack progress"):
+            stack_index = 0
+            chunk_start_index = 0
+            while stack_index < frame_count:
                 chunk_index = stack_index % chunk_size
                 # Start a batch of pulses to generate more frames and movements.
                 if chunk_index == 0:
+                    chunk_start_index = stack_index
                     chunks_filled = floor(stack_index / chunk_size)
                     remaining_chunks = chunk_count - chunks_filled
                     num_pulses = last_chunk_size if remaining_chunks == 1 else chunk_size
-                    self.log.debug(f"Grabbing chunk {chunks_filled + 1}/{chunk_count}")
-                    self.log.debug(f"Current memory usage: {self.get_mem_consumption():.3f}%")
+                    self.log.debug("Grabbing chunk %d/%d", chunks_filled + 1, chunk_count)
+                    self.log.debug("Current memory usage: %.3f%%", self.get_mem_consumption())
                     self.ni.set_pulse_count(num_pulses)
                     self.ni.start()
                 # Deserialize camera input into corresponding channel.
+                chunk_dropped = False
                 for ch_index in channels:
-                    self.log.debug(f"Grabbing frame "
-                                   f"{stack_index + 1:9}/{frame_count} for "
-                                   f"{ch_index}[nm] channel.")
-                    self.img_buffers[ch_index].write_buf[chunk_index] = \
-                        self.cam.grab_frame()
+                    # Lazy %-formatting: only built if DEBUG is enabled.
+                    self.log.debug("Grabbing frame %9d/%d for %s[nm] channel.",
+                                   stack_index + 1, frame_count, ch_index)
+                    try:
+                        self.img_buffers[ch_index].write_buf[chunk_index] = \
+                            self.cam.grab_frame(grab_timeout_s)
+                    except Exception:
+                        # A dropped frame leaves the end of the chunk without
+                        # one, so the last grab times out.
+                        if not retry_limit or dropped_frames >= \
+                                self._check_camera_acquisition_state(allow_drops=True):
+                            raise
+                        chunk_dropped = True
+                        break
 
                     # Also write a copy of the latest image to a location where
                     # the MIP processor can process it.
@@ -551,12 +785,37 @@ class Exaspim(Spim):
                         pass
                     # Only copies array into shared memory if brackets are there
                     self.mip_images[ch_index][:,:] = self.img_buffers[ch_index].write_buf[chunk_index][:,:]
+                    self.mip_processes[ch_index].frame_index.value = stack_index
                     self.mip_processes[ch_index].new_image.set()
-                    self._check_camera_acquisition_state()
+                    if self._check_camera_acquisition_state(allow_drops=bool(retry_limit)) \
+                            > dropped_frames:
+                        chunk_dropped = True
+                        break
+                if chunk_dropped:
+                    if chunk_retries == retry_limit:
+                        raise RuntimeError(f"Chunk starting at frame "
+                                           f"{chunk_start_index} dropped frames "
+                                           f"{chunk_retries + 1} times.")
+                    chunk_retries += 1
+                    retried_chunks.append(chunk_start_index)
+                    self.log.warning(f"Dropped a frame; reacquiring the chunk "
+                                     f"starting at frame {chunk_start_index} "
+                                     f"(retry {chunk_retries}/{retry_limit}).")
+                    # Don't offer a live display frame from the invalid chunk.
+                    self.prev_frame_chunk_index = None
+                    self.frame_index -= stack_index - chunk_start_index
+                    stack_index = chunk_start_index
+                    progress.n = stack_index
+                    progress.refresh()
+                    dropped_frames = \
+                        self._rewind_chunk(len(channels), chunk_start_index,
+                                           frame_count, z_step_size_um, settings)
+                    continue
                 # Save the index of the most-recently captured frame to
                 # offer it to a live display upon request.
                 self.prev_frame_chunk_index = chunk_index
                 self.frame_index += 1
+                progress.update()
                 # Dispatch either a full chunk of frames or the last chunk,
                 # which may not be a multiple of the chunk size.
                 if chunk_index == chunk_size - 1 or stack_index == last_frame_index:
@@ -581,6 +840,7 @@ class Exaspim(Spim):
                     # Clear previous chunk index, so we don't provide a
                     # picture that has not yet been written to this chunk.
                     self.prev_frame_chunk_index = None
+                    self._cancel_busy_stats()
                     with self.chunk_lock:
                         for ch_index in channels:
                             self.img_buffers[ch_index].toggle_buffers()
@@ -588,17 +848,35 @@ class Exaspim(Spim):
                                 self.stack_writer_workers[ch_index].shm_name = \
                                     self.img_buffers[ch_index].read_buf_mem_name
                                 self.stack_writer_workers[ch_index].done_reading.clear()
+                            if ch_index in self.stats_workers:
+                                self.stats_workers[ch_index].shm_name = \
+                                    self.img_buffers[ch_index].read_buf_mem_name
+                                self.stats_workers[ch_index].done_reading.clear()
+                    self._check_intensity_stats(settings=settings)
+                    chunk_retries = 0
+                stack_index += 1
             capture_successful = True
+            for ch in channels:
+                self.log.info('stack chunk retries',
+                              extra={'tile_number': self.curr_tile_index,
+                                     'file_name': stack_file_names[ch],
+                                     'chunk_retries': len(retried_chunks),
+                                     'retried_chunk_start_frames': retried_chunks,
+                                     'tags': ['schema']})
             self.log.debug(f"Stack imaging time: "
                            f"{(perf_counter() - start_time) / 3600.:.3f} hours.")
         except Exception:
             self.log.exception("Error raised from the stack acquisition loop.")
             raise
         finally:
+            progress.close()
+            # Let MIP processes finish writing in the background. They are
+            # joined before the next stack starts.
             for processes in self.mip_processes.values():
                 processes.more_images.clear()
-                processes.join()
             self.log.debug("Closing devices and processes for this stack.")
+            if previous_affinity is not None:
+                set_thread_affinity(previous_affinity)
             self.ni.stop(wait=True)
             self.cam.stop()
             # Wait for stack writers to finish writing files to disk if capture
@@ -611,6 +889,7 @@ class Exaspim(Spim):
                 self.log.log(level, msg)
                 worker.join(timeout=timeout)
                 # TODO: process termination upon failure?
+            self._join_stats_workers(capture_successful, settings)
             # TODO: flag a thread-safe event that we are no longer able to livestream.
             self.deallocating.set()
             for ch in list(self.img_buffers.keys()):
@@ -618,27 +897,405 @@ class Exaspim(Spim):
                 self.img_buffers[ch].close_and_unlink()
                 del self.img_buffers[ch]
             self.deallocating.clear()
-            # Leave the sample in the starting position.
-            # Apply lead-in move to take out z backlash.
-            z_backup_pos = -STEPS_PER_UM * self.cfg.stage_backlash_reset_dist_um
-            self.log.debug("Applying extra move to take out backlash.")
-            self.sample_pose.move_absolute(z=round(z_backup_pos))
-            self.sample_pose.move_absolute(z=0)
-            self.log.debug(f"Stack Capture ending memory usage: {self.get_mem_consumption():.3f}%")
+            # Head back to the backlash reset position without waiting.
+            # The next stack (or tile transition) waits for it, and every
+            # approach to the start of a stack comes from there.
+            self.motion_planner.move(z=round(z_backup_pos))
+            self.motion_planner.start()
+            self.log.debug("Stack Capture ending memory usage: "
+                           f"{format_memory_sample(self.memory_sampler.latest())}")
 
         return stack_file_names
+
+    def _rewind_chunk(self, channel_count: int, chunk_start_index: int,
+                      frame_count: int, z_step_size_um: float,
+                      settings: AcquisitionSettings):
+        """Stop the stack and return the stage and camera to the first frame
+        of a chunk so the DAQ can replay its pulses.
+
+        :param channel_count: number of channels imaged per z step.
+        :param chunk_start_index: index of the chunk's first frame.
+        :param frame_count: number of frames in the whole stack.
+        :param z_step_size_um: spacing between each step.
+        :param settings: settings snapshot of the acquisition.
+        :return: the camera's dropped frame count after restarting it.
+        """
+        # Stop pulsing now; the rest of the chunk's frames are invalid.
+        self.ni.stop()
+        self.cam.stop()
+        # The frames of the chunk that already arrived are still queued.
+        self.cam.flush()
+        # Approach the chunk's start from below, as the stack approached 0.
+        chunk_start_pos = round(chunk_start_index * z_step_size_um * STEPS_PER_UM)
+        self.motion_planner.move(z=round(chunk_start_pos + self._z_backup_position(settings)))
+        self.motion_planner.start()
+        self.motion_planner.wait()
+        self.motion_planner.move(z=chunk_start_pos)
+        self.motion_planner.start()
+        self.motion_planner.wait()
+        remaining_frames = frame_count - chunk_start_index
+        self.sample_pose.setup_ext_trigger_linear_move('z', remaining_frames,
+                                                       z_step_size_um / 1.0e3)
+        self.cam.start(channel_count * remaining_frames, live=False)
+        return self._check_camera_acquisition_state(allow_drops=True)
+
+    def _z_backup_position(self, settings: AcquisitionSettings):
+        """z position [steps] that stacks approach their start from, so the
+        z backlash is always taken up in the same direction."""
+        return -STEPS_PER_UM * settings.stage_backlash_reset_dist_um
+
+    def _channel_affinity(self, channel: int,
+                          settings: AcquisitionSettings = None):
+        """Resolve a channel's affinity spec into CPU lists.
+
+        :param settings: settings snapshot to take the spec from. Taken from
+            the config if unspecified.
+        :return: dict with the 'writer', 'mip' and 'stats' CPUs to pin
+            processes to and the 'memory' CPUs to place chunk buffers from.
+            Each is None if unconstrained.
+        """
+        spec = self.cfg.get_channel_affinity(channel) if settings is None \
+            else settings.channel(channel).affinity
+        node = spec.get('numa_node', None)
+        node_cpus = numa_node_cpus(node) if node is not None else None
+        if node is not None and node_cpus is None:
+            self.log.warning(f"Cannot find CPUs of NUMA node {node} on this "
+                             f"platform; set writer_cpus and mip_cpus instead.")
+        writer_cpus = parse_cpu_list(spec.get('writer_cpus', None)) or node_cpus
+        mip_cpus = parse_cpu_list(spec.get('mip_cpus', None)) or node_cpus
+        stats_cpus = parse_cpu_list(spec.get('stats_cpus', None)) or node_cpus
+        return {'writer': writer_cpus,
+                'mip': mip_cpus,
+                'stats': stats_cpus,
+                'memory': node_cpus or writer_cpus}
+
+    def _join_mip_workers(self, settings: AcquisitionSettings = None):
+        """Wait for MIP processes to finish writing and release their shared
+        memory.
+
+        :param settings: settings snapshot the stacks were acquired with.
+            Focus alerts are taken from the config if unspecified.
+        """
+        for ch in list(self.mip_processes.keys()):
+            process = self.mip_processes.pop(ch)
+            if process.focus_sample_period:
+                self._check_focus(ch, process, settings)
+            if process.preview_level is not None:
+                preview = self._get_process_result(process, process.previews,
+                                                   "MIP preview")
+                if preview is not None:
+                    self._handle_mip_preview(ch, process.x_tile_num,
+                                             process.y_tile_num, preview)
+            process.join()
+            if process.exitcode == 0:
+                self._index_mips(ch, process)
+            self.mip_images.pop(ch, None)
+            shm = self.mip_images_shm.pop(ch, None)
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def _index_mips(self, channel: int, process: MIPProcessor):
+        """Append a finished tile's MIP files to the dataset's MIP index,
+        mip_index.csv, so viewers can find every tile's MIPs (and how many
+        pyramid levels they have) without listing the folder."""
+        index_path = Path(process.file_dest) / "mip_index.csv"
+        new_index = not index_path.exists()
+        shapes = process.mip_shapes()
+        with open(index_path, 'a', newline='') as index:
+            writer = csv.writer(index)
+            if new_index:
+                writer.writerow(['channel', 'tile_x', 'tile_y', 'projection',
+                                 'file', 'rows', 'columns', 'levels'])
+            for projection, path in process.mip_paths().items():
+                levels = pyramid_level_count(shapes[projection],
+                                             process.pyramid_min_size)
+                writer.writerow([channel, process.x_tile_num,
+                                 process.y_tile_num, projection, path.name,
+                                 *shapes[projection], levels + 1])
+
+    def _get_process_result(self, process, result_queue, description: str):
+        """Wait for a result from a child process, or return None if the
+        process exits without sending one."""
+        while True:
+            try:
+                return result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    self.log.error(f"No {description} from {process.name}.")
+                    return None
+
+    def _mip_preview_level(self, settings: AcquisitionSettings = None):
+        """Pyramid level of the XY MIP previews that MIP processes return,
+        or None if nothing needs them."""
+        if self.tile_registration is not None or self.mosaic is not None:
+            return self.cfg.mip_preview_level if settings is None \
+                else settings.mip_preview_level
+        return None
+
+    def _handle_mip_preview(self, channel: int, x: int, y: int, preview):
+        """Hand a tile's downsampled XY MIP to whatever consumes them."""
+        if self.tile_registration is not None:
+            self.tile_registration.add_tile(channel, x, y, preview)
+        if self.mosaic is not None and (x, y) in self.tile_positions_um:
+            self.mosaic.add_tile(channel, self.tile_positions_um[(x, y)], preview)
+
+    def _setup_tile_registration(self, tile_overlap_x_percent: float,
+                                 tile_overlap_y_percent: float,
+                                 deriv_storage_dir: Path):
+        """Create the registration job for one acquisition."""
+        invert_x, invert_y = self.cfg.registration_invert_axes
+        overlap_x_px = round(self.cfg.sensor_column_count * tile_overlap_x_percent / 100.)
+        overlap_y_px = round(self.cfg.sensor_row_count * tile_overlap_y_percent / 100.)
+        pixel_size_um = (self.cfg.tile_size_x_um / self.cfg.sensor_column_count,
+                         self.cfg.tile_size_y_um / self.cfg.sensor_row_count)
+        return TileRegistration(Path(deriv_storage_dir) / "tile_registration.csv",
+                                overlap_x_px, overlap_y_px,
+                                2**self.cfg.mip_preview_level, pixel_size_um,
+                                self.cfg.registration_min_quality,
+                                self.cfg.registration_max_offset_um,
+                                invert_x, invert_y)
+
+    def _setup_mosaic(self, xtiles: int, ytiles: int, x_grid_step_um: float,
+                      y_grid_step_um: float, deriv_storage_dir: Path):
+        """Create the overview mosaic for one acquisition. Tiles are
+        centered on stage positions from (0, 0) to the far corner of the
+        grid."""
+        invert_x, invert_y = self.cfg.registration_invert_axes
+        tile_size_um = (self.cfg.tile_size_x_um, self.cfg.tile_size_y_um)
+        scale = 2**self.cfg.mip_preview_level
+        pixel_size_um = (scale * self.cfg.tile_size_x_um / self.cfg.sensor_column_count,
+                         scale * self.cfg.tile_size_y_um / self.cfg.sensor_row_count)
+        return MosaicBuilder(deriv_storage_dir,
+                             (-tile_size_um[0] / 2, -tile_size_um[1] / 2),
+                             ((xtiles - 1) * x_grid_step_um + tile_size_um[0],
+                              (ytiles - 1) * y_grid_step_um + tile_size_um[1]),
+                             pixel_size_um, self.cfg.mosaic_max_pixels,
+                             invert_x, invert_y)
+
+    def get_mosaic(self, channel: int):
+        """Return a read-only view of the live overview mosaic of a channel,
+        or None if there isn't one. Also saved as mosaic_ch_<channel>.npy in
+        the derivatives folder."""
+        if self.mosaic is None:
+            return None
+        return self.mosaic.get_mosaic(channel)
+
+    def _check_focus(self, channel: int, process: MIPProcessor,
+                     settings: AcquisitionSettings = None):
+        """Record a finished stack's focus curve and flag the stack if it is
+        out of focus."""
+        curve = self._get_process_result(process, process.focus_results,
+                                         "focus curve")
+        tile = (process.x_tile_num, process.y_tile_num)
+        if curve is None or not curve['focus']:
+            return
+        median_focus = float(np.median(curve['focus']))
+        previous = [np.median(f) for _, f in self.focus_curves.get(channel, {}).values()]
+        self.focus_curves.setdefault(channel, {})[tile] = \
+            (curve['frames'], curve['focus'])
+        out_of_focus = False
+        min_focus = self.cfg.min_focus_metric if settings is None \
+            else settings.min_focus_metric
+        if min_focus is not None and median_focus < min_focus:
+            out_of_focus = True
+        drop_alert = self.cfg.focus_drop_alert if settings is None \
+            else settings.focus_drop_alert
+        if drop_alert is not None and previous \
+                and median_focus < drop_alert * np.median(previous):
+            out_of_focus = True
+        if out_of_focus:
+            self.log.warning(f"Tile {tile} {channel}[nm] channel may be out of "
+                             f"focus. Median focus: {median_focus:.4g}.")
+        self.log.info('focus', extra={'channel_name': str(channel),
+                                      'tile_x_index': tile[0],
+                                      'tile_y_index': tile[1],
+                                      'focus_median': median_focus,
+                                      'focus_min': float(np.min(curve['focus'])),
+                                      'focus_max': float(np.max(curve['focus'])),
+                                      'out_of_focus': out_of_focus,
+                                      'focus_file': curve['file'],
+                                      'tags': ['schema']})
+
+    def get_focus_curves(self, channel: int):
+        """Return {(x tile, y tile): (frame indices, focus values)} of every
+        stack acquired so far in a channel."""
+        return self.focus_curves.get(channel, {})
+
+    def _check_system_memory_resources(self, channel_count: int,
+                                       chunk_size: int, frame_count: int = 1):
+        """Make sure every allocation an acquisition makes fits in memory.
+
+        Logs an itemized budget and raises a MemoryError, suggesting the
+        largest chunk size that would fit, if the budget exceeds the
+        available memory (less some headroom) or the shared memory space.
+
+        :param channel_count: number of channels acquired in the same stack.
+        :param chunk_size: frames per compressor chunk.
+        :param frame_count: frames per stack.
+        """
+        gb = 1024**3
+        budget = acquisition_memory_budget(self.cfg, channel_count,
+                                           chunk_size, frame_count)
+        preallocated = PREALLOCATED_ITEMS
+        system = virtual_memory()
+        available_bytes = system.available - MEMORY_HEADROOM_FRACTION * system.total
+        required_bytes = sum(size for item, (size, _) in budget.items()
+                             if item not in preallocated)
+        shared_bytes = sum(size for size, shared in budget.values() if shared)
+        self.log.info(f"Memory budget for {channel_count} channel(s), "
+                      f"{chunk_size}-frame chunks, {frame_count}-frame stacks:")
+        for item, (size, shared) in budget.items():
+            notes = [note for note, applies in
+                     (("shared", shared), ("already allocated", item in preallocated))
+                     if applies]
+            notes = f" ({', '.join(notes)})" if notes else ""
+            self.log.info(f"  {item}: {size / gb:.2f}[GB]{notes}")
+        self.log.info(f"  total required: {required_bytes / gb:.2f}[GB] of "
+                      f"{available_bytes / gb:.2f}[GB] available.")
+        errors = []
+        if required_bytes > available_bytes:
+            errors.append(f"Acquisition requires {required_bytes / gb:.2f}[GB] "
+                          f"but only {available_bytes / gb:.2f}[GB] is available.")
+        shm_free_bytes = shared_memory_free_bytes()
+        if shm_free_bytes is not None and shared_bytes > shm_free_bytes:
+            errors.append(f"Shared buffers require {shared_bytes / gb:.2f}[GB] "
+                          f"but /dev/shm only has {shm_free_bytes / gb:.2f}[GB] free.")
+            available_bytes = min(available_bytes, shm_free_bytes)
+        if not errors:
+            return
+        hugepages = hugepage_pools()
+        if hugepages and hugepages['total_bytes']:
+            errors.append(f"{hugepages['total_bytes'] / gb:.2f}[GB] is reserved "
+                          f"as hugepages and can't be used for these buffers.")
+        suggested_chunk_size = largest_chunk_size(self.cfg, channel_count,
+                                                  frame_count, available_bytes,
+                                                  preallocated)
+        if suggested_chunk_size:
+            errors.append(f"The largest chunk size that fits is "
+                          f"{suggested_chunk_size}.")
+        else:
+            errors.append("No chunk size fits; reduce the image size or "
+                          "the egrabber frame buffer count.")
+        raise MemoryError(" ".join(errors))
+
     def _all_stack_workers_idle(self):
-        """Helper function. True if all StackWriters are idle."""
+        """Helper function. True if all StackWriters are idle.
+
+        Statistics processes aren't waited on; see :meth:`_cancel_busy_stats`.
+
+        :raises RuntimeError: if a StackWriter exited with an error, since it
+            will never take another chunk.
+        """
+        for ch, worker in self.stack_writer_workers.items():
+            if worker.exitcode not in (None, 0):
+                reason = getattr(worker, 'error', '') or \
+                    f"exitcode {worker.exitcode}"
+                raise RuntimeError(f"{ch}[nm] channel StackWriter failed: "
+                                   f"{reason}")
         return all([w.done_reading.is_set()
                     for _, w in self.stack_writer_workers.items()])
 
-    def _check_camera_acquisition_state(self):
-        """Get the current eGrabber state. Raise a runtime error if we drop frames."""
+    def _cancel_busy_stats(self):
+        """Drop the chunk of any statistics process that hasn't finished it,
+        since its buffer is about to be rewritten. Only waits for the slabs
+        already in flight."""
+        busy = [w for w in self.stats_workers.values()
+                if not w.done_reading.is_set()]
+        for worker in busy:
+            worker.cancel_chunk.set()
+        for worker in busy:
+            while not worker.done_reading.is_set() and worker.is_alive():
+                sleep(0.001)
+
+    def _check_intensity_stats(self, block: bool = False,
+                               settings: AcquisitionSettings = None):
+        """Log intensity statistics reported so far and warn about chunks
+        or tiles that cross the configured thresholds.
+
+        :param block: wait for every statistics process to report its tile
+            summary.
+        :param settings: settings snapshot to take the thresholds from.
+            Taken from the config if unspecified.
+        """
+        if settings is None:
+            saturated_alert = self.cfg.saturated_fraction_alert
+            min_mean = self.cfg.min_mean_alert_adu
+        else:
+            saturated_alert = settings.saturated_fraction_alert
+            min_mean = settings.min_mean_alert_adu
+        for ch, worker in self.stats_workers.items():
+            while True:
+                try:
+                    stats = worker.results.get(block=block, timeout=1.0)
+                except queue.Empty:
+                    if block and worker.is_alive():
+                        continue
+                    break
+                chunk = stats['chunk']
+                where = f"chunk {chunk}" if chunk is not None else "tile"
+                if stats.get('skipped', False):
+                    # Statistics fell behind the camera.
+                    self.log.warning(f"{ch}[nm] channel {where} intensity "
+                                     f"statistics were skipped.")
+                    if chunk is None:
+                        break
+                    continue
+                saturated_fraction = stats['saturated'] / stats['pixel_count']
+                if saturated_fraction > saturated_alert:
+                    self.log.warning(f"{ch}[nm] channel {where} is "
+                                     f"{100*saturated_fraction:.3f}% saturated.")
+                if min_mean is not None and stats['mean'] < min_mean:
+                    self.log.warning(f"{ch}[nm] channel {where} mean "
+                                     f"{stats['mean']:.1f} is below "
+                                     f"{min_mean}[ADU]. Is the tile empty?")
+                if chunk is None:
+                    self.contrast_limits[ch] = tuple(stats['contrast_limits'])
+                    self.log.info('intensity statistics',
+                                  extra={'channel_name': str(ch),
+                                         'tile_number': self.curr_tile_index,
+                                         'intensity_min': stats['min'],
+                                         'intensity_max': stats['max'],
+                                         'intensity_mean': stats['mean'],
+                                         'saturated_pixels': stats['saturated'],
+                                         'contrast_limits': stats['contrast_limits'],
+                                         'intensity_stats_file': stats['sidecar'],
+                                         'skipped_chunks': stats['skipped_chunks'],
+                                         'tags': ['schema']})
+                    break
+                self.log.debug("%s[nm] channel chunk %d: min %d, max %d, "
+                               "mean %.1f, %d saturated.", ch, chunk,
+                               stats['min'], stats['max'], stats['mean'],
+                               stats['saturated'])
+
+    def _join_stats_workers(self, capture_successful: bool,
+                            settings: AcquisitionSettings = None):
+        """Collect the final statistics and close the statistics processes."""
+        if capture_successful:
+            self._check_intensity_stats(block=True, settings=settings)
+        for ch in list(self.stats_workers.keys()):
+            worker = self.stats_workers.pop(ch)
+            worker.join(timeout=None if capture_successful else IMARIS_TIMEOUT_S)
+            if worker.is_alive():
+                worker.terminate()
+
+    def get_contrast_limits(self, channel: int):
+        """Display contrast limits (low, high) from the intensity histogram
+        of the channel's most recent tile, or None if there isn't one yet."""
+        return self.contrast_limits.get(channel, None)
+
+    def _check_camera_acquisition_state(self, allow_drops: bool = False):
+        """Get the current eGrabber state. Raise a runtime error if we drop
+        frames, unless `allow_drops` is set.
+
+        :return: the number of frames dropped since the camera started.
+        """
         state = self.cam.get_camera_acquisition_state()  # logs it.
-        if state['dropped_frames'] > 0:
+        if state['dropped_frames'] > 0 and not allow_drops:
             msg = "Acquisition loop has dropped a frame."
             self.log.error(msg)
             raise RuntimeError(msg)
+        return state['dropped_frames']
 
     def start_livestream(self, wavelength: list[int] = None, scout_mode: bool = False):
 
@@ -649,34 +1306,159 @@ class Exaspim(Spim):
         self.log.debug("Starting livestream.")
         self.log.warning(f"Turning on the {wavelength}[nm] laser.")
         self.scout_mode = scout_mode
+        self.live_frames.clear()  # Drop frames from a previous session.
         self._setup_waveform_hardware(wavelength, live=True)
         self.cam.start(live=True)
         self.ni.start()
         self.livestream_enabled.set()
         self.active_lasers = wavelength
         # Launch thread for picking up camera images.
+        self._start_live_view_worker()
+
+    def _start_live_view_worker(self):
+        """Start the live view producer thread if it isn't already running."""
+        with self.live_view_lock:
+            if self.live_view_worker is not None:
+                return  # Still running. It picks up the new mode on its own.
+            self.live_view_worker = Thread(target=self._live_view_worker,
+                                           daemon=True)
+            self.live_view_worker.start()
+
+    def _live_view_worker(self):
+        """Publish the newest downsampled frame per channel to
+        :attr:`live_frames` until livestreaming and acquisition both stop.
+
+        During livestream, frames are pulled from the camera on this thread.
+        During acquisition, the most recent frame is copied out of the chunk
+        buffer, so the downsampling happens outside of :attr:`chunk_lock`.
+        Frames are only copied and downsampled for channels whose mailbox
+        was read since their last frame, and are published in new arrays.
+        """
+        channel_id = 0
+        last_frame_index = None
+        while True:
+            with self.live_view_lock:
+                if not (self.livestream_enabled.is_set() or self.acquiring_images):
+                    self.live_view_worker = None
+                    return
+            try:
+                if self.acquiring_images:
+                    # Only copy out frames that we haven't published yet.
+                    frame_index = self.frame_index
+                    if frame_index == last_frame_index:
+                        sleep(LIVE_VIEW_POLL_S)
+                        continue
+                    last_frame_index = frame_index
+                    for ch in list(self.img_buffers.keys()):
+                        if not self._live_mailbox(ch).wanted:
+                            continue  # Nobody asked for a frame yet.
+                        frame = self._copy_latest_chunk_frame(ch)
+                        if frame is not None:
+                            self._publish_live_frame(ch, frame)
+                elif self.active_lasers:
+                    # Frames arrive in repeating channel order.
+                    channel_id %= len(self.active_lasers)
+                    ch = self.active_lasers[channel_id]
+                    channel_id += 1
+                    # Always grab to keep up with the camera, but only
+                    # copy and downsample frames that were asked for.
+                    frame = self.cam.grab_frame()
+                    if self._live_mailbox(ch).wanted:
+                        self._publish_live_frame(ch, frame.copy())
+                else:
+                    sleep(LIVE_VIEW_POLL_S)
+            except Exception:
+                # Camera/buffers may be torn down underneath us when stopping.
+                self.log.debug("Live view frame skipped.", exc_info=True)
+                sleep(LIVE_VIEW_POLL_S)
+
+    def _live_mailbox(self, channel: int):
+        """Return the live frame mailbox of a channel, creating it if needed."""
+        return self.live_frames.setdefault(channel, LatestFrameMailbox())
+
+    def _copy_latest_chunk_frame(self, channel: int):
+        """Copy the most recently captured frame of a channel out of its
+        chunk buffer into a new array, or return None if no frame is
+        available."""
+        settings = self.acquisition_settings or self.cfg
+        frame = np.empty((settings.sensor_row_count, settings.sensor_column_count),
+                         dtype=settings.image_dtype)
+        with self.chunk_lock:
+            img_buffer = self.img_buffers.get(channel, None)
+            chunk_index = self.prev_frame_chunk_index
+            if img_buffer is None or chunk_index is None or \
+                    self.deallocating.is_set():
+                return None
+            frame[:, :] = img_buffer.write_buf[chunk_index]
+        return frame
 
-    def _livestream_worker(self):
-        """Return the most recent acquisition image for display elsewhere.
-
-        :param channel: the channel to get the latest image for, or None,
-            if only one channel is being imaged.
+    def _publish_live_frame(self, channel: int, frame):
+        """Downsample a frame and make it the newest one for its channel.
 
-        :return: downsample pyramid of the most recent image.
+        :param frame: a frame that nothing else will modify. It is handed
+            over to the consumers.
         """
-        # Return a dummy image if none are available.
-        channel_id = 0
+        self._live_mailbox(channel).publish(self._live_pyramid(frame, channel))
+
+    def _live_pyramid(self, frame, channel: int = None):
+        """Downsample pyramid of `frame`, or only the live view region, in
+        arrays that are never reused. `frame` itself is level 0."""
+        region = self.live_view_region
+        if region is not None:
+            # Only compute the part of the frame that is being viewed.
+            roi, level = region
+            return [downsample_region(frame, roi, level)]
+        # Downsampler levels are recycled; copy them out for the consumers.
+        pyramid = self.downsampler.compute(frame, key=channel)
+        return [frame] + [level.copy() for level in pyramid[1:]]
+
+    def set_live_view_region(self, roi: tuple = None, level: int = None):
+        """Restrict live view frames to a region of the sensor.
+
+        While a region is set, :meth:`get_latest_image` returns a single-level
+        list holding only that region at the requested level instead of a
+        full downsample pyramid, so zooming in on a small area doesn't cost a
+        full-frame downsample every frame.
+
+        :param roi: (row_start, row_stop, col_start, col_stop) in full
+            resolution pixels, or None to go back to full-frame pyramids.
+        :param level: pyramid level (0 for full resolution). If None, pick
+            the finest level whose output is at most LIVE_VIEW_MAX_PIXELS.
+        :return: the (roi, level) actually served. The roi is clipped to the
+            sensor and snapped to the level's block grid.
+        """
+        if roi is None:
+            self.live_view_region = None
+            return None
+        if level is None:
+            pixels = (roi[1] - roi[0]) * (roi[3] - roi[2])
+            level = 0
+            while pixels / 4**level > LIVE_VIEW_MAX_PIXELS and \
+                    level < self.downsampler.downsample_levels:
+                level += 1
+        shape = (self.cfg.sensor_row_count, self.cfg.sensor_column_count)
+        self.live_view_region = (align_region(roi, level, shape), level)
+        return self.live_view_region
+
+    def _livestream_worker(self):
+        """Yield the newest (downsample pyramid, channel) for display
+        elsewhere as frames are published. Stale frames are skipped."""
         if self.scout_mode:
             sleep(self.cfg.get_channel_cycle_time(488)) # Hack
             self.ni.stop()
 
-        # while True:
-        #     if self.livestream_enabled.is_set() or self.acquiring_images and self.active_lasers is not None:
+        last_sequence = {}  # {channel: sequence number of the last yield}
         while self.livestream_enabled.is_set() or self.acquiring_images:
-            if self.active_lasers is not None:
-                channel_id = (channel_id + 1) % len(self.active_lasers) if len(self.active_lasers) != 1 else 0
-                yield self.get_latest_image(self.active_lasers[channel_id]), self.active_lasers[channel_id]
-            yield#sleep((1 / self.cfg.daq_obj_kwds['livestream_frequency_hz']))
+            new_frames = False
+            for channel, mailbox in list(self.live_frames.items()):
+                sequence, image = \
+                    mailbox.get_newer_than(last_sequence.get(channel, 0))
+                if image is not None:
+                    last_sequence[channel] = sequence
+                    new_frames = True
+                    yield image, channel
+            if not new_frames:
+                sleep(LIVE_VIEW_POLL_S)
 
 
 
@@ -708,43 +1490,49 @@ class Exaspim(Spim):
 
     def get_latest_image(self, channel: int = None):
         """Return the most recent acquisition image for display elsewhere.
+
+        This only reads the newest frame published by the live view thread,
+        so it is safe to call from any thread at any rate.
+
         :param channel: the channel to get the latest image for, or None,
             if only one channel is being imaged.
-        :return: downsample pyramid of the most recent image.
+        :return: downsample pyramid of the most recent image (or only the
+            live view region, see :meth:`set_live_view_region`) or None if no
+            image is available.
         """
-        img_buffer = self.img_buffers.get(channel, None)  # Not None during acquisition.
-
-        if img_buffer and self.prev_frame_chunk_index is not None and self.acquiring_images:
-            # Only access buffer if it isn't being toggled.
-            with self.chunk_lock:
-                self.log.debug('Calling downsample from get_latest_image')
-                try:
-                    return self.downsampler.compute(self.img_buffers[channel].write_buf[self.prev_frame_chunk_index])
-                except:
-                    return None
-
+        if channel is None and self.active_lasers:
+            channel = self.active_lasers[0]
+        mailbox = self.live_frames.get(channel, None)
+        if mailbox is not None and mailbox.sequence:
+            return mailbox.get()[1]
         # Return a dummy image if none are available.
-        if not img_buffer or self.prev_frame_chunk_index is None or not self.acquiring_images:
-            try:
-                if self.livestream_enabled.is_set():
-                    # return self.downsampler.compute(np.clip(self.cam.grab_frame()-self.bkg_image+100, 100, 2**16-1)-100)
-                    return self.downsampler.compute(self.cam.grab_frame())
-                elif self.simulated:
-                    # Display "white noise" if no image is available.
-                    return self.downsampler.compute(np.random.randint(0, 255, size=(self.cfg.sensor_row_count,
-                                                                                    self.cfg.sensor_column_count),
-                                                                      dtype=self.cfg.image_dtype))
-            except:
-                return None
+        if self.simulated and not self.livestream_enabled.is_set() \
+                and not self.acquiring_images:
+            # Display a synthetic specimen plane if no image is available.
+            return self._live_pyramid(self.specimen.frame(self.frame_index))
+        return None
+
+    def _shared_memory_bytes(self):
+        """Bytes of the chunk double buffers and MIP images currently
+        allocated in shared memory."""
+        chunk_bytes = sum(block.size for buffer in list(self.img_buffers.values())
+                          for block in buffer.mem_blocks)
+        mip_bytes = sum(shm.size for shm in list(self.mip_images_shm.values()))
+        return chunk_bytes + mip_bytes
 
     def get_mem_consumption(self):
         """get memory consumption as a percent for this process and all
-        child processes."""
-        current_process = Process(getpid())
-        mem = current_process.memory_percent()
-        for child in current_process.children(recursive=True):
-            mem += child.memory_percent()
-        return mem
+        child processes, with shared memory counted once.
+
+        Reads the latest background sample, so this is cheap to call from
+        the acquisition loop. Returns 0 until the first sample is taken.
+        """
+        sample = self.memory_sampler.latest()
+        return 0. if sample is None else sample['footprint_percent']
+
+    def get_memory_sample(self):
+        """get the latest detailed memory sample (see :class:`MemorySampler`)."""
+        return self.memory_sampler.latest()
 
     def close(self):
         """Safely close all open hardware connections."""
@@ -754,22 +1542,34 @@ class Exaspim(Spim):
 
         for ch_name, buf in self.img_buffers.items():
             buf.close_and_unlink()
+        self._join_mip_workers()
+        self.image_writer.close()
+        self.memory_sampler.close()
+        self.telemetry.close()
         self.ni.close()
         # TODO: power down hardware.
         super().close()  # Call this last.
 
     def log_stack_acquisition_params(self, curr_tile_index, stack_prefix,
-                                     z_step_size_um):
+                                     z_step_size_um,
+                                     settings: AcquisitionSettings = None):
         """helper function in main acquisition loop to log the current state
-        before capturing a stack of images per channel."""
+        before capturing a stack of images per channel.
+
+        :param settings: settings snapshot the stack is acquired with. Taken
+            from the config if unspecified.
+        """
+        if settings is None:
+            settings = AcquisitionSettings.from_config(self.cfg,
+                                                       self.active_lasers)
         for laser in self.active_lasers:
             tile_schema_params = \
                 {
                     'tile_number': curr_tile_index,
                     'file_name': f'{stack_prefix}_ch_{laser}.ims',
                     'coordinate_transformations': [
-                        {'scale': [self.cfg.tile_size_x_um / self.cfg.sensor_column_count,
-                                   self.cfg.tile_size_y_um / self.cfg.sensor_row_count,
+                        {'scale': [settings.x_voxel_size_um,
+                                   settings.y_voxel_size_um,
                                    z_step_size_um]},
                         {'translation': [self.stage_x_pos_um * 0.001,
                                          self.stage_y_pos_um * 0.001,
@@ -784,8 +1584,8 @@ class Exaspim(Spim):
                                 'detector_name': '',
                                 },
                     'channel_name': f'{laser}',
-                    'x_voxel_size': self.cfg.tile_size_x_um / self.cfg.sensor_column_count,
-                    'y_voxel_size': self.cfg.tile_size_y_um / self.cfg.sensor_row_count,
+                    'x_voxel_size': settings.x_voxel_size_um,
+                    'y_voxel_size': settings.y_voxel_size_um,
                     'z_voxel_size': z_step_size_um,
                     'voxel_size_units': 'micrometers',
                     'tile_x_position': self.stage_x_pos_um * 0.001,
@@ -802,14 +1602,22 @@ class Exaspim(Spim):
                     'tags': ['schema']
                 }
             self.log.info('tile data', extra=tile_schema_params)
-        # Log system states.
+        # Log system states from the latest telemetry. Values that haven't
+        # been read yet are logged as -1.
+        camera_temperatures = self.telemetry.latest_value('camera_temperatures', {})
+        # The ETL temperature isn't polled while acquiring, so it is the
+        # last reading from before the acquisition started.
+        etl_time, etl_temperature = self.telemetry.latest('etl_temperature',
+                                                          (None, -1))
         system_schema_data = \
             {
-                'etl_temperature': -1, # self.tigerbox.get_etl_temp('V'),  # FIXME: this is hardcoded as V axis
+                'etl_temperature': etl_temperature,
                 'etl_temperature_units': 'C',
-                'camera_board_temperature': self.cam.get_mainboard_temperature(),
+                'etl_temperature_age_s': -1 if etl_time is None else time() - etl_time,
+                'etl_temperature_stale': True,  # not refreshed during acquisition.
+                'camera_board_temperature': camera_temperatures.get('mainboard', -1),
                 'camera_board_temperature_units': 'C',
-                'sensor_temperature': self.cam.get_sensor_temperature(),
+                'sensor_temperature': camera_temperatures.get('sensor', -1),
                 'sensor_temperature_units': 'C',
                 'tags': ['schema']
             }
@@ -820,12 +1628,13 @@ class Exaspim(Spim):
         self.log.info('system state', extra=system_schema_data)
         # Log settings per laser channel.
         for laser in self.active_lasers:
+            waveform_specs = settings.channel(laser).waveform_specs
             laser = str(laser)
-            for key in self.cfg.channel_specs[laser]['etl']:
-                settings_schema_data[f'daq_etl {key}'] = f'{self.cfg.channel_specs[laser]["etl"][key]}'
-            for key in self.cfg.channel_specs[laser]['galvo_a']:
-                settings_schema_data[f'daq_galvo_a {key}'] = f'{self.cfg.channel_specs[laser]["galvo_a"][key]}'
-            for key in self.cfg.channel_specs[laser]['galvo_b']:
-                settings_schema_data[f'daq_galvo_b {key}'] = f'{self.cfg.channel_specs[laser]["galvo_b"][key]}'
+            for key in waveform_specs['etl']:
+                settings_schema_data[f'daq_etl {key}'] = f'{waveform_specs["etl"][key]}'
+            for key in waveform_specs['galvo_a']:
+                settings_schema_data[f'daq_galvo_a {key}'] = f'{waveform_specs["galvo_a"][key]}'
+            for key in waveform_specs['galvo_b']:
+                settings_schema_data[f'daq_galvo_b {key}'] = f'{waveform_specs["galvo_b"][key]}'
             self.log.info(f'laser channel {laser} acquisition settings',
                           extra=settings_schema_data)
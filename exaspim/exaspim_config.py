@@ -20,6 +20,14 @@ class ExaspimConfig(SpimConfig):
         self.stage_specs = self.cfg['sample_stage_specs']
         self.channel_specs = self.cfg['channel_specs']
         self.camera_specs = self.cfg['camera_specs']
+        self.aux_image_specs = self.cfg.setdefault('aux_image_specs', {})
+        self.telemetry_specs = self.cfg.setdefault('telemetry_specs', {})
+        self.affinity_specs = self.cfg.setdefault('affinity_specs', {})
+        self.statistics_specs = self.cfg.setdefault('statistics_specs', {})
+        self.focus_specs = self.cfg.setdefault('focus_specs', {})
+        self.registration_specs = self.cfg.setdefault('registration_specs', {})
+        self.mosaic_specs = self.cfg.setdefault('mosaic_specs', {})
+        self.recovery_specs = self.cfg.setdefault('recovery_specs', {})
 
         # Keyword arguments for instantiating objects.
         self.joystick_kwds = self.cfg['joystick_kwds']
@@ -224,6 +232,20 @@ class ExaspimConfig(SpimConfig):
     def compressor_style(self):
         return self.compressor_specs['compression_style']
 
+    @property
+    def compressor_remote_address(self):
+        """(host, port) of a StackWriterServer to compress stacks on, or
+        None to compress them on this PC."""
+        address = self.compressor_specs.get('remote_address', None)
+        if not address:
+            return None
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+
+    @compressor_remote_address.setter
+    def compressor_remote_address(self, address: str):
+        self.compressor_specs['remote_address'] = address
+
     @property
     def compressor_thread_count(self):
         return self.compressor_specs['compressor_thread_count']
@@ -233,6 +255,279 @@ class ExaspimConfig(SpimConfig):
         """number of images in a chunk to be compressed at a time."""
         return self.compressor_specs['image_stack_chunk_size']
 
+    # Auxiliary Image Specs
+    @property
+    def aux_image_compression(self):
+        """TIFF compression for background and MIP images or None."""
+        compression = self.aux_image_specs.get('compression', None)
+        return None if str(compression).lower() == 'none' else compression
+
+    @aux_image_compression.setter
+    def aux_image_compression(self, compression: str):
+        self.aux_image_specs['compression'] = str(compression)
+
+    @property
+    def mip_pyramid_min_size(self):
+        """Write MIPs as pyramidal OME-TIFFs, halving the resolution until
+        the shorter side would drop below this. 0 for single resolution."""
+        return self.aux_image_specs.get('pyramid_min_size', 256)
+
+    @mip_pyramid_min_size.setter
+    def mip_pyramid_min_size(self, size: int):
+        self.aux_image_specs['pyramid_min_size'] = size
+
+    @property
+    def aux_image_queue_size(self):
+        """Max images waiting to be written before the writer blocks."""
+        return self.aux_image_specs.get('queue_size', 4)
+
+    @aux_image_queue_size.setter
+    def aux_image_queue_size(self, size: int):
+        self.aux_image_specs['queue_size'] = size
+
+    # Telemetry Specs
+    @property
+    def camera_telemetry_period_s(self):
+        """Time between camera temperature reads."""
+        return self.telemetry_specs.get('camera_period_s', 10.)
+
+    @camera_telemetry_period_s.setter
+    def camera_telemetry_period_s(self, seconds: float):
+        self.telemetry_specs['camera_period_s'] = seconds
+
+    @property
+    def stage_telemetry_period_s(self):
+        """Time between stage (ETL temperature) reads. The stage is only
+        queried between acquisitions."""
+        return self.telemetry_specs.get('stage_period_s', 30.)
+
+    @stage_telemetry_period_s.setter
+    def stage_telemetry_period_s(self, seconds: float):
+        self.telemetry_specs['stage_period_s'] = seconds
+
+    @property
+    def daq_telemetry_period_s(self):
+        """Time between DAQ task state reads."""
+        return self.telemetry_specs.get('daq_period_s', 1.)
+
+    @daq_telemetry_period_s.setter
+    def daq_telemetry_period_s(self, seconds: float):
+        self.telemetry_specs['daq_period_s'] = seconds
+
+    @property
+    def telemetry_history_length(self):
+        """Samples of each telemetry channel to keep."""
+        return self.telemetry_specs.get('history_length', 1000)
+
+    @telemetry_history_length.setter
+    def telemetry_history_length(self, length: int):
+        self.telemetry_specs['history_length'] = length
+
+    # Affinity Specs
+    @property
+    def acquisition_cpus(self):
+        """CPUs (list or "0-3,8" string) to pin the acquisition loop to, or
+        None to let it run on any CPU."""
+        return self.affinity_specs.get('acquisition_cpus', None)
+
+    @acquisition_cpus.setter
+    def acquisition_cpus(self, cpus):
+        self.affinity_specs['acquisition_cpus'] = cpus
+
+    def get_channel_affinity(self, wavelength: int):
+        """Returns the affinity spec of a channel: a dict with optional
+        'numa_node', 'writer_cpus', 'mip_cpus' and 'stats_cpus' keys."""
+        return self.affinity_specs.get('channels', {}).get(str(wavelength), {})
+
+    # Statistics Specs
+    @property
+    def intensity_stats_enabled(self):
+        """True to compute intensity statistics of every chunk."""
+        return self.statistics_specs.get('enabled', True)
+
+    @intensity_stats_enabled.setter
+    def intensity_stats_enabled(self, enabled: bool):
+        self.statistics_specs['enabled'] = enabled
+
+    @property
+    def intensity_stats_thread_count(self):
+        """Threads each channel's statistics process splits a chunk across."""
+        return self.statistics_specs.get('thread_count', 4)
+
+    @intensity_stats_thread_count.setter
+    def intensity_stats_thread_count(self, count: int):
+        self.statistics_specs['thread_count'] = count
+
+    @property
+    def saturation_adu(self):
+        """Pixel value at or above which a pixel counts as saturated.
+        Defaults to full scale of 14-bit samples MSB-aligned in 16 bits."""
+        return self.statistics_specs.get('saturation_adu', 0xFFFC)
+
+    @saturation_adu.setter
+    def saturation_adu(self, value: int):
+        self.statistics_specs['saturation_adu'] = value
+
+    @property
+    def histogram_stride(self):
+        """Histogram every this many rows and columns of each frame. Other
+        statistics always use every pixel."""
+        return self.statistics_specs.get('histogram_stride', 4)
+
+    @histogram_stride.setter
+    def histogram_stride(self, stride: int):
+        self.statistics_specs['histogram_stride'] = stride
+
+    @property
+    def saturated_fraction_alert(self):
+        """Warn if more than this fraction of a chunk's pixels saturate."""
+        return self.statistics_specs.get('saturated_fraction_alert', 1.0e-4)
+
+    @saturated_fraction_alert.setter
+    def saturated_fraction_alert(self, fraction: float):
+        self.statistics_specs['saturated_fraction_alert'] = fraction
+
+    @property
+    def min_mean_alert_adu(self):
+        """Warn if a chunk's mean falls below this (i.e: an empty tile), or
+        None to disable."""
+        return self.statistics_specs.get('min_mean_alert_adu', None)
+
+    @min_mean_alert_adu.setter
+    def min_mean_alert_adu(self, value: float):
+        self.statistics_specs['min_mean_alert_adu'] = value
+
+    @property
+    def contrast_percentiles(self):
+        """(low, high) histogram percentiles used as display contrast limits."""
+        return self.statistics_specs.get('contrast_percentiles', [0.1, 99.9])
+
+    @contrast_percentiles.setter
+    def contrast_percentiles(self, percentiles: list[float]):
+        self.statistics_specs['contrast_percentiles'] = list(percentiles)
+
+    # Focus Specs
+    @property
+    def focus_sample_period(self):
+        """Score the focus of every this many frames, or 0 to disable."""
+        return self.focus_specs.get('sample_period', 16)
+
+    @focus_sample_period.setter
+    def focus_sample_period(self, period: int):
+        self.focus_specs['sample_period'] = period
+
+    @property
+    def focus_downsample(self):
+        """Score focus on every this many rows and columns of a frame."""
+        return self.focus_specs.get('downsample', 4)
+
+    @focus_downsample.setter
+    def focus_downsample(self, step: int):
+        self.focus_specs['downsample'] = step
+
+    @property
+    def min_focus_metric(self):
+        """Flag stacks whose median focus is below this, or None."""
+        return self.focus_specs.get('min_focus', None)
+
+    @min_focus_metric.setter
+    def min_focus_metric(self, value: float):
+        self.focus_specs['min_focus'] = value
+
+    @property
+    def focus_drop_alert(self):
+        """Flag stacks whose median focus is below this fraction of the
+        channel's median over previous stacks, or None."""
+        return self.focus_specs.get('drop_alert', 0.5)
+
+    @focus_drop_alert.setter
+    def focus_drop_alert(self, fraction: float):
+        self.focus_specs['drop_alert'] = fraction
+
+    # Registration Specs
+    @property
+    def tile_registration_enabled(self):
+        """True to register adjacent tiles from their MIPs during acquisition."""
+        return self.registration_specs.get('enabled', True)
+
+    @tile_registration_enabled.setter
+    def tile_registration_enabled(self, enabled: bool):
+        self.registration_specs['enabled'] = enabled
+
+    @property
+    def mip_preview_level(self):
+        """Pyramid level of the XY MIPs used for registration (3 = 8x
+        downsampled)."""
+        return self.registration_specs.get('preview_level', 3)
+
+    @mip_preview_level.setter
+    def mip_preview_level(self, level: int):
+        self.registration_specs['preview_level'] = level
+
+    @property
+    def registration_min_quality(self):
+        """Correlation peak height below which offsets aren't trusted."""
+        return self.registration_specs.get('min_quality', 0.05)
+
+    @registration_min_quality.setter
+    def registration_min_quality(self, quality: float):
+        self.registration_specs['min_quality'] = quality
+
+    @property
+    def registration_max_offset_um(self):
+        """Warn when adjacent tiles are further than this from the grid."""
+        return self.registration_specs.get('max_offset_um', 20.)
+
+    @registration_max_offset_um.setter
+    def registration_max_offset_um(self, offset_um: float):
+        self.registration_specs['max_offset_um'] = offset_um
+
+    @property
+    def registration_invert_axes(self):
+        """(x, y) flags. True if image columns (x) or rows (y) increase
+        opposite to the stage axis."""
+        return (self.registration_specs.get('invert_x', False),
+                self.registration_specs.get('invert_y', False))
+
+    # Mosaic Specs
+    @property
+    def mosaic_enabled(self):
+        """True to build a live overview mosaic from the XY MIPs."""
+        return self.mosaic_specs.get('enabled', True)
+
+    @mosaic_enabled.setter
+    def mosaic_enabled(self, enabled: bool):
+        self.mosaic_specs['enabled'] = enabled
+
+    @property
+    def mosaic_max_pixels(self):
+        """Upper bound on the pixels of each channel's mosaic."""
+        return self.mosaic_specs.get('max_pixels', 100_000_000)
+
+    @mosaic_max_pixels.setter
+    def mosaic_max_pixels(self, pixels: int):
+        self.mosaic_specs['max_pixels'] = pixels
+
+    # Recovery Specs
+    @property
+    def chunk_retry_limit(self):
+        """Times a chunk is reacquired after dropped frames before the stack
+        is aborted. 0 aborts on the first dropped frame."""
+        return self.recovery_specs.get('chunk_retry_limit', 3)
+
+    @chunk_retry_limit.setter
+    def chunk_retry_limit(self, retries: int):
+        self.recovery_specs['chunk_retry_limit'] = retries
+
+    @property
+    def frame_timeout_s(self):
+        """Time to wait for a frame before checking whether it was dropped."""
+        return self.recovery_specs.get('frame_timeout_s', 10.)
+
+    @frame_timeout_s.setter
+    def frame_timeout_s(self, seconds: float):
+        self.recovery_specs['frame_timeout_s'] = seconds
+
     # @property
     # def memento_path(self) -> Path:
     #     return Path(self.compressor_specs['memento_executable_path'])
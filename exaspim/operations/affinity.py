@@ -0,0 +1,124 @@
+"""Pin processes and threads to CPUs and place memory on NUMA nodes."""
+
+import logging
+import numpy as np
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Thread
+from psutil import Process
+
+log = logging.getLogger(__name__)
+
+NUMA_SYSFS_PATH = Path("/sys/devices/system/node")
+PAGE_BYTES = 4096
+
+
+def parse_cpu_list(cpus):
+    """Turn a cpu spec into a sorted list of cpu indices.
+
+    :param cpus: None, a list of ints, or a string in the kernel's cpulist
+        format, i.e: "0-3,8,10-11".
+    """
+    if cpus is None:
+        return None
+    if isinstance(cpus, str):
+        indices = []
+        for part in cpus.replace(" ", "").split(","):
+            if not part:
+                continue
+            start, _, stop = part.partition("-")
+            indices.extend(range(int(start), int(stop or start) + 1))
+        cpus = indices
+    return sorted(set(int(cpu) for cpu in cpus))
+
+
+def numa_node_count():
+    """Number of NUMA nodes, or 1 if the platform doesn't report them."""
+    if not NUMA_SYSFS_PATH.is_dir():
+        return 1
+    return max(1, len(list(NUMA_SYSFS_PATH.glob("node[0-9]*"))))
+
+
+def numa_node_cpus(node: int):
+    """CPUs belonging to a NUMA node, or None if unknown on this platform."""
+    cpulist_path = NUMA_SYSFS_PATH / f"node{node}" / "cpulist"
+    if not cpulist_path.exists():
+        return None
+    return parse_cpu_list(cpulist_path.read_text().strip())
+
+
+def set_process_affinity(cpus: list[int], pid: int = None):
+    """Restrict a process (default: this one) to `cpus`. Threads it creates
+    afterwards, i.e: ImarisWriter's compression threads, inherit this."""
+    if not cpus:
+        return
+    Process(pid).cpu_affinity(list(cpus))
+
+
+def get_thread_affinity():
+    """CPUs the calling thread may run on, or None if unsupported."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))  # 0 is the calling thread.
+    return None
+
+
+def set_thread_affinity(cpus: list[int]):
+    """Restrict only the calling thread to `cpus`.
+
+    :return: the previous affinity, to pass back in to restore it, or None
+        if thread affinity isn't supported on this platform.
+    """
+    if not cpus:
+        return None
+    if hasattr(os, "sched_setaffinity"):  # Linux
+        previous = get_thread_affinity()
+        os.sched_setaffinity(0, cpus)
+        return previous
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        # Masks only address the thread's processor group (64 cpus).
+        mask = sum(1 << cpu for cpu in cpus if cpu < 64)
+        previous_mask = kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask)
+        if not previous_mask:
+            raise OSError(ctypes.get_last_error(), "SetThreadAffinityMask failed.")
+        return [cpu for cpu in range(64) if previous_mask >> cpu & 1]
+    log.warning("Thread affinity is not supported on this platform.")
+    return None
+
+
+@contextmanager
+def pinned_thread(cpus: list[int]):
+    """Run the enclosed code with the calling thread pinned to `cpus`."""
+    previous = set_thread_affinity(cpus)
+    try:
+        yield
+    finally:
+        if previous is not None:
+            set_thread_affinity(previous)
+
+
+def first_touch(array: np.ndarray, cpus: list[int]):
+    """Fault in every page of `array` from a thread pinned to `cpus`.
+
+    Both Linux and Windows place a page on the NUMA node of the CPU that
+    first touches it, so this places freshly allocated (i.e: shared) memory
+    on the node that `cpus` belong to. Call before anything else writes to
+    the array.
+    """
+    if not cpus:
+        return
+
+    def touch():
+        set_thread_affinity(cpus)
+        pages = array.reshape(-1).view(np.uint8)
+        pages[::PAGE_BYTES] = 0
+
+    worker = Thread(target=touch, daemon=True)
+    worker.start()
+    worker.join()
@@ -0,0 +1,107 @@
+"""Work out the least hardware reconfiguration that applies a config change."""
+
+# Actions, in the order they are applied.
+CAMERA = 'camera'  # reconfigure the camera from scratch.
+CAMERA_EXPOSURE = 'camera_exposure'  # write the camera's ExposureTime.
+CAMERA_GAIN = 'camera_gain'  # write the camera's Gain.
+JOYSTICK = 'joystick'  # rebind the stage axes to the joystick.
+FOCUS = 'focus'  # move the focus axis to the live channel's position.
+WAVEFORMS = 'waveforms'  # regenerate and rewrite the DAQ waveforms.
+RESTART = 'restart'  # drivers are built on startup; only a restart applies it.
+ACTION_ORDER = (CAMERA, CAMERA_EXPOSURE, CAMERA_GAIN, JOYSTICK, FOCUS,
+                WAVEFORMS, RESTART)
+
+# (key path pattern, actions) rules. The first pattern that is a prefix of a
+# changed key path decides its actions; '*' matches any single key. Keys that
+# are only read when an acquisition starts need no action.
+CONFIG_ACTIONS = [
+    (('camera_specs', 'digital_gain_adu'), (CAMERA_GAIN,)),
+    # Line interval and slit width set the exposure (rolling shutter dwell)
+    # and the ETL sweep/laser timing.
+    (('camera_specs', 'line_interval_us'), (CAMERA_EXPOSURE, WAVEFORMS)),
+    (('design_specs', 'slit_width_pixels'), (CAMERA_EXPOSURE, WAVEFORMS)),
+    (('camera_specs',), (CAMERA,)),
+    (('tile_specs', 'row_count_pixels'), (CAMERA, WAVEFORMS)),
+    (('tile_specs', 'column_count_pixels'), (CAMERA,)),
+    (('tile_specs',), ()),
+    (('waveform_specs',), (WAVEFORMS,)),
+    (('channel_specs', '*', 'focus'), (FOCUS,)),
+    (('channel_specs', '*', 'hex_color'), ()),
+    (('channel_specs', '*', 'driver'), (RESTART,)),
+    (('channel_specs', '*', 'module'), (RESTART,)),
+    (('channel_specs', '*', 'kwds'), (RESTART,)),
+    (('channel_specs',), (WAVEFORMS,)),
+    (('joystick_kwds',), (JOYSTICK,)),
+    (('daq_driver_kwds',), (RESTART,)),
+    (('tiger_controller_driver_kwds',), (RESTART,)),
+    (('sample_pose_kwds',), (RESTART,)),
+    (('telemetry_specs',), (RESTART,)),
+    (('imaging_specs',), ()),
+    (('experiment_specs',), ()),
+    (('compressor_specs',), ()),
+    (('file_transfer_specs',), ()),
+    (('sample_stage_specs',), ()),
+    (('aux_image_specs',), ()),
+    (('affinity_specs',), ()),
+    (('statistics_specs',), ()),
+    (('focus_specs',), ()),
+    (('registration_specs',), ()),
+    (('mosaic_specs',), ()),
+    (('recovery_specs',), ()),
+    (('estimates',), ()),
+]
+# Anything we don't know about gets the full reconfiguration.
+DEFAULT_ACTIONS = (CAMERA, WAVEFORMS)
+
+
+def flatten_config(cfg: dict, prefix: tuple = ()):
+    """Flatten nested dicts into {(key, subkey, ...): value}.
+
+    Lists and other values are leaves.
+    """
+    flat = {}
+    for key, value in cfg.items():
+        path = prefix + (str(key),)
+        if isinstance(value, dict) and value:
+            flat.update(flatten_config(value, path))
+        else:
+            flat[path] = value
+    return flat
+
+
+def diff_config(old: dict, new: dict):
+    """Return the sorted key paths that were added, removed or changed."""
+    old_flat = flatten_config(old)
+    new_flat = flatten_config(new)
+    missing = object()
+    return sorted(path for path in old_flat.keys() | new_flat.keys()
+                  if old_flat.get(path, missing) != new_flat.get(path, missing))
+
+
+def _matches(pattern: tuple, path: tuple):
+    return len(path) >= len(pattern) and \
+        all(p == '*' or p == k for p, k in zip(pattern, path))
+
+
+def key_actions(path: tuple):
+    """The actions that apply a change to one key path."""
+    for pattern, actions in CONFIG_ACTIONS:
+        if _matches(pattern, path):
+            return actions
+    return DEFAULT_ACTIONS
+
+
+def plan_config_actions(changed_paths: list):
+    """Return {action: [key paths that need it]} in :data:`ACTION_ORDER`.
+
+    A full camera reconfiguration also writes the exposure and gain, so
+    those are folded into it.
+    """
+    plan = {}
+    for path in changed_paths:
+        for action in key_actions(path):
+            plan.setdefault(action, []).append(path)
+    if CAMERA in plan:
+        for action in (CAMERA_EXPOSURE, CAMERA_GAIN):
+            plan[CAMERA].extend(plan.pop(action, []))
+    return {action: plan[action] for action in ACTION_ORDER if action in plan}
@@ -0,0 +1,169 @@
+"""Downsample Operation implemented on the CPU to shrink images for display."""
+
+import numpy as np
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+
+
+class DownSampleCPU:
+    """Drop-in CPU replacement for :class:`DownSample`.
+
+    Each level is a 2x2 block mean of the previous one computed with
+    vectorized reshape-reductions into a wider integer accumulator. Rows are
+    split across a thread pool (numpy releases the GIL), and output arrays
+    are allocated once per image shape and key and reused on subsequent
+    calls.
+
+    Note: pyramids are recycled per (image shape, dtype, `key`). A returned
+    pyramid is valid until `pyramid_count` more calls to :meth:`compute`
+    have been made with the same key, so callers interleaving several
+    streams (i.e: channels) pass each its own key. Calls from several
+    threads are serialized, since they share the accumulators.
+    """
+
+    def __init__(self, thread_count: int = None, pyramid_count: int = 2):
+        """Init.
+
+        :param thread_count: threads to split each level across. Defaults to
+            the number of CPUs.
+        :param pyramid_count: number of preallocated pyramids to rotate
+            through so that the previous result stays valid while the next
+            one is being computed.
+        """
+        self.downsample_factor = 2
+        self.downsample_levels = 5
+        self.thread_count = thread_count or cpu_count() or 1
+        self.pyramid_count = pyramid_count
+        self.pool = ThreadPoolExecutor(max_workers=self.thread_count)
+        self._pyramids = {}  # {(shape, dtype, key): [[level1, ...], ...]}
+        self._pyramid_index = {}  # {(shape, dtype, key): next pyramid}
+        self._accumulators = {}  # {(shape, dtype): [level1, ...]}
+        self.lock = Lock()
+
+    @staticmethod
+    def _accumulator_dtype(dtype: np.dtype):
+        """Integer-safe dtype to sum 4 pixels of `dtype` without overflow."""
+        dtype = np.dtype(dtype)
+        if dtype.kind == 'u':
+            return np.uint32 if dtype.itemsize <= 2 else np.uint64
+        if dtype.kind == 'i':
+            return np.int32 if dtype.itemsize <= 2 else np.int64
+        return np.float64
+
+    def _level_shapes(self, shape: tuple):
+        level_shapes = []
+        for level in range(self.downsample_levels):
+            shape = tuple(s // self.downsample_factor for s in shape)
+            level_shapes.append(shape)
+        return level_shapes
+
+    def _allocate(self, shape: tuple, dtype: np.dtype, key=None):
+        """Allocate output pyramids for an image shape and key, and the
+        accumulators for the shape if needed."""
+        level_shapes = self._level_shapes(shape)
+        self._pyramids[(shape, np.dtype(dtype), key)] = \
+            [[np.empty(s, dtype=dtype) for s in level_shapes]
+             for _ in range(self.pyramid_count)]
+        self._pyramid_index[(shape, np.dtype(dtype), key)] = 0
+        if (shape, np.dtype(dtype)) not in self._accumulators:
+            acc_dtype = self._accumulator_dtype(dtype)
+            self._accumulators[(shape, np.dtype(dtype))] = \
+                [np.empty(s, dtype=acc_dtype) for s in level_shapes]
+
+    def _downsample_rows(self, image, acc, out, row_start, row_end):
+        """2x block mean of output rows [row_start, row_end)."""
+        f = self.downsample_factor
+        cols = out.shape[1]
+        block = image[row_start*f:row_end*f, :cols*f]
+        block = block.reshape(row_end - row_start, f, cols, f)
+        acc = acc[row_start:row_end]
+        # Sum the f*f strided views of each block. This is much faster than
+        # np.sum over two axes and needs no scratch memory.
+        np.add(block[:, 0, :, 0], block[:, 1, :, 0], out=acc, dtype=acc.dtype)
+        np.add(acc, block[:, 0, :, 1], out=acc)
+        np.add(acc, block[:, 1, :, 1], out=acc)
+        # Truncate like the GPU kernel does.
+        np.floor_divide(acc, f * f, out=out[row_start:row_end], casting='unsafe')
+
+    def _downsample(self, image, acc, out):
+        """2x block mean of `image` into `out` split across the thread pool."""
+        rows = out.shape[0]
+        step = max(1, -(-rows // self.thread_count))
+        futures = [self.pool.submit(self._downsample_rows, image, acc, out,
+                                    start, min(start + step, rows))
+                   for start in range(0, rows, step)]
+        for future in futures:
+            future.result()
+
+    def compute(self, image, key=None):
+        """Return [image, level1, ...], each level half the size of the last.
+
+        :param image: 2D image.
+        :param key: hashable id of the stream the image belongs to (i.e: its
+            channel). Pyramids are recycled per key.
+        """
+        pyramid_key = (image.shape, image.dtype, key)
+        with self.lock:
+            if pyramid_key not in self._pyramids:
+                self._allocate(image.shape, image.dtype, key)
+            index = self._pyramid_index[pyramid_key]
+            levels = self._pyramids[pyramid_key][index]
+            self._pyramid_index[pyramid_key] = (index + 1) % self.pyramid_count
+            pyramid = []
+            pyramid.append(image)
+            for acc, out in zip(self._accumulators[(image.shape, image.dtype)],
+                                levels):
+                self._downsample(image, acc, out)
+                image = out
+                pyramid.append(image)
+
+        return pyramid
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+def align_region(roi: tuple, level: int, shape: tuple):
+    """Clip a region to an image and snap it to the block grid of a level.
+
+    :param roi: (row_start, row_stop, col_start, col_stop) in full
+        resolution pixels.
+    :param level: pyramid level. Each level halves the resolution.
+    :param shape: full resolution (rows, cols) of the image.
+    :return: the aligned (row_start, row_stop, col_start, col_stop).
+    """
+    f = 2**level
+    row_start, row_stop, col_start, col_stop = roi
+    row_start = max(0, row_start) // f * f
+    col_start = max(0, col_start) // f * f
+    row_stop = min(shape[0], row_stop) // f * f
+    col_stop = min(shape[1], col_stop) // f * f
+    if row_stop <= row_start or col_stop <= col_start:
+        raise ValueError(f"Region {roi} is empty at level {level} for an "
+                         f"image of shape {shape}.")
+    return row_start, row_stop, col_start, col_stop
+
+
+def downsample_region(image, roi: tuple, level: int):
+    """Return only the `roi` crop of `image` at pyramid `level`.
+
+    Each output pixel is the mean of its 2**level x 2**level block, which
+    only touches the pixels inside the region instead of the whole frame.
+
+    :param image: full resolution 2D image.
+    :param roi: region aligned with :func:`align_region`.
+    :param level: pyramid level. Level 0 returns full resolution pixels.
+    """
+    row_start, row_stop, col_start, col_stop = roi
+    crop = image[row_start:row_stop, col_start:col_stop]
+    if level == 0:
+        return crop.copy()
+    f = 2**level
+    rows = (row_stop - row_start) // f
+    cols = (col_stop - col_start) // f
+    acc_dtype = DownSampleCPU._accumulator_dtype(image.dtype)
+    # Even 32x32 blocks of 16-bit pixels fit in a 32-bit accumulator.
+    acc = crop.reshape(rows, f, cols, f).sum(axis=3, dtype=acc_dtype)
+    acc = acc.sum(axis=1, dtype=acc_dtype)
+    return (acc // (f * f)).astype(image.dtype)
@@ -0,0 +1,35 @@
+"""Compare camera feature snapshots so only changes need to be logged."""
+
+MISSING = object()  # Placeholder for features absent from a snapshot.
+
+
+def diff_feature_snapshots(previous: dict, snapshot: dict):
+    """Compare two {module: {feature: value}} snapshots.
+
+    :param previous: the earlier snapshot, or None if there isn't one.
+    :param snapshot: the current snapshot.
+    :return: ({module: {feature: value}} of features that are new or whose
+        value changed, {module: [feature, ...]} of features that are no
+        longer in the snapshot). Every feature counts as new if `previous`
+        is None. Modules without entries are left out.
+    """
+    previous = {} if previous is None else previous
+    changed = {module: {feature: value for feature, value in values.items()
+                        if previous.get(module, {}).get(feature, MISSING) != value}
+               for module, values in snapshot.items()}
+    removed = {module: [feature for feature in values
+                        if feature not in snapshot.get(module, {})]
+               for module, values in previous.items()}
+    return ({module: values for module, values in changed.items() if values},
+            {module: features for module, features in removed.items() if features})
+
+
+def log_feature_changes(log, previous: dict, snapshot: dict):
+    """Log the features of `snapshot` that changed since `previous` as one
+    schema record. Every feature is logged if `previous` is None."""
+    changed, removed = diff_feature_snapshots(previous, snapshot)
+    log.info('egrabber camera parameters',
+             extra={'tags': ['schema'],
+                    'full_snapshot': previous is None,
+                    'camera_features': changed,
+                    'removed_camera_features': removed})
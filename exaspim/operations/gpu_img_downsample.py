@@ -29,7 +29,9 @@ class DownSample:
         self.prog = OCLProgram(src_str=self.kernel,
                                build_options=['-D', f'BLOCK={self.downsample_factor}'])
 
-    def compute(self, image):
+    def compute(self, image, key=None):
+        """Return [image, level1, ...]. Every call returns new arrays, so
+        `key` is only accepted for compatibility with :class:`DownSampleCPU`."""
         pyramid = []
         pyramid.append(image)
         for level in range(0, self.downsample_levels):
@@ -0,0 +1,20 @@
+"""Pick the fastest available downsampler for display images."""
+import logging
+from exaspim.operations.cpu_img_downsample import DownSampleCPU
+
+
+def get_downsampler(use_gpu: bool = True):
+    """Return a :class:`DownSample` if an OpenCL device is available;
+    otherwise fall back to a :class:`DownSampleCPU`.
+
+    :param use_gpu: if False, skip the OpenCL check and use the CPU backend.
+    """
+    log = logging.getLogger(__name__)
+    if use_gpu:
+        try:
+            from exaspim.operations.gpu_img_downsample import DownSample
+            return DownSample()  # Compiles the kernel on the default device.
+        except Exception as e:  # ImportError or no OpenCL platform/device.
+            log.warning(f"No OpenCL device available ({e}). "
+                        "Downsampling on the CPU.")
+    return DownSampleCPU()
@@ -0,0 +1,85 @@
+"""Vectorized intensity statistics of raw camera frames."""
+
+import numpy as np
+
+HISTOGRAM_BITS = 14  # Resolution of the camera's A/D converter.
+# Largest block of pixels counted at once. np.bincount works on a
+# platform-int copy of its input, so this bounds its scratch memory.
+SLAB_PIXELS = 4 * 1024**2
+
+
+def value_histogram(pixels: np.ndarray, slab_pixels: int = SLAB_PIXELS):
+    """Count every pixel value in `pixels`, one bin per value.
+
+    :param pixels: array of unsigned integers, 16 bits or fewer.
+    :return: int64 array of counts with a bin for every representable value.
+    """
+    dtype = np.dtype(pixels.dtype)
+    if dtype.kind != 'u' or dtype.itemsize > 2:
+        raise ValueError(f"Cannot histogram {dtype} pixels.")
+    bin_count = 2**(8 * dtype.itemsize)
+    flat = pixels.reshape(-1)
+    counts = np.zeros(bin_count, dtype=np.int64)
+    for start in range(0, flat.size, slab_pixels):
+        counts += np.bincount(flat[start:start + slab_pixels],
+                              minlength=bin_count)
+    return counts
+
+
+def row_sums(frame: np.ndarray):
+    """Sum each row in the narrowest accumulator that can't overflow.
+    Summing in 32 bits is ~2x faster than in 64."""
+    max_row_sum = frame.shape[-1] * np.iinfo(frame.dtype).max
+    dtype = np.uint32 if max_row_sum <= np.iinfo(np.uint32).max else np.uint64
+    return frame.sum(axis=-1, dtype=dtype)
+
+
+def frame_statistics(frame: np.ndarray, saturation_adu: int,
+                     histogram_stride: int = 1):
+    """Intensity statistics of one frame.
+
+    min, max, mean and the saturated pixel count are exact. Histogramming is
+    an order of magnitude slower than the other reductions, so only every
+    `histogram_stride`-th row and column is histogrammed.
+
+    :param frame: 2D array of unsigned integers, 16 bits or fewer.
+    :param saturation_adu: pixels at or above this value are saturated.
+    :param histogram_stride: pixel spacing of the histogram subsample.
+    :return: dict of statistics that :func:`merge_statistics` can combine.
+    """
+    return {'min': int(frame.min()),
+            'max': int(frame.max()),
+            'sum': int(row_sums(frame).sum(dtype=np.uint64)),
+            'pixel_count': frame.size,
+            'saturated': int(np.count_nonzero(frame >= saturation_adu)),
+            'histogram': value_histogram(
+                frame[::histogram_stride, ::histogram_stride])}
+
+
+def merge_statistics(statistics: list[dict]):
+    """Combine statistics from :func:`frame_statistics` (or from this)."""
+    return {'min': min(s['min'] for s in statistics),
+            'max': max(s['max'] for s in statistics),
+            'sum': sum(s['sum'] for s in statistics),
+            'pixel_count': sum(s['pixel_count'] for s in statistics),
+            'saturated': sum(s['saturated'] for s in statistics),
+            'histogram': np.sum([s['histogram'] for s in statistics], axis=0)}
+
+
+def reduce_histogram(counts: np.ndarray, bits: int = HISTOGRAM_BITS):
+    """Merge adjacent bins of a full-resolution histogram down to `bits`.
+
+    The camera's 14-bit samples are MSB-aligned in 16-bit pixels, so this
+    drops the two always-zero low bits.
+    """
+    return counts.reshape(2**bits, -1).sum(axis=1)
+
+
+def histogram_percentiles(counts: np.ndarray, percents: list[float]):
+    """Pixel values below which `percents` of the pixels fall, i.e: display
+    contrast limits from the (0.1, 99.9) percentiles."""
+    cumulative = np.cumsum(counts)
+    if not cumulative[-1]:
+        return [None for _ in percents]
+    targets = np.asarray(percents, dtype=np.float64) / 100. * cumulative[-1]
+    return [int(v) for v in np.searchsorted(cumulative, targets, side='left')]
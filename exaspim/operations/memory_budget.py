@@ -0,0 +1,113 @@
+"""Itemized estimate of the memory an acquisition will allocate."""
+
+import numpy as np
+import os
+import shutil
+from math import floor, log2
+
+# ImarisWriter copies each block it is handed and builds the lower
+# resolution levels from it (~1/7 of the block for 2x2x2 downsampling).
+IMARIS_PYRAMID_FRACTION = 1 / 7
+# Rough per-thread compression scratch space inside ImarisWriter.
+IMARIS_THREAD_BUFFER_BYTES = 32 * 1024**2
+# Fraction of physical memory left for the OS and everything else.
+MEMORY_HEADROOM_FRACTION = 0.1
+BACKGROUND_FRAME_AVERAGE = 10  # frames averaged per background image.
+LIVE_VIEW_PYRAMID_COUNT = 2  # downsampler pyramids rotated per channel.
+# Budget items allocated when the camera is configured, so they are already
+# excluded from the memory the OS reports as available.
+PREALLOCATED_ITEMS = {'eGrabber frame buffers'}
+
+
+def acquisition_memory_budget(cfg, channel_count: int, chunk_size: int,
+                              frame_count: int):
+    """Estimate every large allocation made while acquiring one stack.
+
+    :param cfg: the instrument config.
+    :param channel_count: number of channels acquired in the same stack.
+    :param chunk_size: frames per compressor chunk.
+    :param frame_count: frames per stack.
+    :return: dict {<item>: (<bytes>, <in shared memory>)} of allocations.
+    """
+    rows, cols = cfg.sensor_row_count, cfg.sensor_column_count
+    itemsize = np.dtype(cfg.datatype).itemsize
+    frame_bytes = rows * cols * itemsize
+    chunk_bytes = chunk_size * frame_bytes
+    # Each MIP process holds the XY MIP, a temporary from np.maximum and the
+    # XZ/YZ MIPs. The previous stack's MIP processes may still be writing
+    # while the next stack starts, so budget for two sets.
+    mip_process_bytes = 2 * frame_bytes + (rows + cols) * frame_count * itemsize
+    # numpy.median copies the stack and returns a float64 image.
+    background_bytes = (2 * BACKGROUND_FRAME_AVERAGE * frame_bytes
+                        + rows * cols * np.dtype('float64').itemsize)
+    # Each published live frame is a new frame plus copies of its downsampled
+    # levels (~1/3 of a frame). One waits in the mailbox while the viewer
+    # holds the previous one. The downsampler also keeps its own pyramids per
+    # channel and one set of uint32 accumulators (~2/3 of a frame).
+    live_view_bytes = 2 * (frame_bytes + frame_bytes // 3) \
+        + LIVE_VIEW_PYRAMID_COUNT * frame_bytes // 3
+    live_view_accumulator_bytes = 2 * frame_bytes // 3
+    imaris_bytes = chunk_bytes * (1 + IMARIS_PYRAMID_FRACTION) \
+        + cfg.compressor_thread_count * IMARIS_THREAD_BUFFER_BYTES
+    return {
+        'chunk double buffers': (channel_count * 2 * chunk_bytes, True),
+        'ImarisWriter buffers': (channel_count * int(imaris_bytes), False),
+        'MIP shared images': (2 * channel_count * frame_bytes, True),
+        'MIP process arrays': (2 * channel_count * mip_process_bytes, False),
+        'eGrabber frame buffers': (cfg.egrabber_frame_buffer * frame_bytes, False),
+        'background image stack': (background_bytes, False),
+        'auxiliary image write queue': (cfg.aux_image_queue_size * frame_bytes, False),
+        'live view buffers': (channel_count * live_view_bytes
+                              + live_view_accumulator_bytes, False),
+    }
+
+
+def chunk_dependent_bytes(cfg, channel_count: int):
+    """Bytes that each additional frame of chunk size adds to the budget."""
+    frame_bytes = cfg.sensor_row_count * cfg.sensor_column_count \
+        * np.dtype(cfg.datatype).itemsize
+    # 2 chunks of double buffer plus ImarisWriter's copy and pyramid.
+    return channel_count * frame_bytes * (3 + IMARIS_PYRAMID_FRACTION)
+
+
+def largest_chunk_size(cfg, channel_count: int, frame_count: int,
+                       available_bytes: int, exclude=PREALLOCATED_ITEMS):
+    """Largest power-of-two chunk size whose budget fits in
+    `available_bytes`, or 0 if not even a single-frame chunk fits.
+
+    :param exclude: budget items that `available_bytes` already accounts
+        for.
+    """
+    fixed_bytes = sum(size for item, (size, _) in acquisition_memory_budget(
+        cfg, channel_count, 0, frame_count).items() if item not in exclude)
+    max_chunk = floor((available_bytes - fixed_bytes)
+                      / chunk_dependent_bytes(cfg, channel_count))
+    if max_chunk < 1:
+        return 0
+    return 2**floor(log2(max_chunk))
+
+
+def hugepage_pools(meminfo_path: str = "/proc/meminfo"):
+    """Return {'total_bytes', 'free_bytes'} of reserved hugepages, or None
+    if the platform doesn't report them. Reserved hugepages are unavailable
+    to regular and shared memory allocations."""
+    if not os.path.exists(meminfo_path):
+        return None
+    fields = {}
+    with open(meminfo_path) as meminfo:
+        for line in meminfo:
+            key, value = line.split(":", 1)
+            fields[key] = int(value.split()[0])
+    if 'HugePages_Total' not in fields:
+        return None
+    page_bytes = fields.get('Hugepagesize', 0) * 1024
+    return {'total_bytes': fields['HugePages_Total'] * page_bytes,
+            'free_bytes': fields['HugePages_Free'] * page_bytes}
+
+
+def shared_memory_free_bytes(shm_path: str = "/dev/shm"):
+    """Free space on the tmpfs backing shared memory, or None if there isn't
+    one (i.e: on Windows, where shared memory is backed by the page file)."""
+    if not os.path.isdir(shm_path):
+        return None
+    return shutil.disk_usage(shm_path).free
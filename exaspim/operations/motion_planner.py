@@ -0,0 +1,91 @@
+"""Issue independent stage moves together and overlap the wait with work."""
+import logging
+from contextlib import contextmanager
+from time import perf_counter, sleep
+
+
+class MotionPlanner:
+    """Batch stage moves so that independent axes travel concurrently.
+
+    Moves are queued with :meth:`move` (sample axes, through the
+    SamplePose) and :meth:`move_tiger` (machine axes, i.e: focus), issued
+    together with :meth:`start`, and waited on once with :meth:`wait`.
+    Work that doesn't need the stage to be still can run in between.
+
+    .. code-block: python
+
+        planner = MotionPlanner(tigerbox, sample_pose)
+        planner.move(x=x_steps, y=y_steps)
+        planner.move_tiger(n=focus_steps)
+        with planner.moving():
+            load_waveforms()  # runs while the stage moves.
+    """
+
+    def __init__(self, tigerbox, sample_pose, poll_interval_s: float = 0.001):
+        """Init.
+
+        :param tigerbox: the Tiger controller. Its `is_moving` covers every
+            axis.
+        :param sample_pose: SamplePose translating sample axes to Tiger axes.
+        :param poll_interval_s: how often to check whether the stage stopped.
+        """
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.tigerbox = tigerbox
+        self.sample_pose = sample_pose
+        self.poll_interval_s = poll_interval_s
+        self.sample_moves = {}  # {sample axis: absolute position [steps]}
+        self.tiger_moves = {}  # {tiger axis: absolute position [steps]}
+        self.move_start_time = None  # None if no move is in progress.
+        self.last_move_time_s = 0.  # time from the last start to its wait.
+        self.last_wait_time_s = 0.  # time the last wait blocked for.
+
+    def move(self, **axes):
+        """Queue absolute moves of sample axes, i.e: ``move(x=100, y=200)``.
+        A later move of the same axis replaces the queued one."""
+        self.sample_moves.update(axes)
+
+    def move_tiger(self, **axes):
+        """Queue absolute moves of Tiger axes, i.e: ``move_tiger(n=-4000)``."""
+        self.tiger_moves.update(axes)
+
+    def start(self):
+        """Issue every queued move at once without waiting for them."""
+        if not (self.sample_moves or self.tiger_moves):
+            return
+        self.log.debug(f"Moving sample axes {self.sample_moves} and tiger "
+                       f"axes {self.tiger_moves}.")
+        if self.sample_moves:
+            self.sample_pose.move_absolute(wait=False, **self.sample_moves)
+        if self.tiger_moves:
+            self.tigerbox.move_absolute(**self.tiger_moves)
+        self.sample_moves = {}
+        self.tiger_moves = {}
+        if self.move_start_time is None:
+            self.move_start_time = perf_counter()
+
+    def wait(self):
+        """Block until every axis has stopped.
+
+        :return: the time spent blocked.
+        """
+        wait_start_time = perf_counter()
+        while self.tigerbox.is_moving():
+            sleep(self.poll_interval_s)
+        now = perf_counter()
+        self.last_wait_time_s = now - wait_start_time
+        if self.move_start_time is not None:
+            self.last_move_time_s = now - self.move_start_time
+            self.move_start_time = None
+            self.log.debug(f"Moves took {self.last_move_time_s:.3f}[s], "
+                           f"{self.last_wait_time_s:.3f}[s] of which were "
+                           f"spent waiting.")
+        return self.last_wait_time_s
+
+    @contextmanager
+    def moving(self):
+        """Issue the queued moves, run the body, then wait for the stage."""
+        self.start()
+        try:
+            yield self
+        finally:
+            self.wait()
@@ -0,0 +1,52 @@
+"""Measure the translation between overlapping tiles by phase correlation."""
+
+import numpy as np
+
+
+def phase_correlation(reference: np.ndarray, moving: np.ndarray):
+    """Translation that best maps `moving` onto `reference`.
+
+    Both images are Hann windowed to suppress the edges, then the peak of the
+    inverse FFT of their normalized cross-power spectrum gives the shift. The
+    peak is refined to subpixel precision with a parabola through its
+    neighbors.
+
+    :param reference: 2D image.
+    :param moving: 2D image of the same shape.
+    :return: (row shift, column shift, quality). `moving` shifted by the
+        returned amount lines up with `reference`. Quality is the height of
+        the correlation peak: 1 for identical content, near 0 for unrelated
+        content.
+    """
+    if reference.shape != moving.shape:
+        raise ValueError(f"Cannot correlate images of shapes {reference.shape} "
+                         f"and {moving.shape}.")
+    window = np.outer(np.hanning(reference.shape[0]),
+                      np.hanning(reference.shape[1])).astype(np.float32)
+    ref = np.asarray(reference, dtype=np.float32)
+    mov = np.asarray(moving, dtype=np.float32)
+    ref_fft = np.fft.rfft2((ref - ref.mean()) * window)
+    mov_fft = np.fft.rfft2((mov - mov.mean()) * window)
+    cross_power = ref_fft * np.conj(mov_fft)
+    cross_power /= np.maximum(np.abs(cross_power), np.finfo(np.float32).tiny)
+    correlation = np.fft.irfft2(cross_power, s=reference.shape)
+    peak = np.unravel_index(np.argmax(correlation), correlation.shape)
+    shift = [_subpixel_peak(correlation, peak, axis) for axis in (0, 1)]
+    # Peaks past the middle are negative shifts (the FFT wraps around).
+    shift = [s - n if s > n / 2 else s
+             for s, n in zip(shift, correlation.shape)]
+    return float(shift[0]), float(shift[1]), float(correlation[peak])
+
+
+def _subpixel_peak(correlation: np.ndarray, peak: tuple, axis: int):
+    """Peak position along `axis` refined by fitting a parabola."""
+    n = correlation.shape[axis]
+    index = list(peak)
+    index[axis] = (peak[axis] - 1) % n
+    before = correlation[tuple(index)]
+    index[axis] = (peak[axis] + 1) % n
+    after = correlation[tuple(index)]
+    center = correlation[peak]
+    denominator = before - 2 * center + after
+    offset = 0. if denominator == 0 else 0.5 * (before - after) / denominator
+    return peak[axis] + float(np.clip(offset, -0.5, 0.5))
@@ -1,10 +1,9 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import signal
-from scipy import interpolate
+from exaspim.data_structures.acquisition_settings import AcquisitionSettings
 
 
 def plot_waveforms_to_pdf(t, voltages_t):
+    import matplotlib.pyplot as plt  # Only needed for debugging plots.
     etl_t, camera_enable_t, stage_enable_t, laser_488_enable_t, laser_638_enable_t, laser_561_enable_t, laser_405_enable_t, galvo_a_t, galvo_b_t = voltages_t  # TODO fix this, use AO names to channel number to autopopulate
 
     fig, axes = plt.subplots(nrows=1, ncols=1, figsize=(10, 9))
@@ -26,49 +25,64 @@ def plot_waveforms_to_pdf(t, voltages_t):
 
 
 def generate_waveforms(cfg, plot: bool = False, channels: list[int] = None, live = False):
+    """Generate one period of DAQ voltages for `channels`.
+
+    :param cfg: an ExaspimConfig or an AcquisitionSettings snapshot of one.
+    :param plot: save a plot of the waveforms to plot.pdf.
+    :param channels: channels to play in order. Defaults to the config's
+        channels, or every channel of a snapshot.
+    :param live: don't pulse the stage (i.e: for livestreaming).
+    """
+    # scipy is slow to import, so only load it once waveforms are needed.
+    from scipy import signal
+    from scipy import interpolate
+    settings = cfg if isinstance(cfg, AcquisitionSettings) \
+        else AcquisitionSettings.from_config(cfg, channels)
     voltages_t = {}
     total_samples = 0
 
     # Create lookup table to go from ao channel name to voltages_t index.
     #   This must match the order the NI card will create them.
     # name to channel index (i.e: hardware pin number) lookup table:
-    n2c_index = {name: index for index, (name, _) in enumerate(cfg.n2c.items())}
+    n2c_index = {name: index for index, (name, _) in enumerate(settings.ao_channels)}
+    ao_count = len(settings.ao_channels)
 
     # Create samples arrays for various relevant timings
-    camera_exposure_samples = int(cfg.daq_sample_rate * cfg.camera_exposure_time)
-    rest_samples = int(cfg.daq_sample_rate * cfg.frame_rest_time)
-    dwell_time_samples = int(cfg.daq_sample_rate * cfg.camera_dwell_time)
-    pulse_samples = int(cfg.daq_sample_rate * cfg.ttl_pulse_time)
-    channels_list = cfg.channels if channels is None else channels
+    camera_exposure_samples = int(settings.daq_sample_rate * settings.camera_exposure_time)
+    rest_samples = int(settings.daq_sample_rate * settings.frame_rest_time)
+    dwell_time_samples = int(settings.daq_sample_rate * settings.camera_dwell_time)
+    pulse_samples = int(settings.daq_sample_rate * settings.ttl_pulse_time)
+    channels_list = settings.channels if channels is None else channels
     for ch in channels_list:
+        ch_settings = settings.channel(ch)
         # Create channel-specific samples arrays for various relevant timings
-        camera_delay_samples = int(cfg.daq_sample_rate * cfg.get_camera_delay_time(ch))
-        etl_buffer_samples = int(cfg.daq_sample_rate * cfg.get_etl_buffer_time(ch))
+        camera_delay_samples = int(settings.daq_sample_rate * ch_settings.camera_delay_time_s)
+        etl_buffer_samples = int(settings.daq_sample_rate * ch_settings.etl_buffer_time_s)
         channel_samples = camera_exposure_samples + etl_buffer_samples + rest_samples + dwell_time_samples
 
         total_samples += channel_samples
 
-        voltages_t[ch] = np.zeros((len(cfg.n2c), channel_samples))
+        voltages_t[ch] = np.zeros((ao_count, channel_samples))
 
         # Generate ETL signal
-        t_etl = np.linspace(0, cfg.camera_exposure_time + cfg.get_etl_buffer_time(ch),
+        t_etl = np.linspace(0, settings.camera_exposure_time + ch_settings.etl_buffer_time_s,
                             camera_exposure_samples + etl_buffer_samples, endpoint=False)
-        voltages_etl = -cfg.get_etl_amplitude(ch) * signal.sawtooth(
-            2 * np.pi / (cfg.camera_exposure_time + cfg.get_etl_buffer_time(ch)) * t_etl, width=1.0) + cfg.get_etl_offset(ch)
+        voltages_etl = -ch_settings.etl_amplitude * signal.sawtooth(
+            2 * np.pi / (settings.camera_exposure_time + ch_settings.etl_buffer_time_s) * t_etl, width=1.0) + ch_settings.etl_offset
         t0 = t_etl[0]
-        t1 = t_etl[int((camera_exposure_samples + etl_buffer_samples) * cfg.get_etl_interp_time(ch))]
+        t1 = t_etl[int((camera_exposure_samples + etl_buffer_samples) * ch_settings.etl_interp_time)]
         tf = t_etl[-1]
         v0 = voltages_etl[0]
-        v1 = voltages_etl[int((camera_exposure_samples + etl_buffer_samples) * cfg.get_etl_interp_time(ch))] + cfg.get_etl_nonlinear(ch)
+        v1 = voltages_etl[int((camera_exposure_samples + etl_buffer_samples) * ch_settings.etl_interp_time)] + ch_settings.etl_nonlinear
         vf = voltages_etl[-1]
         f = interpolate.interp1d([t0, t1, tf], [v0, v1, vf], kind='quadratic')
         voltages_etl = f(t_etl)
 
         voltages_t[ch][n2c_index['etl'], 0:camera_exposure_samples + etl_buffer_samples] = voltages_etl  # write in ETL sawtooth
-        voltages_t[ch][n2c_index['etl'], camera_exposure_samples + etl_buffer_samples::] = cfg.get_etl_offset(ch) + cfg.get_etl_amplitude(ch)  # snap back ETL after sawtooth
+        voltages_t[ch][n2c_index['etl'], camera_exposure_samples + etl_buffer_samples::] = ch_settings.etl_offset + ch_settings.etl_amplitude  # snap back ETL after sawtooth
         voltages_t[ch][n2c_index['etl'],
         camera_exposure_samples + etl_buffer_samples:camera_exposure_samples + etl_buffer_samples + dwell_time_samples] = \
-            cfg.get_etl_offset(ch) - cfg.get_etl_amplitude(ch)  # delay snapback until last row is done exposing
+            ch_settings.etl_offset - ch_settings.etl_amplitude  # delay snapback until last row is done exposing
 
         # Generate camera TTL signal
         voltages_t[ch][n2c_index['camera'], int(etl_buffer_samples / 2.0) + camera_delay_samples:int(
@@ -77,7 +91,7 @@ def generate_waveforms(cfg, plot: bool = False, channels: list[int] = None, live
         # Generate laser TTL signal
         voltages_t[ch][n2c_index[str(ch)],  # FIXME: remove n2c or move it into the config.
         int(etl_buffer_samples / 2.0) + camera_delay_samples:int(
-            etl_buffer_samples / 2.0) + camera_exposure_samples + dwell_time_samples + camera_delay_samples] = cfg.get_channel_ao_voltage(str(ch))
+            etl_buffer_samples / 2.0) + camera_exposure_samples + dwell_time_samples + camera_delay_samples] = ch_settings.ao_voltage
 
         # Generate stage TTL signal
         if ch == channels_list[-1]:
@@ -87,17 +101,17 @@ def generate_waveforms(cfg, plot: bool = False, channels: list[int] = None, live
                            camera_exposure_samples + etl_buffer_samples + dwell_time_samples + pulse_samples] = volts
 
         # Generate galvo signals
-        voltages_t[ch][n2c_index['galvo_a']] = cfg.get_galvo_a_setpoint(ch)
-        voltages_t[ch][n2c_index['galvo_b']] = cfg.get_galvo_b_setpoint(ch)
+        voltages_t[ch][n2c_index['galvo_a']] = ch_settings.galvo_a_setpoint
+        voltages_t[ch][n2c_index['galvo_b']] = ch_settings.galvo_b_setpoint
 
     # Merge voltage arrays
-    voltages_out = np.array([]).reshape((len(cfg.n2c), 0))
+    voltages_out = np.array([]).reshape((ao_count, 0))
     for ch in channels_list:
         voltages_out = np.hstack((voltages_out, voltages_t[ch]))
 
     if plot:
         # Total waveform time in sec.
-        t = np.linspace(0, cfg.daq_period_time, total_samples, endpoint=False)
+        t = np.linspace(0, settings.daq_period_time, total_samples, endpoint=False)
         plot_waveforms_to_pdf(t, voltages_out)
 
     return voltages_out
@@ -0,0 +1,114 @@
+"""Background writer for auxiliary (background, MIP) images."""
+import logging
+import tifffile
+from queue import Queue
+from threading import Thread
+from pathlib import Path
+from time import perf_counter
+from exaspim.operations.cpu_img_downsample import align_region, downsample_region
+
+
+def pyramid_level_count(shape: tuple, min_size: int):
+    """Number of 2x downsampled levels to add below a full resolution
+    image so that the smallest level's shorter side is still `min_size` or
+    more. 0 if `min_size` is 0."""
+    if not min_size:
+        return 0
+    levels = 0
+    while min(shape) // 2**(levels + 1) >= min_size:
+        levels += 1
+    return levels
+
+
+def write_image(filepath: Path, image, compression: str = None,
+                tile_shape: tuple = (256, 256), pyramid_min_size: int = 0):
+    """Write a 2D image to a TIFF file, as a pyramidal OME-TIFF if
+    `pyramid_min_size` is set. See :class:`ImageWriter` for the parameters."""
+    levels = pyramid_level_count(image.shape, pyramid_min_size)
+    if not levels:
+        tifffile.imwrite(str(Path(filepath).absolute()), image,
+                         tile=tile_shape, compression=compression)
+        return
+    with tifffile.TiffWriter(str(Path(filepath).absolute()), ome=True) as tif:
+        tif.write(image, subifds=levels, tile=tile_shape,
+                  compression=compression, metadata={'axes': 'YX'})
+        for _ in range(levels):
+            image = downsample_region(image, align_region(
+                (0, image.shape[0], 0, image.shape[1]), 1, image.shape), 1)
+            tif.write(image, subfiletype=1, tile=tile_shape,
+                      compression=compression)
+
+
+class ImageWriter(Thread):
+    """Thread that writes 2D images to TIFF files off the acquisition path.
+
+    Callers hand off arrays with :meth:`write` and return immediately. The
+    queue is bounded, so a caller blocks (backpressure) only if the disk falls
+    more than `queue_size` images behind.
+
+    .. code-block: python
+
+        writer = ImageWriter(compression='zlib')
+        writer.start()
+        writer.write(Path("bkg.tiff"), bkg_img)  # returns immediately.
+        writer.close()  # flush remaining images and join.
+
+    With `pyramid_min_size` set, each file is a pyramidal OME-TIFF: 2x
+    downsampled levels are stored as SubIFDs of the full resolution image,
+    so viewers can load a thumbnail without reading the whole image, i.e:
+    ``tifffile.imread(path, level=-1)``.
+
+    Note: arrays handed to the writer must not be modified afterwards.
+    """
+
+    def __init__(self, compression: str = None, queue_size: int = 4,
+                 tile_shape: tuple = (256, 256), pyramid_min_size: int = 0):
+        """Init.
+
+        :param compression: TIFF compression scheme (i.e: 'zlib') or None to
+            write images uncompressed.
+        :param queue_size: max number of images waiting to be written before
+            :meth:`write` blocks.
+        :param tile_shape: TIFF tile shape, or None to write in strips.
+        :param pyramid_min_size: add 2x downsampled levels while the
+            shorter side stays at least this many pixels, or 0 to write
+            single resolution TIFFs.
+        """
+        super().__init__(daemon=True)
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.compression = compression
+        self.tile_shape = tile_shape
+        self.pyramid_min_size = pyramid_min_size
+        self.queue = Queue(maxsize=queue_size)
+
+    def write(self, filepath: Path, image):
+        """Queue an image to be written to `filepath`. Blocks if the queue
+        is full."""
+        self.queue.put((Path(filepath), image))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:  # Sentinel. No more images.
+                self.queue.task_done()
+                return
+            filepath, image = item
+            try:
+                start_time = perf_counter()
+                write_image(filepath, image, self.compression, self.tile_shape,
+                            self.pyramid_min_size)
+                self.log.debug(f"Wrote {filepath.name} in "
+                               f"{perf_counter() - start_time:.3f}[s].")
+            except Exception:
+                self.log.exception(f"Failed to write {filepath}.")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Block until every queued image has been written."""
+        self.queue.join()
+
+    def close(self, timeout: float = None):
+        """Write any remaining images and stop the thread."""
+        self.queue.put(None)
+        self.join(timeout=timeout)
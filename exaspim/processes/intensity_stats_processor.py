@@ -0,0 +1,176 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import c_wchar
+from math import ceil
+from multiprocessing import Process, Array, Event, Queue
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from time import sleep
+from exaspim.operations.affinity import set_process_affinity
+from exaspim.operations.intensity_statistics import frame_statistics, \
+    merge_statistics, reduce_histogram, histogram_percentiles
+
+SLAB_ROWS = 256  # Rows per unit of work handed to the thread pool.
+
+
+class IntensityStatsProcessor(Process):
+    """Class for computing intensity statistics of every chunk of a stack.
+
+    Chunks are handed over exactly as they are to a :class:`StackWriter`:
+    set :attr:`shm_name` and clear :attr:`done_reading`. Each chunk is
+    split into slabs of rows that are reduced across a thread pool. Each
+    chunk's summary, and then the tile's summary, is put on :attr:`results`.
+    Per-chunk statistics and 14-bit histograms are written to a compressed
+    .npz sidecar file once the stack is done.
+
+    Statistics must not hold up the camera, so the producer doesn't wait for
+    them before reusing a chunk's buffer. Instead, if a chunk is still being
+    processed when the next one is ready, the producer sets
+    :attr:`cancel_chunk` and waits only for the slabs in flight. That chunk
+    is left out of the statistics and reported as skipped.
+    """
+
+    def __init__(self, image_rows: int, image_columns: int, image_count: int,
+                 chunk_size: int, datatype: str, saturation_adu: int,
+                 histogram_stride: int, contrast_percentiles: list[float],
+                 thread_count: int,
+                 file_dest: Path, x_tile_num: int, y_tile_num: int,
+                 wavelength: int, cpu_affinity: list[int] = None):
+        """Init.
+
+        :param image_rows: image sensor rows.
+        :param image_columns: image sensor columns.
+        :param image_count: number of images in a stack.
+        :param chunk_size: frames per chunk.
+        :param datatype: string representation of the image datatype.
+        :param saturation_adu: pixels at or above this value are saturated.
+        :param histogram_stride: histogram every this many rows and columns.
+        :param contrast_percentiles: (low, high) percentiles of the tile's
+            histogram reported as display contrast limits.
+        :param thread_count: threads to split each chunk across.
+        :param file_dest: folder to write the sidecar file to.
+        :param x_tile_num: current tile number in x dimension
+        :param y_tile_num: current tile number in y dimension
+        :param wavelength: wavelength of laser used to acquire images
+        :param cpu_affinity: CPUs to run on, or None to run on any.
+        """
+        super().__init__()
+        self.img_count = image_count
+        self.chunk_size = chunk_size
+        self.dtype = datatype
+        self.saturation_adu = saturation_adu
+        self.histogram_stride = histogram_stride
+        self.contrast_percentiles = list(contrast_percentiles)
+        self.thread_count = thread_count
+        self.file_dest = file_dest
+        self.x_tile_num = x_tile_num
+        self.y_tile_num = y_tile_num
+        self.wavelength = wavelength
+        self.cpu_affinity = cpu_affinity
+        self.shm_shape = (chunk_size, image_rows, image_columns)
+        self.shm_nbytes = \
+            int(np.prod(self.shm_shape, dtype=np.int64)*np.dtype(self.dtype).itemsize)
+        self._shm_name = Array(c_wchar, 32)  # hidden and exposed via property.
+        # Flow control attributes to synchronize inter-process communication.
+        self.done_reading = Event()
+        self.done_reading.set()  # Set after processing all data in shared mem.
+        self.cancel_chunk = Event()  # Set to drop the chunk being processed.
+        # Chunk summaries, then the tile summary (with 'chunk': None).
+        self.results = Queue()
+
+    @property
+    def shm_name(self):
+        """Convenience getter to extract the shared memory address (string)
+        from the c array."""
+        return str(self._shm_name[:]).split('\x00')[0]
+
+    @shm_name.setter
+    def shm_name(self, name: str):
+        """Convenience setter to set the string value within the c array."""
+        for i, c in enumerate(name):
+            self._shm_name[i] = c
+        self._shm_name[len(name)] = '\x00'  # Null terminate the string.
+
+    @property
+    def sidecar_path(self):
+        return self.file_dest / Path(f"stats_tile_x_{self.x_tile_num:04}_"
+                                     f"y_{self.y_tile_num:04}_z_0000_"
+                                     f"ch_{self.wavelength}.npz")
+
+    def run(self):
+        set_process_affinity(self.cpu_affinity)
+        pool = ThreadPoolExecutor(max_workers=self.thread_count)
+        chunk_count = ceil(self.img_count/self.chunk_size)
+        chunk_stats = []
+        chunk_numbers = []  # of the chunks in chunk_stats.
+        skipped_chunks = []
+        for chunk_num in range(chunk_count):
+            # Wait for new data.
+            while self.done_reading.is_set():
+                sleep(0.001)
+            # A cancel that arrived as the last chunk finished was for it.
+            self.cancel_chunk.clear()
+            shm = SharedMemory(self.shm_name, create=False, size=self.shm_nbytes)
+            frames = np.ndarray(self.shm_shape, self.dtype, buffer=shm.buf)
+            # The last chunk may only be partially filled.
+            valid_frames = min(self.chunk_size,
+                               self.img_count - chunk_num*self.chunk_size)
+            slabs = [frame[row:row + SLAB_ROWS]
+                     for frame in frames[:valid_frames]
+                     for row in range(0, self.shm_shape[1], SLAB_ROWS)]
+            slab_stats = list(pool.map(self._slab_statistics, slabs))
+            slabs = None
+            frames = None
+            shm.close()
+            cancelled = self.cancel_chunk.is_set()
+            self.done_reading.set()
+            if cancelled:
+                skipped_chunks.append(chunk_num)
+                self.results.put({'chunk': chunk_num, 'skipped': True})
+                continue
+            stats = merge_statistics(slab_stats)
+            chunk_stats.append(stats)
+            chunk_numbers.append(chunk_num)
+            self.results.put(self._summary(stats, chunk_num))
+        pool.shutdown()
+        if not chunk_stats:
+            self.results.put({'chunk': None, 'skipped': True,
+                              'skipped_chunks': skipped_chunks})
+            return
+        tile_stats = merge_statistics(chunk_stats)
+        tile_summary = self._summary(tile_stats, None)
+        tile_summary['skipped_chunks'] = skipped_chunks
+        tile_summary['contrast_limits'] = \
+            histogram_percentiles(tile_stats['histogram'], self.contrast_percentiles)
+        np.savez_compressed(
+            self.sidecar_path,
+            chunk_index=chunk_numbers,
+            chunk_min=[s['min'] for s in chunk_stats],
+            chunk_max=[s['max'] for s in chunk_stats],
+            chunk_mean=[s['sum'] / s['pixel_count'] for s in chunk_stats],
+            chunk_saturated=[s['saturated'] for s in chunk_stats],
+            chunk_histograms=np.stack([reduce_histogram(s['histogram'])
+                                       for s in chunk_stats]),
+            tile_histogram=reduce_histogram(tile_stats['histogram']),
+            histogram_stride=self.histogram_stride,
+            saturation_adu=self.saturation_adu,
+            contrast_limits=tile_summary['contrast_limits'],
+            skipped_chunks=np.asarray(skipped_chunks, dtype=np.int64))
+        tile_summary['sidecar'] = str(self.sidecar_path)
+        self.results.put(tile_summary)
+
+    def _slab_statistics(self, slab):
+        """Statistics of a slab, or None once the chunk is cancelled."""
+        if self.cancel_chunk.is_set():
+            return None
+        return frame_statistics(slab, self.saturation_adu, self.histogram_stride)
+
+    @staticmethod
+    def _summary(stats: dict, chunk_num: int):
+        """Histogram-free summary to report to the acquisition process."""
+        return {'chunk': chunk_num,
+                'min': stats['min'],
+                'max': stats['max'],
+                'mean': stats['sum'] / stats['pixel_count'],
+                'pixel_count': stats['pixel_count'],
+                'saturated': stats['saturated']}
@@ -0,0 +1,146 @@
+"""Background sampler for process, shared memory, and frame buffer usage."""
+import logging
+import os
+import shutil
+from psutil import Process, NoSuchProcess, AccessDenied, virtual_memory
+from threading import Thread, Event
+from time import perf_counter
+from exaspim.data_structures.latest_frame_mailbox import LatestFrameMailbox
+
+
+class MemorySampler(Thread):
+    """Thread that periodically measures the memory footprint of this process
+    and its children.
+
+    RSS counts a shared page once per process that maps it, so summing RSS
+    across the StackWriter and MIP processes overcounts the chunk buffers.
+    Instead, each sample records per-process USS (pages only that process
+    maps) and PSS (shared pages split evenly between the processes mapping
+    them), plus the size of /dev/shm, where the shared buffers live. The
+    footprint, USS summed over the process tree plus /dev/shm, counts every
+    page once. /dev/shm usage is system-wide, so it also counts other
+    programs' shared memory.
+
+    Without /dev/shm (i.e: on Windows), USS excludes shareable pages, so the
+    shared buffers are counted from `shm_bytes_fn` instead, which reports
+    the shared memory segments the caller knows it allocated.
+
+    Samples are dicts published to a :class:`LatestFrameMailbox`, so readers
+    (i.e: the acquisition loop) only do an attribute lookup.
+
+    .. code-block: python
+
+        sampler = MemorySampler(period_s=0.5)
+        sampler.start()
+        sample = sampler.latest()  # None until the first sample is taken.
+        sampler.close()
+    """
+
+    def __init__(self, period_s: float = 0.5, buffer_bytes_fn=None,
+                 shm_path: str = "/dev/shm", shm_bytes_fn=None):
+        """Init.
+
+        :param period_s: time between samples.
+        :param buffer_bytes_fn: optional callable returning the bytes
+            allocated for frame grabber buffers.
+        :param shm_path: tmpfs mount backing shared memory. Ignored if it
+            does not exist (i.e: on Windows).
+        :param shm_bytes_fn: optional callable returning the bytes of shared
+            memory segments allocated by this process tree. Used instead of
+            `shm_path` if that doesn't exist.
+        """
+        super().__init__(daemon=True)
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.period_s = period_s
+        self.buffer_bytes_fn = buffer_bytes_fn
+        self.shm_bytes_fn = shm_bytes_fn
+        self.shm_path = shm_path if os.path.isdir(shm_path) else None
+        self.samples = LatestFrameMailbox()
+        self.stop_requested = Event()
+        self.process = Process(os.getpid())
+
+    @staticmethod
+    def _process_memory(process: Process):
+        """USS and PSS of one process in bytes (PSS is None if the platform
+        doesn't report it)."""
+        info = process.memory_full_info()
+        return info.uss, getattr(info, 'pss', None)
+
+    def sample(self):
+        """Take a sample now. Called periodically from the thread."""
+        start_time = perf_counter()
+        processes = {}
+        for process in [self.process, *self.process.children(recursive=True)]:
+            try:
+                uss, pss = self._process_memory(process)
+                processes[process.pid] = {'name': process.name(),
+                                          'uss_bytes': uss, 'pss_bytes': pss}
+            except (NoSuchProcess, AccessDenied):
+                continue  # A child exited between listing and sampling it.
+        uss_bytes = sum(p['uss_bytes'] for p in processes.values())
+        pss_values = [p['pss_bytes'] for p in processes.values()]
+        pss_bytes = None if None in pss_values else sum(pss_values)
+        shm_bytes = None
+        shm_system_wide = self.shm_path is not None
+        if shm_system_wide:
+            shm_bytes = shutil.disk_usage(self.shm_path).used
+        elif self.shm_bytes_fn is not None:
+            try:
+                shm_bytes = self.shm_bytes_fn()
+            except Exception:
+                self.log.debug("Could not query shared memory allocation.")
+        buffer_bytes = None
+        if self.buffer_bytes_fn is not None:
+            try:
+                buffer_bytes = self.buffer_bytes_fn()
+            except Exception:
+                self.log.debug("Could not query frame buffer allocation.")
+        system = virtual_memory()
+        footprint_bytes = uss_bytes + (shm_bytes or 0)
+        return {'time': start_time,
+                'processes': processes,
+                'uss_bytes': uss_bytes,
+                'pss_bytes': pss_bytes,
+                'shm_bytes': shm_bytes,
+                'shm_system_wide': shm_system_wide,  # True if from /dev/shm.
+                'frame_buffer_bytes': buffer_bytes,
+                'footprint_bytes': footprint_bytes,
+                'footprint_percent': 100. * footprint_bytes / system.total,
+                'available_bytes': system.available,
+                'total_bytes': system.total,
+                'sample_time_s': perf_counter() - start_time}
+
+    def run(self):
+        while not self.stop_requested.is_set():
+            try:
+                self.samples.publish(self.sample())
+            except Exception:
+                self.log.exception("Error while sampling memory usage.")
+            self.stop_requested.wait(self.period_s)
+
+    def latest(self):
+        """Return the most recent sample or None if none has been taken."""
+        return self.samples.get()[1]
+
+    def close(self, timeout: float = None):
+        """Stop sampling."""
+        self.stop_requested.set()
+        self.join(timeout=timeout)
+
+
+def format_memory_sample(sample: dict):
+    """One-line summary of a sample for logging."""
+    if sample is None:
+        return "no memory sample yet"
+    gb = 1024**3
+    msg = f"footprint: {sample['footprint_bytes'] / gb:.2f}[GB] " \
+          f"({sample['footprint_percent']:.1f}%), " \
+          f"USS: {sample['uss_bytes'] / gb:.2f}[GB]"
+    if sample['pss_bytes'] is not None:
+        msg += f", PSS: {sample['pss_bytes'] / gb:.2f}[GB]"
+    if sample['shm_bytes'] is not None:
+        scope = " (system-wide)" if sample['shm_system_wide'] else ""
+        msg += f", shared memory{scope}: {sample['shm_bytes'] / gb:.2f}[GB]"
+    if sample['frame_buffer_bytes'] is not None:
+        msg += f", frame buffers: {sample['frame_buffer_bytes'] / gb:.2f}[GB]"
+    return msg + f", available: {sample['available_bytes'] / gb:.2f}[GB]"
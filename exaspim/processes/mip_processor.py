@@ -1,17 +1,35 @@
 import numpy as np
-from multiprocessing import Process, Value, Event, Array
+from multiprocessing import Process, Value, Event, Array, Queue
 from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
-import tifffile
+from exaspim.processes.image_writer import write_image
+from exaspim.operations.affinity import set_process_affinity
+from exaspim.operations.focus_metric import normalized_gradient_energy
+from exaspim.operations.cpu_img_downsample import align_region, downsample_region
 import array
 
 class MIPProcessor(Process):
-    """Class for assembling 3 MIP images from raw images off the camera."""
+    """Class for assembling 3 MIP images from raw images off the camera.
+
+    Optionally, every `focus_sample_period`-th frame is also scored with
+    :func:`normalized_gradient_energy`. The (frame index, focus) curve is
+    written next to the MIPs and put on :attr:`focus_results` when the
+    stack is done.
+
+    Optionally, a downsampled copy of the XY MIP is put on :attr:`previews`
+    when the stack is done, for consumers like tile registration.
+
+    The producer sets :attr:`frame_index` to the z index of each image
+    before flagging it, so a reacquired chunk overwrites its earlier rows.
+    """
 
     def __init__(self, x_tile_num: int, y_tile_num: int, vol_z_voxels: int,
                  img_size_x_pixels: int, img_size_y_pixels: int,
                  img_pixel_dtype: np.dtype, shm_name: str, file_dest: Path,
-                 wavelength: int):
+                 wavelength: int, compression: str = None,
+                 cpu_affinity: list[int] = None,
+                 focus_sample_period: int = 0, focus_downsample: int = 4,
+                 preview_level: int = None, pyramid_min_size: int = 0):
         """Init.
         :param x_tile_num: current tile number in x dimension
         :param y_tile_num: current tile number in y dimension
@@ -23,10 +41,21 @@ class MIPProcessor(Process):
             numpy array where the latest image is being written.
         :param file_dest: destination of the 3 MIP files.
         :param wavelength: wavelength of laser used to acquire images
+        :param compression: TIFF compression for the MIP files or None.
+        :param cpu_affinity: CPUs to run on, or None to run on any.
+        :param focus_sample_period: score the focus of every this many
+            frames, or 0 to disable.
+        :param focus_downsample: score focus on every this many rows and
+            columns.
+        :param preview_level: pyramid level (each level halves the
+            resolution) of the XY MIP preview, or None for no preview.
+        :param pyramid_min_size: write MIPs as pyramidal OME-TIFFs down to
+            this size (see :class:`ImageWriter`), or 0 for single resolution.
         """
         super().__init__()
         self.more_images = Event()
         self.new_image = Event()
+        self.frame_index = Value('i', 0)  # z index of the latest image.
         self.new_image.clear()
         self.more_images.clear()
         self.x_tile_num = x_tile_num
@@ -44,22 +73,69 @@ class MIPProcessor(Process):
 
         self.file_dest = file_dest
         self.wavelength = wavelength
+        self.compression = compression
+        self.cpu_affinity = cpu_affinity
+        self.focus_sample_period = focus_sample_period
+        self.focus_downsample = focus_downsample
+        self.focus_results = Queue()
+        self.preview_level = preview_level
+        self.previews = Queue()
+        self.pyramid_min_size = pyramid_min_size
+
+    def mip_paths(self):
+        """Return {'xy', 'yz', 'xz'} paths of the 3 MIP files."""
+        return {projection: self.file_dest / Path(
+                    f"mip_{projection}_tile_x_{self.x_tile_num:04}_"
+                    f"y_{self.y_tile_num:04}_z_0000_ch_{self.wavelength}.tiff")
+                for projection in ('xy', 'yz', 'xz')}
+
+    def mip_shapes(self):
+        """Return {'xy', 'yz', 'xz'} shapes of the 3 MIPs."""
+        return {'xy': self.mip_xy.shape, 'yz': self.mip_yz.shape,
+                'xz': self.mip_xz.shape}
 
     def run(self):
-        frame_index = 0
-        # Build mips. Assume frames increment sequentially in z.
+        set_process_affinity(self.cpu_affinity)
+        focus = {}  # {frame index: focus}; a reacquired frame replaces it.
+        # Build mips.
 
         while self.more_images.is_set():
             if self.new_image.is_set():
+                frame_index = self.frame_index.value
                 self.latest_img = np.ndarray(self.shm_shape, self.dtype, buffer=self.shm.buf)
                 self.mip_xy = np.maximum(self.mip_xy, self.latest_img).astype(np.uint16)
                 self.mip_yz[:, frame_index] = np.max(self.latest_img, axis=0)
                 self.mip_xz[frame_index, :] = np.max(self.latest_img, axis=1)
-                frame_index += 1
+                # Copy a subsampled frame and score it after releasing the
+                # shared image so acquisition isn't held up.
+                sample = None
+                if self.focus_sample_period \
+                        and frame_index % self.focus_sample_period == 0:
+                    step = self.focus_downsample
+                    sample = self.latest_img[::step, ::step].copy()
                 self.new_image.clear()
+                if sample is not None:
+                    focus[frame_index] = normalized_gradient_energy(sample)
 
-        tifffile.imwrite(self.file_dest/Path(f"mip_xy_tile_x_{self.x_tile_num:04}_y_{self.y_tile_num:04}_z_0000_ch_{self.wavelength}.tiff"), self.mip_xy)
-        tifffile.imwrite(self.file_dest / Path(f"mip_yz_tile_x_{self.x_tile_num:04}_y_{self.y_tile_num:04}_z_0000_ch_{self.wavelength}.tiff"), self.mip_yz)
-        tifffile.imwrite(self.file_dest / Path(f"mip_xz_tile_x_{self.x_tile_num:04}_y_{self.y_tile_num:04}_z_0000_ch_{self.wavelength}.tiff"), self.mip_xz)
+        if self.preview_level is not None:
+            roi = align_region((0, self.mip_xy.shape[0], 0, self.mip_xy.shape[1]),
+                               self.preview_level, self.mip_xy.shape)
+            self.previews.put(downsample_region(self.mip_xy, roi, self.preview_level))
+        # This process is joined before the next stack starts, so the MIPs
+        # are written while the next tile's stage moves and background run.
+        for projection, mip in [('xy', self.mip_xy), ('yz', self.mip_yz),
+                                ('xz', self.mip_xz)]:
+            write_image(self.mip_paths()[projection], mip, self.compression,
+                        pyramid_min_size=self.pyramid_min_size)
+        if self.focus_sample_period:
+            focus_frames = sorted(focus)
+            focus_values = [focus[frame] for frame in focus_frames]
+            focus_path = self.file_dest / Path(f"focus_tile_x_{self.x_tile_num:04}_y_{self.y_tile_num:04}_z_0000_ch_{self.wavelength}.csv")
+            np.savetxt(focus_path, np.column_stack([focus_frames, focus_values]),
+                       fmt=['%d', '%.6g'], delimiter=',', header='frame,focus',
+                       comments='')
+            self.focus_results.put({'frames': focus_frames,
+                                    'focus': focus_values,
+                                    'file': str(focus_path)})
 
     # Done MIPping! Cleanup. Process exits.
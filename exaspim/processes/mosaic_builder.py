@@ -0,0 +1,132 @@
+"""Assemble a low resolution overview of the specimen while it is imaged."""
+import logging
+import numpy as np
+from math import ceil, log2
+from pathlib import Path
+from queue import Queue
+from threading import Thread, Lock
+from exaspim.operations.cpu_img_downsample import align_region, downsample_region
+
+
+class MosaicBuilder(Thread):
+    """Thread that places each tile's downsampled XY MIP into a per-channel
+    mosaic canvas at the tile's stage position.
+
+    Canvases are memory-mapped .npy files, so they stay viewable (i.e: with
+    ``np.load(path, mmap_mode='r')`` from another process) and only the
+    pages being written occupy memory. Overlapping tiles are blended with a
+    maximum, like the MIPs themselves. Tiles are downsampled further if
+    needed to keep each canvas under `max_pixels`.
+
+    .. code-block: python
+
+        mosaic = MosaicBuilder(deriv_dir, (0, 0), (30000, 20000), (5.98, 5.98))
+        mosaic.start()
+        mosaic.add_tile(488, (stage_x_um, stage_y_um), mip_xy_level_3)
+        mosaic.close()
+    """
+
+    def __init__(self, dest_path: Path, origin_um: tuple, size_um: tuple,
+                 pixel_size_um: tuple, max_pixels: int = 100_000_000,
+                 invert_x: bool = False, invert_y: bool = False):
+        """Init.
+
+        :param dest_path: folder to write mosaic_ch_<channel>.npy files to.
+        :param origin_um: (x, y) stage position of the mosaic's first pixel.
+        :param size_um: (x, y) extent of the mosaic.
+        :param pixel_size_um: (x, y) pixel size of the tiles handed to
+            :meth:`add_tile`.
+        :param max_pixels: upper bound on the pixels in each canvas.
+        :param invert_x: image columns increase along -x.
+        :param invert_y: image rows increase along -y.
+        """
+        super().__init__(daemon=True)
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.dest_path = Path(dest_path)
+        self.origin_um = origin_um
+        self.invert_x = invert_x
+        self.invert_y = invert_y
+        # Extra pyramid levels needed to fit the canvas in max_pixels.
+        full_pixels = (size_um[0] / pixel_size_um[0]) * (size_um[1] / pixel_size_um[1])
+        self.level = ceil(log2(full_pixels / max_pixels) / 2) \
+            if full_pixels > max_pixels else 0
+        self.pixel_size_um = (pixel_size_um[0] * 2**self.level,
+                              pixel_size_um[1] * 2**self.level)
+        self.shape = (ceil(size_um[1] / self.pixel_size_um[1]),
+                      ceil(size_um[0] / self.pixel_size_um[0]))
+        self.canvases = {}  # {channel: memory-mapped ndarray}
+        self.canvas_lock = Lock()
+        self.pending = Queue()
+
+    def path(self, channel: int):
+        return self.dest_path / f"mosaic_ch_{channel}.npy"
+
+    def add_tile(self, channel: int, position_um: tuple, mip_xy):
+        """Place a tile centered at `position_um` (x, y) in the mosaic.
+
+        :param mip_xy: the tile's XY MIP at the pixel size given to init.
+        """
+        self.pending.put((channel, position_um, mip_xy))
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            try:
+                self.place(*item)
+            except Exception:
+                self.log.exception(f"Could not add tile at {item[1]} to the "
+                                   f"{item[0]}[nm] channel mosaic.")
+
+    def place(self, channel: int, position_um: tuple, mip_xy):
+        if self.level:
+            roi = align_region((0, mip_xy.shape[0], 0, mip_xy.shape[1]),
+                               self.level, mip_xy.shape)
+            mip_xy = downsample_region(mip_xy, roi, self.level)
+        # Orient the tile so columns run along +x and rows along +y.
+        if self.invert_x:
+            mip_xy = mip_xy[:, ::-1]
+        if self.invert_y:
+            mip_xy = mip_xy[::-1, :]
+        rows, cols = mip_xy.shape
+        col = round((position_um[0] - self.origin_um[0]) / self.pixel_size_um[0] - cols / 2)
+        row = round((position_um[1] - self.origin_um[1]) / self.pixel_size_um[1] - rows / 2)
+        # Clip the tile to the canvas.
+        row_start, col_start = max(row, 0), max(col, 0)
+        row_stop = min(row + rows, self.shape[0])
+        col_stop = min(col + cols, self.shape[1])
+        if row_stop <= row_start or col_stop <= col_start:
+            self.log.warning(f"Tile at {position_um}[um] is outside the mosaic.")
+            return
+        with self.canvas_lock:
+            canvas = self.canvases.get(channel, None)
+            if canvas is None:
+                canvas = np.lib.format.open_memmap(self.path(channel), mode='w+',
+                                                   dtype=mip_xy.dtype,
+                                                   shape=self.shape)
+                self.canvases[channel] = canvas
+            region = canvas[row_start:row_stop, col_start:col_stop]
+            np.maximum(region, mip_xy[row_start - row:row_stop - row,
+                                      col_start - col:col_stop - col], out=region)
+            canvas.flush()
+
+    def get_mosaic(self, channel: int):
+        """Return a read-only view of a channel's mosaic, or None if it has
+        no tiles yet. The view updates as tiles are added."""
+        with self.canvas_lock:
+            canvas = self.canvases.get(channel, None)
+            if canvas is None:
+                return None
+            view = canvas.view(np.ndarray)
+            view.flags.writeable = False
+            return view
+
+    def close(self, timeout: float = None):
+        """Place pending tiles and release the canvases."""
+        self.pending.put(None)
+        self.join(timeout=timeout)
+        with self.canvas_lock:
+            for canvas in self.canvases.values():
+                canvas.flush()
+            self.canvases.clear()
@@ -0,0 +1,196 @@
+"""Send stack chunks to a StackWriter running on another host."""
+import json
+import numpy as np
+import socket
+import struct
+from ctypes import c_wchar
+from math import ceil
+from multiprocessing import Process, Array, Event
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from select import select
+from time import perf_counter
+from exaspim.operations.affinity import set_process_affinity
+
+# Socket buffer size. Larger buffers keep the link busy across acks.
+SOCKET_BUFFER_BYTES = 64 * 1024**2
+ERROR_MESSAGE_LENGTH = 1024  # characters of a failure reported to the parent.
+_HEADER = struct.Struct("!Q")  # length prefix of each JSON message.
+
+
+def send_message(sock: socket.socket, message: dict):
+    """Send a length-prefixed JSON message."""
+    payload = json.dumps(message).encode()
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_exact_into(sock: socket.socket, view: memoryview):
+    """Fill `view` from the socket without intermediate copies."""
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connection closed mid-message.")
+        received += count
+
+
+def recv_message(sock: socket.socket):
+    """Receive a length-prefixed JSON message."""
+    header = bytearray(_HEADER.size)
+    recv_exact_into(sock, memoryview(header))
+    payload = bytearray(_HEADER.unpack(header)[0])
+    recv_exact_into(sock, memoryview(payload))
+    return json.loads(payload)
+
+
+def tune_socket(sock: socket.socket):
+    """Disable Nagle's algorithm and enlarge socket buffers for bulk data."""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_BYTES)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_BYTES)
+
+
+class RemoteStackWriter(Process):
+    """Drop-in replacement for :class:`StackWriter` that streams each chunk
+    over TCP to a :class:`StackWriterServer`, which writes the file.
+
+    The acquisition loop hands over chunks exactly as it does to a local
+    StackWriter: set :attr:`shm_name` and clear :attr:`done_reading`. The
+    chunk is sent straight from shared memory. :attr:`done_reading` is set
+    again once the server acknowledges the chunk, which it does after its
+    own StackWriter has taken the chunk, so a slow remote writer applies
+    backpressure to acquisition just like a slow local one. The process
+    exits once the server reports that the file is complete. If the
+    connection fails or the server reports an error, the process exits
+    with a nonzero exitcode and the reason in :attr:`error`.
+    """
+
+    def __init__(self, address: tuple,
+                 image_rows: int, image_columns: int, image_count: int,
+                 first_img_centroid_x: float, first_img_centroid_y: float,
+                 pixel_x_size_um: float, pixel_y_size_um: float,
+                 pixel_z_size_um: float,
+                 chunk_size: int,
+                 chunk_dimension_order: tuple,
+                 thread_count: int, compression_style: str,
+                 datatype: str, dest_path: Path, stack_name: str,
+                 channel_name: str, viz_color_hex: str,
+                 cpu_affinity: list[int] = None):
+        """Setup the RemoteStackWriter.
+
+        :param address: (host, port) of the StackWriterServer.
+
+        The remaining parameters are the same as :class:`StackWriter`'s,
+        except that `dest_path` is ignored; the server writes to its own
+        destination folder, and `cpu_affinity` only pins the sending
+        process.
+        """
+        super().__init__()
+        self.address = tuple(address)
+        chunk_shape_map = {'x': image_columns,
+                           'y': image_rows,
+                           'z': chunk_size}
+        # Everything the server needs to create its own StackWriter.
+        self.stack_kwds = {'image_rows': image_rows,
+                           'image_columns': image_columns,
+                           'image_count': image_count,
+                           'first_img_centroid_x': first_img_centroid_x,
+                           'first_img_centroid_y': first_img_centroid_y,
+                           'pixel_x_size_um': pixel_x_size_um,
+                           'pixel_y_size_um': pixel_y_size_um,
+                           'pixel_z_size_um': pixel_z_size_um,
+                           'chunk_size': chunk_size,
+                           'chunk_dimension_order': list(chunk_dimension_order),
+                           'thread_count': thread_count,
+                           'compression_style': compression_style,
+                           'datatype': datatype,
+                           'stack_name': stack_name,
+                           'channel_name': channel_name,
+                           'viz_color_hex': viz_color_hex}
+        self.channel_name = channel_name
+        self.cpu_affinity = cpu_affinity
+        self.img_count = image_count
+        self.chunk_size = chunk_size
+        self.shm_shape = [chunk_shape_map[x] for x in chunk_dimension_order]
+        self.shm_nbytes = \
+            int(np.prod(self.shm_shape, dtype=np.int64)*np.dtype(datatype).itemsize)
+        self._shm_name = Array(c_wchar, 32)  # hidden and exposed via property.
+        self._error = Array(c_wchar, ERROR_MESSAGE_LENGTH)  # exposed via property.
+        # Flow control attributes to synchronize inter-process communication.
+        self.done_reading = Event()
+        self.done_reading.set()  # Set after the server has taken the chunk.
+
+    @property
+    def shm_name(self):
+        """Convenience getter to extract the shared memory address (string)
+        from the c array."""
+        return str(self._shm_name[:]).split('\x00')[0]
+
+    @shm_name.setter
+    def shm_name(self, name: str):
+        """Convenience setter to set the string value within the c array."""
+        for i, c in enumerate(name):
+            self._shm_name[i] = c
+        self._shm_name[len(name)] = '\x00'  # Null terminate the string.
+
+    @property
+    def error(self):
+        """Why the process failed, or an empty string."""
+        return str(self._error[:]).split('\x00')[0]
+
+    @error.setter
+    def error(self, message: str):
+        message = message[:ERROR_MESSAGE_LENGTH - 1]
+        for i, c in enumerate(message):
+            self._error[i] = c
+        self._error[len(message)] = '\x00'  # Null terminate the string.
+
+    def run(self):
+        """Stream every chunk of the stack to the server, then wait for it
+        to finish writing the file."""
+        set_process_affinity(self.cpu_affinity)
+        try:
+            self._send_stack()
+        except Exception as e:
+            self.error = f"{self.address[0]}:{self.address[1]}: {e}"
+            raise
+
+    def _send_stack(self):
+        with socket.create_connection(self.address) as sock:
+            tune_socket(sock)
+            send_message(sock, {'type': 'stack', 'kwds': self.stack_kwds})
+            chunk_count = ceil(self.img_count/self.chunk_size)
+            for chunk_num in range(chunk_count):
+                # Wait for new data. The server only speaks out of turn to
+                # report an error, so don't wait for a chunk to hear it.
+                while self.done_reading.is_set():
+                    readable, _, _ = select([sock], [], [], 0.001)
+                    if readable:
+                        reply = recv_message(sock)
+                        raise ConnectionError(f"Server failed to write the "
+                                              f"stack: {reply.get('message', reply)}")
+                shm = SharedMemory(self.shm_name, create=False, size=self.shm_nbytes)
+                start_time = perf_counter()
+                send_message(sock, {'type': 'chunk', 'index': chunk_num,
+                                    'nbytes': self.shm_nbytes})
+                # Send directly from shared memory.
+                with shm.buf[:self.shm_nbytes] as chunk_view:
+                    sock.sendall(chunk_view)
+                ack = recv_message(sock)  # Blocks until the server takes it.
+                if ack.get('type') == 'error':
+                    raise ConnectionError(f"Server failed to write the "
+                                          f"stack: {ack.get('message')}")
+                if ack != {'type': 'ack', 'index': chunk_num}:
+                    raise ConnectionError(f"Unexpected reply from server: {ack}")
+                elapsed_time = perf_counter() - start_time
+                print(f"Ch{self.channel_name} sent chunk "
+                      f"{chunk_num+1}/{chunk_count} to {self.address[0]} in "
+                      f"{elapsed_time:.3f}[s] "
+                      f"({self.shm_nbytes/1.0e6/elapsed_time:.1f}[MB/s]).")
+                shm.close()
+                self.done_reading.set()
+            reply = recv_message(sock)
+            if reply.get('type') != 'done':
+                raise ConnectionError(f"Server failed to write the stack: "
+                                      f"{reply.get('message', reply)}")
+        print(f"Ch{self.channel_name} remote stack compression complete.")
@@ -5,9 +5,15 @@ from ctypes import c_wchar
 from PyImarisWriter import PyImarisWriter as pw
 from pathlib import Path
 from datetime import datetime
-from matplotlib.colors import hex2color
 from time import sleep, perf_counter
 from math import ceil
+from exaspim.operations.affinity import set_process_affinity
+
+
+def hex_to_rgb(hex_color: str):
+    """Convert a '#rrggbb' color to (r, g, b) floats between 0 and 1."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) / 255. for i in (0, 2, 4))
 
 
 class ImarisProgressChecker(pw.CallbackClass):
@@ -39,7 +45,8 @@ class StackWriter(Process):
                  chunk_dimension_order: tuple,
                  thread_count: int, compression_style: str,
                  datatype: str, dest_path: Path, stack_name: str,
-                 channel_name: str, viz_color_hex: str):
+                 channel_name: str, viz_color_hex: str,
+                 cpu_affinity: list[int] = None):
         """Setup the StackWriter to write a compressed stack of images to disk
         as a compressed Imaris file.
 
@@ -62,6 +69,8 @@ class StackWriter(Process):
             .ims extension is not present, it will be appended to the file.
         :param channel_name: name of the channel as it appears in the file.
         :param viz_color_hex: color (as a hex string) for the file signal data.
+        :param cpu_affinity: CPUs to run on (including ImarisWriter's
+            compression threads), or None to run on any.
         """
         super().__init__()
         # Lookups for deducing order.
@@ -90,6 +99,7 @@ class StackWriter(Process):
             if stack_name.endswith(".ims") else f"{stack_name}.ims"
         self.hex_color = viz_color_hex
         self.converter = None
+        self.cpu_affinity = cpu_affinity
         # Specs for reconstructing the shared memory object.
         self._shm_name = Array(c_wchar, 32)  # hidden and exposed via property.
         # This is almost always going to be: (chunk_size, rows, columns).
@@ -122,6 +132,8 @@ class StackWriter(Process):
 
         This function executes when called with the start() method.
         """
+        # Pin before ImarisWriter creates its threads so they inherit it.
+        set_process_affinity(self.cpu_affinity)
         image_size = pw.ImageSize(x=self.cols, y=self.rows, z=self.img_count,
                                   c=1, t=1)
         # c = channel, t = time. These fields are unused for now.
@@ -141,7 +153,7 @@ class StackWriter(Process):
         # Limit compression options.
         if self.compression_style == 'lz4':
             opts.mCompressionAlgorithmType = pw.eCompressionAlgorithmShuffleLZ4
-        elif self.compression_style.upper() == 'None':
+        elif self.compression_style.lower() == 'none':
             opts.mCompressionAlgorithmType = pw.eCompressionAlgorithmNone
 
         application_name = 'PyImarisWriter'
@@ -207,7 +219,7 @@ class StackWriter(Process):
         parameters.set_channel_name(0, self.channel_name)
         time_infos = [datetime.today()]
         color_infos = [pw.ColorInfo()]
-        color_spec = pw.Color(*(*hex2color(self.hex_color), 1.0))
+        color_spec = pw.Color(*(*hex_to_rgb(self.hex_color), 1.0))
         color_infos[0].set_base_color(color_spec)
         # color_infos[0].set_range(0,200)  # possible to autoexpose through this cmd.
 
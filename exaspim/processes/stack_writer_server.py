@@ -0,0 +1,114 @@
+"""Receive stack chunks over TCP and write them with a local StackWriter."""
+import logging
+import socket
+from math import ceil
+from pathlib import Path
+from threading import Thread
+from time import sleep
+from exaspim.data_structures.shared_double_buffer import SharedDoubleBuffer
+from exaspim.processes.remote_stack_writer import send_message, recv_message, \
+    recv_exact_into, tune_socket
+from exaspim.processes.stack_writer import StackWriter
+
+
+class StackWriterServer:
+    """Server side of :class:`RemoteStackWriter`.
+
+    Each connection carries one stack. The server receives every chunk
+    directly into the write half of a :class:`SharedDoubleBuffer`, hands it
+    to a local :class:`StackWriter` once that writer is idle, and then
+    acknowledges the chunk. Stacks on separate connections are written
+    concurrently.
+
+    .. code-block: python
+
+        server = StackWriterServer(Path("D:/"), port=5555)
+        server.serve_forever()
+    """
+
+    def __init__(self, dest_path: Path, host: str = "0.0.0.0",
+                 port: int = 5555, writer_cls=StackWriter):
+        """Init.
+
+        :param dest_path: folder to write stacks to.
+        :param host: interface to listen on.
+        :param port: port to listen on. 0 picks a free port.
+        :param writer_cls: StackWriter class to write stacks with.
+        """
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.dest_path = Path(dest_path)
+        self.writer_cls = writer_cls
+        self.sock = socket.create_server((host, port))
+        self.address = self.sock.getsockname()[:2]
+        self.workers = []
+
+    def serve_forever(self):
+        """Accept connections until :meth:`close` is called."""
+        self.log.info(f"Listening for stacks on {self.address}.")
+        while True:
+            try:
+                conn, address = self.sock.accept()
+            except OSError:
+                return  # Socket closed.
+            worker = Thread(target=self.handle_connection, args=(conn, address),
+                            daemon=True)
+            worker.start()
+            self.workers = [w for w in self.workers if w.is_alive()] + [worker]
+
+    def handle_connection(self, conn: socket.socket, address):
+        """Receive and write one stack."""
+        with conn:
+            tune_socket(conn)
+            try:
+                self.receive_stack(conn)
+            except Exception as e:
+                self.log.exception(f"Failed to receive stack from {address}.")
+                try:
+                    send_message(conn, {'type': 'error', 'message': repr(e)})
+                except OSError:
+                    pass
+
+    def receive_stack(self, conn: socket.socket):
+        header = recv_message(conn)
+        if header.get('type') != 'stack':
+            raise ValueError(f"Expected a stack header but got: {header}")
+        kwds = header['kwds']
+        kwds['chunk_dimension_order'] = tuple(kwds['chunk_dimension_order'])
+        kwds['dest_path'] = self.dest_path
+        chunk_shape_map = {'x': kwds['image_columns'],
+                           'y': kwds['image_rows'],
+                           'z': kwds['chunk_size']}
+        mem_shape = [chunk_shape_map[x] for x in kwds['chunk_dimension_order']]
+        img_buffer = SharedDoubleBuffer(mem_shape, dtype=kwds['datatype'])
+        writer = self.writer_cls(**kwds)
+        writer.start()
+        self.log.info(f"Receiving {kwds['stack_name']}.")
+        try:
+            chunk_count = ceil(kwds['image_count'] / kwds['chunk_size'])
+            for chunk_num in range(chunk_count):
+                message = recv_message(conn)
+                if message != {'type': 'chunk', 'index': chunk_num,
+                               'nbytes': img_buffer.nbytes}:
+                    raise ValueError(f"Unexpected chunk header: {message}")
+                # Receive while the writer compresses the previous chunk.
+                recv_exact_into(conn, memoryview(img_buffer.write_buf).cast('B'))
+                while not writer.done_reading.is_set():
+                    if not writer.is_alive():
+                        raise RuntimeError("StackWriter exited early.")
+                    sleep(0.001)
+                img_buffer.toggle_buffers()
+                writer.shm_name = img_buffer.read_buf_mem_name
+                writer.done_reading.clear()
+                send_message(conn, {'type': 'ack', 'index': chunk_num})
+            writer.join()
+            send_message(conn, {'type': 'done'})
+            self.log.info(f"Wrote {kwds['stack_name']}.")
+        finally:
+            if writer.is_alive():
+                writer.terminate()
+                writer.join()
+            img_buffer.close_and_unlink()
+
+    def close(self):
+        """Stop accepting new connections."""
+        self.sock.close()
@@ -0,0 +1,105 @@
+"""Background polling of slow-changing instrument health readings."""
+import logging
+from collections import deque
+from threading import Thread, Event
+from time import perf_counter, time
+
+
+class TelemetryPoller(Thread):
+    """Thread that reads instrument health values at per-channel intervals
+    and keeps a ring-buffered time series of each.
+
+    Readers get cached values from :meth:`latest` or :meth:`history` and
+    never touch the hardware. A channel can be given a `condition` callable
+    to skip reads while its device is busy (i.e: the stage during a stack).
+
+    .. code-block: python
+
+        poller = TelemetryPoller(history_length=1000)
+        poller.add_channel('sensor_temperature', cam.get_sensor_temperature,
+                           period_s=10, units='C')
+        poller.start()
+        timestamp, value = poller.latest('sensor_temperature')
+        poller.close()
+    """
+
+    def __init__(self, history_length: int = 1000):
+        """Init.
+
+        :param history_length: samples kept per channel. Older samples are
+            discarded.
+        """
+        super().__init__(daemon=True)
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.history_length = history_length
+        self.channels = {}  # {name: channel spec dict}
+        self.stop_requested = Event()
+
+    def add_channel(self, name: str, read_fn, period_s: float,
+                    units: str = None, condition=None):
+        """Poll `read_fn()` every `period_s` seconds.
+
+        :param name: channel name.
+        :param read_fn: callable returning the current value.
+        :param period_s: time between reads.
+        :param units: units of the value, for logging.
+        :param condition: optional callable; the read is skipped (and
+            retried at the next period) while it returns False.
+        """
+        self.channels[name] = {'read_fn': read_fn,
+                               'period_s': period_s,
+                               'units': units,
+                               'condition': condition,
+                               'next_read_time': perf_counter(),
+                               'errors': 0,
+                               # deque appends are atomic, so readers
+                               # don't need a lock.
+                               'samples': deque(maxlen=self.history_length)}
+
+    def poll(self, now: float):
+        """Read every channel that is due. Returns the time of the next read."""
+        next_read_time = now + 1.0
+        for name, channel in self.channels.items():
+            if now >= channel['next_read_time']:
+                channel['next_read_time'] = now + channel['period_s']
+                condition = channel['condition']
+                if condition is None or condition():
+                    try:
+                        value = channel['read_fn']()
+                        channel['samples'].append((time(), value))
+                    except Exception:
+                        channel['errors'] += 1
+                        self.log.debug("Could not read %s.", name, exc_info=True)
+            next_read_time = min(next_read_time, channel['next_read_time'])
+        return next_read_time
+
+    def run(self):
+        while not self.stop_requested.is_set():
+            next_read_time = self.poll(perf_counter())
+            self.stop_requested.wait(max(0., next_read_time - perf_counter()))
+
+    def latest(self, name: str, default=None):
+        """Return the newest (unix time, value) tuple of a channel, or
+        `default` if it hasn't been read yet."""
+        samples = self.channels[name]['samples']
+        try:
+            return samples[-1]
+        except IndexError:
+            return default
+
+    def latest_value(self, name: str, default=None):
+        """Return the newest value of a channel, or `default`."""
+        sample = self.latest(name)
+        return default if sample is None else sample[1]
+
+    def history(self, name: str):
+        """Return a list of (unix time, value) tuples, oldest first."""
+        return list(self.channels[name]['samples'])
+
+    def units(self, name: str):
+        return self.channels[name]['units']
+
+    def close(self, timeout: float = None):
+        """Stop polling."""
+        self.stop_requested.set()
+        self.join(timeout=timeout)
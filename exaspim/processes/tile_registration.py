@@ -0,0 +1,157 @@
+"""Register adjacent tiles from their XY MIPs while acquisition continues."""
+import csv
+import logging
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from time import time
+from exaspim.operations.phase_correlation import phase_correlation
+
+CSV_FIELDS = ['time', 'channel', 'tile_a_x', 'tile_a_y', 'tile_b_x',
+              'tile_b_y', 'offset_x_px', 'offset_y_px', 'offset_x_um',
+              'offset_y_um', 'quality']
+
+
+class TileRegistration(Thread):
+    """Thread that measures how far each pair of adjacent tiles is from the
+    nominal grid by phase correlating the overlapping strips of their
+    downsampled XY MIPs.
+
+    Every measurement is appended to a per-dataset CSV table. An offset is
+    the translation (in full resolution pixels and [um]) to apply to tile b,
+    relative to its nominal position next to tile a, for the tiles to line
+    up. A warning is logged when a reliable measurement exceeds
+    `max_offset_um`, which usually means the stage slipped.
+
+    Tile (x+1, y) is one x grid step along +x from tile (x, y), and tile
+    (x, y+1) is one y grid step along -y. Image columns are assumed to
+    increase along +x and rows along +y unless `invert_x`/`invert_y` are set.
+
+    Tiles are expected column by column in increasing x, the order Exaspim
+    acquires them in, so only the previous column of MIPs is kept around.
+
+    .. code-block: python
+
+        registration = TileRegistration(table_path, 2128, 1064, 8,
+                                        (0.748, 0.748))
+        registration.start()
+        registration.add_tile(488, 0, 0, mip_xy_level_3)
+        registration.close()
+    """
+
+    def __init__(self, table_path: Path, overlap_x_px: int, overlap_y_px: int,
+                 downsample: int, pixel_size_um: tuple,
+                 min_quality: float = 0.05, max_offset_um: float = 20.,
+                 invert_x: bool = False, invert_y: bool = False):
+        """Init.
+
+        :param table_path: CSV file to append measurements to.
+        :param overlap_x_px: full resolution columns shared by x neighbors.
+        :param overlap_y_px: full resolution rows shared by y neighbors.
+        :param downsample: factor by which tiles are downsampled.
+        :param pixel_size_um: full resolution (x, y) pixel size.
+        :param min_quality: measurements below this correlation peak height
+            are recorded but never warned about.
+        :param max_offset_um: warn about offsets larger than this.
+        :param invert_x: image columns increase along -x.
+        :param invert_y: image rows increase along -y.
+        """
+        super().__init__(daemon=True)
+        self.log = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self.table_path = Path(table_path)
+        self.overlap_x_px = overlap_x_px
+        self.overlap_y_px = overlap_y_px
+        self.downsample = downsample
+        self.pixel_size_um = pixel_size_um
+        self.min_quality = min_quality
+        self.max_offset_um = max_offset_um
+        self.invert_x = invert_x
+        self.invert_y = invert_y
+        self.tiles = {}  # {(channel, x, y): downsampled XY MIP}, at most 2 columns.
+        self.offsets = []  # every measurement, as written to the table.
+        self.pending = Queue()
+
+    def add_tile(self, channel: int, x: int, y: int, mip_xy):
+        """Register a tile against any neighbors added before it.
+
+        :param mip_xy: the tile's XY MIP, downsampled by `downsample`.
+        """
+        self.pending.put((channel, x, y, mip_xy))
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            try:
+                self.register(*item)
+            except Exception:
+                self.log.exception(f"Could not register tile {item[1:3]} of "
+                                   f"{item[0]}[nm] channel.")
+
+    def register(self, channel: int, x: int, y: int, mip_xy):
+        self.tiles[(channel, x, y)] = mip_xy
+        for nx, ny in [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]:
+            neighbor = self.tiles.get((channel, nx, ny), None)
+            if neighbor is None:
+                continue
+            # Order each pair so that b is at a larger tile index than a.
+            if (nx, ny) < (x, y):
+                self.measure(channel, (nx, ny), neighbor, (x, y), mip_xy)
+            else:
+                self.measure(channel, (x, y), mip_xy, (nx, ny), neighbor)
+        # Nothing after this tile overlaps columns before x, so drop them.
+        for key in [key for key in self.tiles
+                    if key[0] == channel and key[1] < x - 1]:
+            del self.tiles[key]
+        self.tiles.pop((channel, x - 1, y), None)  # its +x neighbor is done.
+
+    def measure(self, channel: int, tile_a: tuple, mip_a, tile_b: tuple, mip_b):
+        """Phase correlate the overlap of two adjacent tiles and record it."""
+        along_x = tile_b[0] != tile_a[0]
+        if along_x:  # b overlaps a's +x edge.
+            overlap = max(1, self.overlap_x_px // self.downsample)
+            strip_a, strip_b = mip_a[:, -overlap:], mip_b[:, :overlap]
+            if self.invert_x:
+                strip_a, strip_b = mip_a[:, :overlap], mip_b[:, -overlap:]
+        else:  # b overlaps a's -y edge.
+            overlap = max(1, self.overlap_y_px // self.downsample)
+            strip_a, strip_b = mip_a[:overlap, :], mip_b[-overlap:, :]
+            if self.invert_y:
+                strip_a, strip_b = mip_a[-overlap:, :], mip_b[:overlap, :]
+        rows, cols, quality = phase_correlation(strip_a, strip_b)
+        offset_x_px = cols * self.downsample
+        offset_y_px = rows * self.downsample
+        record = {'time': time(), 'channel': channel,
+                  'tile_a_x': tile_a[0], 'tile_a_y': tile_a[1],
+                  'tile_b_x': tile_b[0], 'tile_b_y': tile_b[1],
+                  'offset_x_px': round(offset_x_px, 2),
+                  'offset_y_px': round(offset_y_px, 2),
+                  'offset_x_um': round(offset_x_px * self.pixel_size_um[0], 3),
+                  'offset_y_um': round(offset_y_px * self.pixel_size_um[1], 3),
+                  'quality': round(quality, 4)}
+        self.offsets.append(record)
+        self._append_to_table(record)
+        offset_um = max(abs(record['offset_x_um']), abs(record['offset_y_um']))
+        if quality >= self.min_quality and offset_um > self.max_offset_um:
+            self.log.warning(f"Tiles {tile_a} and {tile_b} of {channel}[nm] "
+                             f"channel are offset by ({record['offset_x_um']}, "
+                             f"{record['offset_y_um']})[um] from the nominal "
+                             f"grid. Did the stage slip?")
+        else:
+            self.log.debug(f"Tiles {tile_a} and {tile_b} of {channel}[nm] "
+                           f"channel offset: ({record['offset_x_um']}, "
+                           f"{record['offset_y_um']})[um], quality {quality:.3f}.")
+
+    def _append_to_table(self, record: dict):
+        new_table = not self.table_path.exists()
+        with open(self.table_path, 'a', newline='') as table:
+            writer = csv.DictWriter(table, fieldnames=CSV_FIELDS)
+            if new_table:
+                writer.writeheader()
+            writer.writerow(record)
+
+    def close(self, timeout: float = None):
+        """Finish registering pending tiles and stop."""
+        self.pending.put(None)
+        self.join(timeout=timeout)